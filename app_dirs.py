@@ -0,0 +1,33 @@
+"""应用数据目录"""
+import os
+import sys
+
+APP_NAME = 'AudioCalculator'
+
+
+def user_cache_dir():
+    """返回（并创建）当前用户的缓存目录"""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~\\AppData\\Local')
+        path = os.path.join(base, APP_NAME, 'Cache')
+    elif sys.platform == 'darwin':
+        path = os.path.join(os.path.expanduser('~/Library/Caches'), APP_NAME)
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+        path = os.path.join(base, APP_NAME.lower())
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def user_config_dir():
+    """返回（并创建）当前用户的配置目录"""
+    if sys.platform == 'win32':
+        base = os.environ.get('APPDATA') or os.path.expanduser('~\\AppData\\Roaming')
+        path = os.path.join(base, APP_NAME)
+    elif sys.platform == 'darwin':
+        path = os.path.join(os.path.expanduser('~/Library/Application Support'), APP_NAME)
+    else:
+        base = os.environ.get('XDG_CONFIG_HOME') or os.path.expanduser('~/.config')
+        path = os.path.join(base, APP_NAME.lower())
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,71 @@
+"""用户设置：启动时从 JSON 文件读取一次，之后只在内存中读写。
+
+set() 只修改内存中的值并标记为未保存，由界面在一段时间后调用 flush() 批量写回
+（先写临时文件再原子替换），连续切换主题或输入 BPM 时不会每次都写磁盘。文件
+缺失或损坏时使用默认值。只依赖标准库，读取时只用到 json。
+
+用法：
+    settings = Settings(default_settings_path())
+    settings.set('theme', 'light')
+    settings.flush()
+"""
+import json
+import os
+
+from app_dirs import user_config_dir
+
+
+def default_settings_path():
+    return os.path.join(user_config_dir(), 'settings.json')
+
+
+class Settings:
+    """内存中的设置；path 为 None 时不读写文件（基准测试和嵌入使用）"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.values = self._load(path) if path else {}
+        self.dirty = False
+        self.writes = 0  # 实际写入文件的次数
+
+    @staticmethod
+    def _load(path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                values = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return values if isinstance(values, dict) else {}
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+    def set(self, key, value):
+        """修改设置，值有变化时返回 True；只写内存，由 flush() 写回文件"""
+        if key in self.values and self.values[key] == value:
+            return False
+        self.values[key] = value
+        self.dirty = True
+        return True
+
+    def flush(self):
+        """把未保存的修改写回文件，写入成功时返回 True；失败时保留修改，下次再试"""
+        if not self.dirty or not self.path:
+            return False
+        import tempfile  # 只在写入时导入，不拖慢启动
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(self.values, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError:
+            return False
+        self.dirty = False
+        self.writes += 1
+        return True
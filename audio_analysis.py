@@ -0,0 +1,513 @@
+"""离线 BPM 检测：从 WAV / AIFF 音频文件估计速度。
+
+音频数据通过 np.memmap 映射，按固定大小的块读取并混合为单声道；每块用
+向量化的 NumPy FFT 计算频谱通量（spectral flux）作为起音强度包络，再把包络
+逐块累加到有限长度的自相关中。自相关只保留检测所需的延迟范围，与文件时长
+无关，一小时的文件也只占用固定的内存。最后用梳状滤波（各倍数延迟的自相关
+之和）加上以 120 BPM 为中心的先验选出节拍周期，并在最高次谐波处插值细化。
+相差一倍的速度（例如 87 与 174）仅凭信号无法区分，先验会偏向更接近 120 的一个，
+需要时用 min_bpm / max_bpm 限定范围。
+
+现场录音的速度会漂移，单一的 BPM 不够准确。TempoTracker 在同一个包络上按重叠的
+窗口（默认 8 秒、步长 1 秒）逐段估计速度，得到速度曲线（TempoCurve）；曲线可以
+分段并转换为速度图（tempo_map.TempoMap），从而查看各段落的混响 / 延迟参数。
+
+支持的格式：PCM 8/16/24/32 位整数及 32/64 位浮点的 WAV（含 WAVE_FORMAT_EXTENSIBLE），
+AIFF 与未压缩的 AIFF-C（NONE、sowt、fl32、fl64）。
+
+用法：
+    python audio_analysis.py stem.wav [--min-bpm 60] [--max-bpm 200]
+    python audio_analysis.py live.wav --curve [--map live_tempo.txt]
+"""
+import argparse
+import math
+import os
+import struct
+import sys
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+MIN_BPM = 60
+MAX_BPM = 200
+ENVELOPE_RATE = 172      # 包络的目标采样率（Hz），实际值取决于跳步长度
+CHUNK_FRAMES = 1 << 18   # 每次读取的采样帧数
+COMB_HARMONICS = 4       # 梳状滤波使用的倍数
+COMPRESSION = 100        # 频谱幅度的对数压缩系数
+CURVE_WINDOW = 8.0       # 速度曲线的窗口长度（秒）
+CURVE_HOP = 1.0          # 速度曲线的步长（秒）
+TRACK_OCTAVES = 0.5      # 相邻窗口速度先验的宽度（八度）
+SECTION_TOLERANCE = 0.015  # 同一段落内允许的速度偏差（比例）
+MIN_SECTION_SECONDS = 8.0  # 段落的最短时长（秒）
+
+_WAVE_FORMAT_PCM = 1
+_WAVE_FORMAT_IEEE_FLOAT = 3
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class AnalysisCancelled(Exception):
+    pass
+
+
+class AudioInfo:
+    __slots__ = ('path', 'sample_rate', 'channels', 'frames', 'offset', 'sample_width',
+                 'floating', 'big_endian')
+
+    def __init__(self, path, sample_rate, channels, frames, offset, sample_width,
+                 floating=False, big_endian=False):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frames = frames
+        self.offset = offset            # 采样数据在文件中的起始位置
+        self.sample_width = sample_width  # 每个采样的字节数
+        self.floating = floating
+        self.big_endian = big_endian
+
+    @property
+    def duration(self):
+        return self.frames / self.sample_rate
+
+    def memmap(self):
+        """把采样数据映射为 (帧数, 声道数) 的数组；24 位采样多一维字节"""
+        if self.sample_width == 3:
+            dtype, shape = np.uint8, (self.frames, self.channels, 3)
+        else:
+            kind = 'f' if self.floating else ('u' if self.sample_width == 1 and not self.big_endian
+                                              else 'i')
+            dtype = np.dtype(f'{">" if self.big_endian else "<"}{kind}{self.sample_width}')
+            shape = (self.frames, self.channels)
+        return np.memmap(self.path, dtype=dtype, mode='r', offset=self.offset, shape=shape)
+
+    def to_mono(self, block):
+        """把一块采样转换为 -1 到 1 之间的单声道 float32"""
+        if self.sample_width == 3:
+            b = block.astype(np.int32)
+            if self.big_endian:
+                b = b[..., ::-1]
+            samples = b[..., 0] | (b[..., 1] << 8) | (b[..., 2] << 16)
+            samples = (samples ^ 0x800000) - 0x800000
+        else:
+            samples = block
+        mono = samples.mean(axis=1, dtype=np.float32)
+        if self.floating:
+            return mono
+        if self.sample_width == 1 and not self.big_endian:
+            mono -= 128  # WAV 的 8 位采样是无符号数
+        return mono * np.float32(1 / (1 << (self.sample_width * 8 - 1)))
+
+
+def read_audio_info(path):
+    """解析 WAV / AIFF 的文件头，返回 AudioInfo；格式不支持时抛出 ValueError"""
+    with open(path, 'rb') as f:
+        header = f.read(12)
+        if header[:4] == b'RIFF' and header[8:12] == b'WAVE':
+            return _read_wav_info(path, f)
+        if header[:4] == b'FORM' and header[8:12] in (b'AIFF', b'AIFC'):
+            return _read_aiff_info(path, f, header[8:12] == b'AIFC')
+    raise ValueError(f'不支持的音频格式：{os.path.basename(path)}（仅支持 WAV 和 AIFF）')
+
+
+def _chunks(f, endian):
+    """依次产出 (块 ID, 数据起点, 大小)，读到文件末尾为止"""
+    file_size = os.fstat(f.fileno()).st_size
+    position = f.tell()
+    while position + 8 <= file_size:
+        f.seek(position)
+        chunk_id, size = struct.unpack(endian + '4sI', f.read(8))
+        yield chunk_id, position + 8, min(size, file_size - position - 8)
+        position += 8 + size + (size & 1)  # 块按偶数字节对齐
+
+
+def _read_wav_info(path, f):
+    fmt = None
+    for chunk_id, start, size in _chunks(f, '<'):
+        if chunk_id == b'fmt ':
+            f.seek(start)
+            fmt = f.read(size)
+        elif chunk_id == b'data':
+            if fmt is None or len(fmt) < 16:
+                break
+            tag, channels, rate, _, block_align, bits = struct.unpack('<HHIIHH', fmt[:16])
+            if tag == _WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+                tag = struct.unpack('<H', fmt[24:26])[0]  # 子格式 GUID 的前两个字节
+            width = (bits + 7) // 8
+            floating = tag == _WAVE_FORMAT_IEEE_FLOAT
+            if (tag not in (_WAVE_FORMAT_PCM, _WAVE_FORMAT_IEEE_FLOAT) or not channels
+                    or width not in ((4, 8) if floating else (1, 2, 3, 4))):
+                raise ValueError(f'不支持的 WAV 编码（格式 {tag}，{bits} 位）')
+            return AudioInfo(path, rate, channels, size // (width * channels), start, width,
+                             floating=floating)
+    raise ValueError('WAV 文件缺少 fmt 或 data 块')
+
+
+def _read_aiff_info(path, f, compressed):
+    comm = None
+    for chunk_id, start, size in _chunks(f, '>'):
+        if chunk_id == b'COMM':
+            f.seek(start)
+            comm = f.read(size)
+        elif chunk_id == b'SSND':
+            if comm is None or len(comm) < 18:
+                break
+            if size < 8:
+                raise ValueError('AIFF 文件的 SSND 块不完整')
+            channels, frames, bits = struct.unpack('>hIh', comm[:8])
+            rate = _extended_to_float(comm[8:18])
+            compression = comm[18:22] if compressed else b'NONE'
+            f.seek(start)
+            data_offset = struct.unpack('>I', f.read(4))[0]
+            width = (bits + 7) // 8
+            floating = compression in (b'fl32', b'FL32', b'fl64', b'FL64')
+            if floating:
+                width = 4 if compression.lower() == b'fl32' else 8
+            elif compression not in (b'NONE', b'sowt') or width not in (1, 2, 3, 4):
+                raise ValueError(f'不支持的 AIFF 编码（{compression.decode("latin-1")}，{bits} 位）')
+            if channels <= 0:
+                break
+            offset = start + 8 + data_offset
+            frames = min(frames, (size - 8 - data_offset) // (width * channels))
+            return AudioInfo(path, rate, channels, frames, offset, width, floating=floating,
+                             big_endian=compression != b'sowt')
+    raise ValueError('AIFF 文件缺少 COMM 或 SSND 块')
+
+
+def _extended_to_float(data):
+    """80 位 IEEE 扩展精度浮点数（AIFF 的采样率字段）"""
+    exponent, mantissa = struct.unpack('>HQ', data)
+    sign = -1 if exponent & 0x8000 else 1
+    exponent &= 0x7FFF
+    if exponent == 0 and mantissa == 0:
+        return 0.0
+    return sign * mantissa * 2.0 ** (exponent - 16383 - 63)
+
+
+class OnsetEnvelope:
+    """逐块计算起音强度包络（对数幅度谱的正向差分之和）"""
+
+    def __init__(self, sample_rate):
+        self.hop = 2 ** max(6, round(math.log2(sample_rate / ENVELOPE_RATE)))
+        self.frame = 4 * self.hop
+        self.rate = sample_rate / self.hop
+        self.window = np.hanning(self.frame).astype(np.float32)
+        self._pending = np.zeros(0, dtype=np.float32)  # 尚未凑满一帧的采样
+        self._previous = None  # 上一帧的频谱，用于跨块的差分
+
+    def feed(self, samples):
+        buffer = np.concatenate((self._pending, samples))
+        count = (len(buffer) - self.frame) // self.hop + 1 if len(buffer) >= self.frame else 0
+        if count <= 0:
+            self._pending = buffer
+            return np.zeros(0)
+        frames = sliding_window_view(buffer, self.frame)[::self.hop][:count] * self.window
+        spectrum = np.log1p(COMPRESSION * np.abs(np.fft.rfft(frames, axis=1)))
+        previous = spectrum[:1] if self._previous is None else self._previous[None]
+        flux = np.maximum(np.diff(spectrum, axis=0, prepend=previous), 0).sum(axis=1)
+        self._previous = spectrum[-1]
+        self._pending = buffer[count * self.hop:]
+        return flux
+
+
+class TempoAccumulator:
+    """逐块累加包络的自相关，只保留梳状滤波需要的延迟范围"""
+
+    def __init__(self, envelope_rate, min_bpm=MIN_BPM, max_bpm=MAX_BPM):
+        self.rate = envelope_rate
+        self.min_lag = max(1, int(envelope_rate * 60 / max_bpm))
+        self.max_lag = math.ceil(envelope_rate * 60 / min_bpm)
+        size = COMB_HARMONICS * (self.max_lag + 1) + 2
+        self.acf = np.zeros(size)
+        # 之前的包络，开始时用 0 填充，第一块也能得到全部延迟的自相关
+        self._tail = np.zeros(size - 1)
+        self.length = 0
+
+    def feed(self, envelope):
+        if not len(envelope):
+            return
+        # 每块去掉均值，只保留起音的起伏
+        envelope = envelope - envelope.mean()
+        extended = np.concatenate((self._tail, envelope))
+        lags = len(self._tail) + 1
+        windows = sliding_window_view(extended, len(envelope))  # 第 i 行对应延迟 lags-1-i
+        self.acf[:lags] += windows[::-1] @ envelope
+        self._tail = extended[-(len(self.acf) - 1):]
+        self.length += len(envelope)
+
+    def tempo(self):
+        """返回 (BPM, 置信度)；包络太短或没有起伏时抛出 ValueError"""
+        if self.length < 2 * self.max_lag or self.acf[0] <= 0:
+            raise ValueError('音频太短或没有明显的节拍')
+        comb = CombFilter(self.rate, self.min_lag, self.max_lag)
+        acf = self.acf[None]
+        scores = comb.scores(acf)
+        best = np.array([int(np.argmax(scores[0] * comb.prior))])
+        bpms, confidences = comb.refine(acf, scores, best)
+        return float(bpms[0]), float(confidences[0])
+
+
+class CombFilter:
+    """在一批自相关上计算梳状滤波得分并细化节拍周期
+
+    候选周期取 1/4 个包络采样的步长，各倍数处的自相关用线性插值；插值的下标和
+    权重只与延迟有关，对整批自相关一次算出。
+    """
+
+    def __init__(self, envelope_rate, min_lag, max_lag):
+        self.rate = envelope_rate
+        self.lags = np.arange(min_lag, max_lag + 0.25, 0.25)
+        positions = self.lags[None] * np.arange(1, COMB_HARMONICS + 1)[:, None]
+        self._index = np.floor(positions).astype(np.intp)
+        self._fraction = positions - self._index
+        self.bpms = 60 * envelope_rate / self.lags
+        self.prior = np.exp(-0.5 * np.log2(self.bpms / 120) ** 2)
+
+    def scores(self, acf):
+        """acf 的每一行为一个自相关（长度至少 COMB_HARMONICS × (max_lag + 1) + 2）"""
+        index, fraction = self._index, self._fraction
+        return ((1 - fraction) * acf[:, index] + fraction * acf[:, index + 1]).sum(axis=1)
+
+    def refine(self, acf, scores, best):
+        """在最高次谐波附近找自相关峰并做抛物线插值，精度提高 COMB_HARMONICS 倍
+
+        best 为每行选中的候选下标，返回 (BPM 数组, 置信度数组)。
+        """
+        rows = np.arange(len(acf))
+        harmonic = np.rint(COMB_HARMONICS * self.lags[best]).astype(np.intp)
+        window = harmonic[:, None] + np.arange(-(COMB_HARMONICS // 2), COMB_HARMONICS // 2 + 1)
+        peak = window[rows, np.argmax(acf[rows[:, None], window], axis=1)]
+        a, b, c = acf[rows, peak - 1], acf[rows, peak], acf[rows, peak + 1]
+        denominator = a - 2 * b + c
+        safe = np.where(denominator < 0, denominator, -1.0)
+        offset = np.where(denominator < 0, 0.5 * (a - c) / safe, 0.0)
+        refined = (peak + offset) / COMB_HARMONICS
+        confidence = np.clip(scores[rows, best] / (acf[:, 0] * COMB_HARMONICS), 0.0, 1.0)
+        return 60 * self.rate / refined, confidence
+
+
+class TempoTracker:
+    """逐块计算重叠窗口的速度，得到速度曲线
+
+    包络按 window 秒的窗口、hop 秒的步长切分；攒够 BATCH 个窗口后，用一次批量
+    FFT 计算整批窗口的自相关（除以重叠长度做无偏归一化），再一起计算梳状滤波
+    得分。只有选取周期的先验逐个窗口进行：以上一个窗口的速度为中心，抑制相邻
+    窗口之间的倍速跳变。缓冲区最多保留一个窗口加一批步长的包络，与文件时长无关。
+    """
+    BATCH = 64
+
+    def __init__(self, envelope_rate, min_bpm=MIN_BPM, max_bpm=MAX_BPM,
+                 window=CURVE_WINDOW, hop=CURVE_HOP):
+        self.rate = envelope_rate
+        min_lag = max(1, int(envelope_rate * 60 / max_bpm))
+        max_lag = math.ceil(envelope_rate * 60 / min_bpm)
+        self.size = COMB_HARMONICS * (max_lag + 1) + 2
+        self.window = max(round(window * envelope_rate), self.size + 1)
+        self.hop = max(1, round(hop * envelope_rate))
+        self.nfft = 1 << (self.window + self.size - 1).bit_length()
+        self.overlap = self.window - np.arange(self.size)
+        self.comb = CombFilter(envelope_rate, min_lag, max_lag)
+        self._pending = np.zeros(0)
+        self._consumed = 0     # 已移出缓冲区的包络采样数
+        self._previous = None  # 上一个窗口的 BPM
+        self.times = []
+        self.bpms = []
+        self.confidences = []
+
+    def feed(self, envelope, final=False):
+        """加入包络；final 为 True 时处理剩余的全部完整窗口"""
+        buffer = np.concatenate((self._pending, envelope))
+        count = (len(buffer) - self.window) // self.hop + 1 if len(buffer) >= self.window else 0
+        if not final:
+            count -= count % self.BATCH
+        for start in range(0, count, self.BATCH):
+            self._analyze(buffer, start, min(self.BATCH, count - start))
+        self._pending = buffer[count * self.hop:]
+        self._consumed += count * self.hop
+
+    def finish(self):
+        self.feed(np.zeros(0), final=True)
+        return TempoCurve(self.times, self.bpms, self.confidences)
+
+    def _analyze(self, buffer, first, count):
+        frames = sliding_window_view(buffer, self.window)[first * self.hop::self.hop][:count]
+        frames = frames - frames.mean(axis=1, keepdims=True)
+        spectrum = np.fft.rfft(frames, self.nfft, axis=1)
+        acf = np.fft.irfft(spectrum.real ** 2 + spectrum.imag ** 2, self.nfft,
+                           axis=1)[:, :self.size] / self.overlap
+        scores = self.comb.scores(acf)
+        best = np.empty(count, dtype=np.intp)
+        comb = self.comb
+        for row in range(count):
+            weight = comb.prior
+            if self._previous is not None:
+                weight = weight * np.exp(-0.5 * (np.log2(comb.bpms / self._previous)
+                                                  / TRACK_OCTAVES) ** 2)
+            best[row] = int(np.argmax(scores[row] * weight))
+            self._previous = comb.bpms[best[row]]
+        bpms, confidences = comb.refine(acf, scores, best)
+        silent = acf[:, 0] <= 0  # 静音的窗口没有速度
+        starts = self._consumed + (first + np.arange(count)) * self.hop
+        centers = (starts + self.window / 2) / self.rate
+        self.times.extend(centers[~silent].tolist())
+        self.bpms.extend(bpms[~silent].tolist())
+        self.confidences.extend(confidences[~silent].tolist())
+
+
+class TempoCurve:
+    """速度曲线：各窗口中心的时间（秒）、BPM 和置信度"""
+
+    def __init__(self, times, bpms, confidences):
+        self.times = list(times)
+        self.bpms = list(bpms)
+        self.confidences = list(confidences)
+
+    def __len__(self):
+        return len(self.times)
+
+    def sections(self, tolerance=SECTION_TOLERANCE, min_seconds=MIN_SECTION_SECONDS):
+        """把曲线分成速度近似不变的段落，返回 [(起始时间, BPM)]
+
+        先做 5 点中值滤波去掉个别窗口的跳变，相邻点与当前段落的平均速度相差
+        不超过 tolerance（比例）时归入同一段，短于 min_seconds 的段落并入速度
+        更接近的相邻段落。段落的 BPM 取其中各点的中位数，保留两位小数。
+        """
+        if not self.times:
+            return []
+        bpms = np.asarray(self.bpms)
+        padded = np.pad(bpms, 2, mode='edge')
+        smoothed = np.median(sliding_window_view(padded, 5), axis=1)
+
+        groups = []  # [起始下标, 结束下标（不含）]
+        total = 0.0
+        for i, bpm in enumerate(smoothed):
+            if groups and abs(bpm - total / (i - groups[-1][0])) <= tolerance * bpm:
+                groups[-1][1] = i + 1
+                total += bpm
+            else:
+                groups.append([i, i + 1])
+                total = bpm
+
+        hop = self.times[1] - self.times[0] if len(self.times) > 1 else min_seconds
+        while len(groups) > 1:
+            lengths = [(end - start) * hop for start, end in groups]
+            shortest = int(np.argmin(lengths))
+            if lengths[shortest] >= min_seconds:
+                break
+            start, end = groups[shortest]
+            level = np.median(smoothed[start:end])
+            neighbours = [i for i in (shortest - 1, shortest + 1) if 0 <= i < len(groups)]
+            target = min(neighbours, key=lambda i: abs(
+                np.median(smoothed[groups[i][0]:groups[i][1]]) - level))
+            groups[target] = [min(start, groups[target][0]), max(end, groups[target][1])]
+            del groups[shortest]
+
+        sections = []
+        for index, (start, end) in enumerate(groups):
+            begin = 0.0 if not index else (self.times[start - 1] + self.times[start]) / 2
+            sections.append((begin, round(float(np.median(bpms[start:end])), 2)))
+        return sections
+
+    def to_tempo_map(self, numerator=4, denominator=4, **options):
+        """按 sections() 生成速度图，段落边界对齐到最近的整小节；曲线为空时返回 None"""
+        from tempo_map import TempoMap, TempoSegment
+        sections = self.sections(**options)
+        if not sections:
+            return None
+        segments = [TempoSegment(1, sections[0][1], numerator, denominator)]
+        start_time = 0.0  # 上一段落按整小节计算的起始时间
+        for time, bpm in sections[1:]:
+            previous = segments[-1]
+            bar = max(previous.bar + 1,
+                      round(previous.bar + (time - start_time) / previous.bar_seconds))
+            start_time += (bar - previous.bar) * previous.bar_seconds
+            segments.append(TempoSegment(bar, bpm, numerator, denominator))
+        return TempoMap(segments)
+
+
+class TempoResult:
+    __slots__ = ('bpm', 'confidence', 'duration', 'curve')
+
+    def __init__(self, bpm, confidence, duration, curve=None):
+        self.bpm = bpm
+        self.confidence = confidence
+        self.duration = duration  # 秒
+        self.curve = curve        # TempoCurve，只在要求时计算
+
+    def __repr__(self):
+        return (f'TempoResult(bpm={self.bpm:.2f}, confidence={self.confidence:.2f}, '
+                f'duration={self.duration:.1f})')
+
+
+def iter_mono_chunks(info, chunk_frames=CHUNK_FRAMES):
+    """按块产出 (已处理的帧数, 单声道采样)"""
+    data = info.memmap()
+    try:
+        for start in range(0, info.frames, chunk_frames):
+            block = data[start:start + chunk_frames]
+            yield start + len(block), info.to_mono(block)
+    finally:
+        del data
+
+
+def estimate_tempo(path, min_bpm=MIN_BPM, max_bpm=MAX_BPM, chunk_frames=CHUNK_FRAMES,
+                   progress=None, cancelled=None, curve=False):
+    """估计音频文件的 BPM
+
+    curve 为 True 时在同一遍读取中同时计算速度曲线（TempoResult.curve）。
+    progress(比例) 在每块处理后调用；cancelled() 返回 True 时抛出 AnalysisCancelled。
+    """
+    info = read_audio_info(path)
+    if not info.frames or not info.sample_rate:
+        raise ValueError('音频文件没有采样')
+    envelope = OnsetEnvelope(info.sample_rate)
+    accumulator = TempoAccumulator(envelope.rate, min_bpm, max_bpm)
+    tracker = TempoTracker(envelope.rate, min_bpm, max_bpm) if curve else None
+    for done, samples in iter_mono_chunks(info, chunk_frames):
+        if cancelled is not None and cancelled():
+            raise AnalysisCancelled()
+        onsets = envelope.feed(samples)
+        accumulator.feed(onsets)
+        if tracker is not None:
+            tracker.feed(onsets)
+        if progress is not None:
+            progress(done / info.frames)
+    bpm, confidence = accumulator.tempo()
+    return TempoResult(bpm, confidence, info.duration,
+                       tracker.finish() if tracker is not None else None)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='从 WAV / AIFF 文件估计 BPM')
+    parser.add_argument('paths', nargs='+', help='音频文件')
+    parser.add_argument('--min-bpm', type=float, default=MIN_BPM)
+    parser.add_argument('--max-bpm', type=float, default=MAX_BPM)
+    parser.add_argument('--curve', action='store_true', help='输出速度曲线（时间、BPM、置信度）')
+    parser.add_argument('--map', metavar='PATH', help='按速度曲线写出速度图文件（只处理一个音频文件）')
+    args = parser.parse_args(argv)
+    if args.map and len(args.paths) > 1:
+        parser.error('--map 只能用于一个音频文件')
+    status = 0
+    for path in args.paths:
+        try:
+            result = estimate_tempo(path, args.min_bpm, args.max_bpm,
+                                    curve=args.curve or bool(args.map))
+        except (OSError, ValueError) as e:
+            print(f'{path}: {e}', file=sys.stderr)
+            status = 1
+            continue
+        print(f'{path}\t{result.bpm:.2f}\t{result.confidence:.2f}')
+        if args.curve:
+            curve = result.curve
+            for time, bpm, confidence in zip(curve.times, curve.bpms, curve.confidences):
+                print(f'{time:8.2f}\t{bpm:.2f}\t{confidence:.2f}')
+        if args.map:
+            tempo_map = result.curve.to_tempo_map()
+            if tempo_map is None:
+                print(f'{path}: 音频太短，无法计算速度曲线', file=sys.stderr)
+                status = 1
+                continue
+            tempo_map.save(args.map)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""批量计算：用 NumPy 一次性计算大量 BPM 的混响与延迟参数表。
+
+运算顺序与 audio_core 中的标量公式逐项一致，因此结果按位相同；
+无效的 BPM（非正数、NaN、无穷大）对应的整行填充为 NaN。
+"""
+import numpy as np
+
+from audio_core import REVERB_TYPES, NOTE_VALUES
+
+_REVERB_BEATS = np.array([beats for _, beats, _ in REVERB_TYPES], dtype=np.float64)
+_REVERB_DIVISORS = np.array([divisor for _, _, divisor in REVERB_TYPES], dtype=np.float64)
+_NOTE_VALUES = np.array([value for _, value in NOTE_VALUES], dtype=np.float64)
+
+
+def _prepare(bpms):
+    """转换为一维 float64 数组，并返回无效 BPM 的掩码"""
+    bpms = np.asarray(bpms, dtype=np.float64).reshape(-1)
+    invalid = ~(np.isfinite(bpms) & (bpms > 0))
+    return bpms, invalid
+
+
+def batch_reverb(bpms):
+    """返回形状为 (N, 4, 3) 的混响参数：最后一维依次为 Pre-Delay、Decay Time、Total"""
+    bpms, invalid = _prepare(bpms)
+    out = np.empty((bpms.size, _REVERB_BEATS.size, 3), dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        total = out[..., 2]
+        np.multiply((60000 / bpms)[:, None], _REVERB_BEATS, out=total)
+        np.divide(total, _REVERB_DIVISORS, out=out[..., 0])
+        np.subtract(total, out[..., 0], out=out[..., 1])
+    out[invalid] = np.nan
+    return out
+
+
+def batch_delay(bpms):
+    """返回形状为 (N, 10, 3) 的延迟参数：最后一维依次为 Notes、Dotted、Triplets"""
+    bpms, invalid = _prepare(bpms)
+    out = np.empty((bpms.size, _NOTE_VALUES.size, 3), dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # 与 (60 / bpm) * 1000 * 4 * value 保持相同的计算顺序
+        base = 60 / bpms
+        base *= 1000
+        base *= 4
+        notes = out[..., 0]
+        np.multiply(base[:, None], _NOTE_VALUES, out=notes)
+        np.multiply(notes, 1.5, out=out[..., 1])
+        np.divide(notes, 3, out=out[..., 2])
+        out[..., 2] *= 2
+    out[invalid] = np.nan
+    return out
+
+
+def batch_tables(bpms):
+    """同时计算混响和延迟参数表"""
+    return batch_reverb(bpms), batch_delay(bpms)
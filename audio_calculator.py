@@ -1,15 +1,58 @@
 import sys
 import time
+
+STARTED = time.perf_counter()  # 模块开始执行的时刻，--startup-benchmark 以此为起点
+
+if __name__ == '__main__' and getattr(sys, 'frozen', False):
+    # 打包后的程序中，批处理和素材库扫描的工作进程从这里分流；
+    # 未打包时 freeze_support 什么也不做，不必导入 multiprocessing
+    import multiprocessing
+    multiprocessing.freeze_support()
+
+if __name__ == '__main__' and sys.argv[1:2] == ['--batch']:
+    # 无界面批处理模式：在导入 PyQt6 之前分流
+    import audio_cli
+    sys.exit(audio_cli.main(sys.argv[2:]))
+
+if __name__ == '__main__' and sys.argv[1:2] == ['--serve']:
+    # 本地计算服务模式，同样不需要界面
+    import audio_server
+    sys.exit(audio_server.main(sys.argv[2:]))
+
+if __name__ == '__main__' and not {'--new-instance', '--startup-benchmark', '-h', '--help'} & set(sys.argv[1:]):
+    # 已有实例在运行时把参数转交给它后立即退出，不导入 PyQt6、不创建窗口；
+    # 运行中的实例暂时没有确认（界面线程正忙）时参数也已送达，同样退出
+    import single_instance
+    if single_instance.send(sys.argv[1:]) != single_instance.NO_INSTANCE:
+        sys.exit(0)
+
+import math
+import argparse
+import threading
+from array import array
+from collections import deque
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                            QHBoxLayout, QLabel, QLineEdit, QPushButton, 
-                           QTableWidget, QTableWidgetItem, QHeaderView,
+                           QTableView, QHeaderView,
                            QFrame, QGraphicsDropShadowEffect, QSizePolicy,
-                           QMessageBox, QToolTip, QSystemTrayIcon, QMenu)
-from PyQt6.QtCore import Qt, QPropertyAnimation, QEasingCurve, QPoint, QTimer, QSize
-from PyQt6.QtGui import QDoubleValidator, QColor, QPalette, QLinearGradient, QFont, QCursor, QIcon, QAction
-from PyQt6.QtCore import QPropertyAnimation, QRect
-import pyperclip
+                           QMessageBox, QToolTip, QSystemTrayIcon, QMenu, QComboBox, QSpinBox,
+                           QProgressBar, QDoubleSpinBox, QFileDialog, QAbstractItemView,
+                           QAbstractButton, QAbstractSpinBox, QDialog, QTextEdit, QPlainTextEdit)
+from PyQt6.QtCore import (Qt, QPropertyAnimation, QEasingCurve, QPoint, QTimer, QSize,
+                          QAbstractTableModel, QModelIndex, QObject, QEvent, pyqtSignal)
+from PyQt6.QtNetwork import QLocalServer
+from PyQt6.QtGui import (QDoubleValidator, QColor, QPalette, QLinearGradient, QFont, QCursor, QIcon, QAction,
+                         QKeySequence)
+from PyQt6.QtCore import QPropertyAnimation, QRect, QMargins
 import os
+import json
+from audio_core import (REVERB_NAMES, NOTE_NAMES, parse_bpm, calculate_reverb,
+                        calculate_delay, format_value, format_bpm)
+from tempo_map import TempoMap, format_number
+from tap_tempo import TapTempo, MIN_WINDOW, MAX_WINDOW
+from midi_tempo import read_midi_tempo, MIDI_EXTENSIONS
+from app_settings import Settings, default_settings_path
+import single_instance
 
 def get_resource_path(relative_path):
     """获取资源的绝对路径，兼容开发环境和打包后的环境"""
@@ -20,6 +63,7 @@ def get_resource_path(relative_path):
 
 class ThemeManager:
     DARK_THEME = {
+        'name': 'dark',
         'bg_color': '#1A1A1A',  # 更深的背景色
         'text_color': '#E0E0E0',  # 浅色文字
         'border_color': 'rgba(100, 181, 246, 0.3)',  # 半透明边框
@@ -29,10 +73,12 @@ class ThemeManager:
         'table_header': 'qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #2C3E50, stop:1 #34495E)',  # 深蓝渐变
         'table_item_bg': '#2D2D2D',  # 稍亮的深色背景
         'input_bg': 'rgba(45, 45, 45, 0.8)',  # 半透明深色
-        'frame_bg': '#242424'  # 深色框架背景
+        'frame_bg': '#242424',  # 深色框架背景
+        'title_color': '#64B5F6'
     }
     
     LIGHT_THEME = {
+        'name': 'light',
         'bg_color': '#EAE6DD',
         'text_color': '#37474F',
         'border_color': 'rgba(100, 181, 246, 0.5)',
@@ -42,154 +88,227 @@ class ThemeManager:
         'table_header': 'qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #90CAF9, stop:1 #64B5F6)',
         'table_item_bg': '#E8F5E9',
         'input_bg': 'rgba(234, 230, 221, 0.8)',
-        'frame_bg': '#EAE6DD'
+        'frame_bg': '#EAE6DD',
+        'title_color': '#1976D2'
     }
 
+FALLBACK_LANG = 'en'
+
+
+class LocaleTexts(dict):
+    """一种语言的翻译；缺少的键在用到时才从英文中查找，语言文件可以只翻译一部分"""
+    
+    def __init__(self, lang, texts):
+        super().__init__(texts)
+        self.lang = lang
+    
+    def __missing__(self, key):
+        if self.lang == FALLBACK_LANG:
+            raise KeyError(key)
+        return LanguageManager.TRANSLATIONS[FALLBACK_LANG][key]
+
+class Translations(dict):
+    """按语言代码懒加载的翻译表：第一次用到某种语言时才读取 locales/<语言>.json"""
+    
+    def __missing__(self, lang):
+        try:
+            with open(os.path.join(LanguageManager.LOCALE_DIR, f'{lang}.json'), encoding='utf-8') as f:
+                texts = LocaleTexts(lang, json.load(f))
+        except OSError:
+            raise KeyError(lang) from None
+        self[lang] = texts
+        return texts
+
 class LanguageManager:
-    TRANSLATIONS = {
-        'zh': {
-            'window_title': '音频计算器',
-            'bpm_label': '歌曲速度 (BPM):',
-            'manual_bpm': '手动测速',
-            'stay_on_top': '窗口置顶',
-            'cancel_on_top': '取消置顶',
-            'show_delay': '显示延迟参数',
-            'hide_delay': '隐藏延迟参数',
-            'audio_app': '音频应用',
-            'reverb_params': '混响参数(ms)',
-            'delay_params': '延迟参数(ms)',
-            'reverb_type': '混响类型',
-            'pre_delay': 'Pre-Delay',
-            'decay_time': 'Decay Time',
-            'total_reverb': 'Total Reverb Time',
-            'note_value': '音符值',
-            'notes': 'Notes',
-            'dotted': 'Dotted',
-            'triplets': 'Triplets',
-            'bpm_calc': 'BPM计算器',
-            'bpm_desc': '通过空格键或点击按钮来计算BPM',
-            'tap_button': '点击或按空格键',
-            'copied': '已复制到剪贴板！',
-            'theme_switch': '切换主题',
-            'lang_switch': '切换语言',
-            'expand': '展开',
-            'collapse': '收起',
-            'hide_delay_params': '隐藏延迟参数',
-            'show_delay_params': '显示延迟参数',
-            'show': '显示',
-            'quit': '退出'
-        },
-        'en': {
-            'window_title': 'Audio Calculator',
-            'bpm_label': 'Song Tempo (BPM):',
-            'manual_bpm': 'Manual BPM',
-            'stay_on_top': 'Stay on Top',
-            'cancel_on_top': 'Cancel on Top',
-            'show_delay': 'Show Delay',
-            'hide_delay': 'Hide Delay',
-            'audio_app': 'Audiobar',
-            'reverb_params': 'Reverb Parameters(ms)',
-            'delay_params': 'Delay Parameters(ms)',
-            'reverb_type': 'Reverb Type',
-            'pre_delay': 'Pre-Delay',
-            'decay_time': 'Decay Time',
-            'total_reverb': 'Total Reverb Time',
-            'note_value': 'Note Value',
-            'notes': 'Notes',
-            'dotted': 'Dotted',
-            'triplets': 'Triplets',
-            'bpm_calc': 'BPM Calculator',
-            'bpm_desc': 'Use spacebar or click button to calculate BPM',
-            'tap_button': 'Tap or Press Space',
-            'copied': 'Copied to clipboard!',
-            'theme_switch': 'Switch Theme',
-            'lang_switch': 'Switch Language',
-            'expand': 'Expand',
-            'collapse': 'Collapse',
-            'hide_delay_params': 'Hide Delay Params',
-            'show_delay_params': 'Show Delay Params',
-            'show': 'Show',
-            'quit': 'Quit'
-        }
-    }
+    """界面语言：懒加载的翻译表和控件的翻译绑定
+
+    控件创建时用 bind() 登记一次翻译键，切换语言时 apply() 按登记表直接设置文本，
+    不再遍历控件、比较文本。带参数的文本（段落、扫描进度）和表头由各窗口的
+    updateTexts 更新。
+    """
+    LOCALE_DIR = get_resource_path('locales')
+    TRANSLATIONS = Translations()
+    current = 'zh'
+    _bindings = {}  # 控件 -> {setter 名称: 翻译键}
+    
+    @classmethod
+    def languages(cls):
+        """可用的语言代码，即 locales 目录中的文件名"""
+        return sorted(name[:-5] for name in os.listdir(cls.LOCALE_DIR) if name.endswith('.json'))
+    
+    @classmethod
+    def nextLanguage(cls, lang):
+        languages = cls.languages()
+        if lang not in languages:
+            return languages[0]
+        return languages[(languages.index(lang) + 1) % len(languages)]
+    
+    @classmethod
+    def text(cls, key):
+        return cls.TRANSLATIONS[cls.current][key]
+    
+    @classmethod
+    def bind(cls, widget, key, setter='setText'):
+        """登记控件的翻译键并立即设置文本；同一控件同一 setter 再次绑定时替换原来的键"""
+        bindings = cls._bindings.get(widget)
+        if bindings is None:
+            bindings = cls._bindings[widget] = {}
+            widget.destroyed.connect(lambda: cls._bindings.pop(widget, None))
+        bindings[setter] = key
+        getattr(widget, setter)(cls.text(key))
+    
+    @classmethod
+    def apply(cls, lang):
+        if lang == cls.current:
+            return
+        texts = cls.TRANSLATIONS[lang]
+        cls.current = lang
+        for widget, bindings in cls._bindings.items():
+            for setter, key in bindings.items():
+                getattr(widget, setter)(texts[key])
+
+# 按钮的玻璃质感样式，两种主题下相同
+BUTTON_RULES = [
+    ('GlassButton', """background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+            stop:0 rgba(25, 118, 210, 0.9), stop:0.3 rgba(21, 101, 192, 0.9),
+            stop:0.7 rgba(21, 101, 192, 0.9), stop:1 rgba(13, 71, 161, 0.9));
+        border: 1px solid rgba(25, 118, 210, 0.5);
+        border-top: 1px solid rgba(33, 150, 243, 0.7);
+        border-bottom: 1px solid rgba(13, 71, 161, 0.7);
+        border-radius: 6px; color: white; padding: 5px 10px; font-size: 13px;"""),
+    ('GlassButton:hover', """background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+            stop:0 rgba(30, 136, 229, 0.95), stop:0.3 rgba(25, 118, 210, 0.95),
+            stop:0.7 rgba(25, 118, 210, 0.95), stop:1 rgba(21, 101, 192, 0.95));
+        border: 1px solid rgba(25, 118, 210, 0.7);
+        border-top: 1px solid rgba(33, 150, 243, 0.9);"""),
+    ('GlassButton:pressed', """background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+            stop:0 rgba(21, 101, 192, 0.9), stop:0.3 rgba(13, 71, 161, 0.9),
+            stop:0.7 rgba(13, 71, 161, 0.9), stop:1 rgba(8, 45, 102, 0.9));
+        border: 1px solid rgba(13, 71, 161, 0.6);
+        padding-top: 6px; padding-bottom: 4px;"""),
+    ('IconButton', """background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+            stop:0 rgba(25, 118, 210, 0.9), stop:0.4 rgba(21, 101, 192, 0.9),
+            stop:0.6 rgba(21, 101, 192, 0.9), stop:1 rgba(13, 71, 161, 0.9));
+        border: 1px solid rgba(25, 118, 210, 0.5);
+        border-top: 1px solid rgba(33, 150, 243, 0.7);
+        border-bottom: 1px solid rgba(13, 71, 161, 0.7);
+        border-radius: 15px; color: white; padding: 5px; font-size: 14px;
+        font-family: "Segoe UI Symbol";
+        min-width: 30px; max-width: 30px; min-height: 30px; max-height: 30px;"""),
+    ('IconButton:hover', """background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+            stop:0 rgba(30, 136, 229, 0.95), stop:0.4 rgba(25, 118, 210, 0.95),
+            stop:0.6 rgba(25, 118, 210, 0.95), stop:1 rgba(21, 101, 192, 0.95));
+        border: 1px solid rgba(25, 118, 210, 0.7);
+        border-top: 1px solid rgba(33, 150, 243, 0.9);"""),
+    ('IconButton:pressed', """background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+            stop:0 rgba(21, 101, 192, 0.9), stop:0.4 rgba(13, 71, 161, 0.9),
+            stop:0.6 rgba(13, 71, 161, 0.9), stop:1 rgba(8, 45, 102, 0.9));
+        border: 1px solid rgba(13, 71, 161, 0.6);
+        padding-top: 6px; padding-bottom: 4px;"""),
+]
 
 class StyleSheet:
+    """样式规则，每条为 (选择器, 声明)，由 ThemeEngine 编译为应用级样式表"""
+    
     @staticmethod
-    def get_style(theme):
-        return f"""
-        QMainWindow {{
-            background: {theme['bg_color']};
-        }}
-        QWidget {{
-            color: {theme['text_color']};
-            font-family: 'Segoe UI', Arial;
-        }}
-        QLabel {{
-            color: {theme['text_color']};
-            font-size: 14px;
-            padding: 5px;
-        }}
-        QPushButton {{
-            background: {theme['button_gradient']};
-            border: none;
-            border-radius: 8px;
-            color: white;
-            padding: 10px 20px;
-            font-size: 14px;
-            font-weight: bold;
-        }}
-        QPushButton:hover {{
-            background: {theme['button_hover']};
-        }}
-        QPushButton:pressed {{
-            background: {theme['button_pressed']};
-        }}
-        QLineEdit {{
-            background: {theme['input_bg']};
-            border: 2px solid {theme['border_color']};
-            border-radius: 8px;
-            padding: 8px;
-            color: {theme['text_color']};
-            font-size: 14px;
-        }}
-        QLineEdit:focus {{
-            border: 2px solid #64B5F6;
-            background: {theme['frame_bg']};
-        }}
-        QTableWidget {{
-            background: {theme['frame_bg']};
-            border: 2px solid {theme['border_color']};
-            border-radius: 10px;
-            gridline-color: {theme['border_color']};
-            selection-background-color: rgba(100, 181, 246, 0.2);
-        }}
-        QTableWidget::item {{
-            padding: 8px;
-            border-radius: 4px;
-            color: {theme['text_color']};
-        }}
-        QTableWidget::item:hover {{
-            background: rgba(100, 181, 246, 0.1);
-        }}
-        QTableWidget::item:selected {{
-            background: rgba(100, 181, 246, 0.2);
-            color: {theme['text_color']};
-        }}
-        QHeaderView::section {{
-            background: {theme['table_header']};
-            color: white;
-            padding: 8px;
-            border: none;
-            font-weight: bold;
-        }}
+    def get_rules(theme):
+        return [
+            ('QMainWindow', f"background: {theme['bg_color']};"),
+            ('QWidget', f"color: {theme['text_color']}; font-family: 'Segoe UI', Arial;"),
+            ('QLabel', f"color: {theme['text_color']}; font-size: 14px; padding: 5px;"),
+            ('QLabel[role="title"]', f"font-size: 18px; font-weight: bold; color: {theme['title_color']};"),
+            ('QPushButton', f"background: {theme['button_gradient']}; border: none; border-radius: 8px; "
+                            "color: white; padding: 10px 20px; font-size: 14px; font-weight: bold;"),
+            ('QPushButton:hover', f"background: {theme['button_hover']};"),
+            ('QPushButton:pressed', f"background: {theme['button_pressed']};"),
+            ('QLineEdit', f"background: {theme['input_bg']}; border: 2px solid {theme['border_color']}; "
+                          f"border-radius: 8px; padding: 8px; color: {theme['text_color']}; font-size: 14px;"),
+            ('QLineEdit:focus', f"border: 2px solid #64B5F6; background: {theme['frame_bg']};"),
+            ('QTableView', f"background: {theme['frame_bg']}; border: 2px solid {theme['border_color']}; "
+                           f"border-radius: 10px; gridline-color: {theme['border_color']}; "
+                           "selection-background-color: rgba(100, 181, 246, 0.2);"),
+            ('QTableView::item', f"padding: 8px; border-radius: 4px; color: {theme['text_color']};"),
+            ('QTableView::item:hover', "background: rgba(100, 181, 246, 0.1);"),
+            ('QTableView::item:selected', f"background: rgba(100, 181, 246, 0.2); color: {theme['text_color']};"),
+            ('QHeaderView::section', f"background: {theme['table_header']}; color: white; padding: 8px; "
+                                     "border: none; font-weight: bold;"),
+            ('#ModernFrame', f"background: {theme['frame_bg']}; border-radius: 15px; padding: 20px;"),
+        ] + BUTTON_RULES
+    
+    @staticmethod
+    def get_style(theme, scope=None):
+        """按规则生成样式表文本；scope 为祖先选择器时只作用于其后代"""
+        return '\n'.join(f'{scope} {selector} {{ {body} }}' if scope else f'{selector} {{ {body} }}'
+                         for selector, body in StyleSheet.get_rules(theme))
+
+class ThemeEngine:
+    """应用级主题：所有主题的样式表只编译一次，在启动时设置到 QApplication 上
+
+    控件不再各自设置随主题变化的样式表，而是按类型（GlassButton、IconButton）、
+    对象名（#ModernFrame）和动态属性（role="title"）匹配。顶层窗口用 themeScope
+    属性选择作用域："dark"、"light" 跟随当前主题，"calculator" 始终使用亮色主题
+    （BPM 计算器），排在最后，嵌套时优先。切换主题只修改各窗口的 themeScope 属性
+    并重新 polish 窗口内的控件，不会重新解析样式表。
     """
+    _stylesheet = None
+    _windows = []
+    current = None
+    
+    @classmethod
+    def stylesheet(cls):
+        if cls._stylesheet is None:
+            calculator = dict(ThemeManager.LIGHT_THEME, title_color='#1565C0')
+            parts = []
+            for scope, theme in (('dark', ThemeManager.DARK_THEME), ('light', ThemeManager.LIGHT_THEME),
+                                 ('calculator', calculator)):
+                selector = f'[themeScope="{scope}"]'
+                parts.append(f"QWidget{selector} {{ color: {theme['text_color']}; "
+                             f"font-family: 'Segoe UI', Arial; }}")
+                parts.append(f"QMainWindow{selector} {{ background: {theme['bg_color']}; }}")
+                parts.append(StyleSheet.get_style(theme, '*' + selector))
+            cls._stylesheet = '\n'.join(parts)
+        return cls._stylesheet
+    
+    @classmethod
+    def attach(cls, window, scope=None):
+        """设置窗口的作用域；不指定时跟随当前主题，并在切换主题时更新"""
+        app = QApplication.instance()
+        if not app.styleSheet():
+            app.setStyleSheet(cls.stylesheet())
+        if scope is None:
+            cls._windows.append(window)
+            window.destroyed.connect(lambda: cls._windows.remove(window))
+            scope = (cls.current or ThemeManager.DARK_THEME)['name']
+        window.setProperty('themeScope', scope)
+    
+    @classmethod
+    def apply(cls, theme):
+        if cls.current is theme:
+            return
+        cls.current = theme
+        for window in cls._windows:
+            if window.property('themeScope') != theme['name']:
+                window.setProperty('themeScope', theme['name'])
+                cls.repolish(window)
+    
+    @staticmethod
+    def repolish(window):
+        """按新的属性值重新 polish 窗口内的控件，跳过有自己作用域的子窗口"""
+        style = window.style()
+        pending = [window]
+        while pending:
+            widget = pending.pop()
+            style.unpolish(widget)
+            style.polish(widget)
+            pending.extend(child for child in widget.children()
+                           if isinstance(child, QWidget) and child.property('themeScope') is None)
+        window.update()
 
 class IconButton(QPushButton):
     def __init__(self, icon_text, tooltip, parent=None):
         super().__init__(parent)
         self.setText(icon_text)
         self.setToolTip(tooltip)
-        self.updateStyle()
         
         # 增强阴影效果
         shadow = QGraphicsDropShadowEffect(self)
@@ -197,96 +316,10 @@ class IconButton(QPushButton):
         shadow.setColor(QColor(0, 0, 0, 60))
         shadow.setOffset(0, 4)
         self.setGraphicsEffect(shadow)
-        
-    def updateStyle(self):
-        theme = self.parent().current_theme if self.parent() and hasattr(self.parent(), 'current_theme') else ThemeManager.LIGHT_THEME
-        if theme == ThemeManager.DARK_THEME:
-            self.setStyleSheet("""
-                QPushButton {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                        stop:0 rgba(59, 89, 152, 0.9),
-                        stop:0.4 rgba(44, 62, 80, 0.9),
-                        stop:0.6 rgba(44, 62, 80, 0.9),
-                        stop:1 rgba(52, 73, 94, 0.9));
-                    border: 1px solid rgba(59, 89, 152, 0.3);
-                    border-top: 1px solid rgba(59, 89, 152, 0.5);
-                    border-bottom: 1px solid rgba(44, 62, 80, 0.5);
-                    border-radius: 15px;
-                    color: #E0E0E0;
-                    padding: 5px;
-                    font-size: 14px;
-                    font-family: "Segoe UI Symbol";
-                    min-width: 30px;
-                    max-width: 30px;
-                    min-height: 30px;
-                    max-height: 30px;
-                }
-                QPushButton:hover {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                        stop:0 rgba(69, 99, 162, 0.95),
-                        stop:0.4 rgba(52, 73, 94, 0.95),
-                        stop:0.6 rgba(52, 73, 94, 0.95),
-                        stop:1 rgba(64, 86, 109, 0.95));
-                    border: 1px solid rgba(59, 89, 152, 0.5);
-                    border-top: 1px solid rgba(59, 89, 152, 0.7);
-                }
-                QPushButton:pressed {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                        stop:0 rgba(49, 79, 142, 0.9),
-                        stop:0.4 rgba(36, 51, 66, 0.9),
-                        stop:0.6 rgba(36, 51, 66, 0.9),
-                        stop:1 rgba(44, 62, 80, 0.9));
-                    border: 1px solid rgba(41, 62, 105, 0.5);
-                    padding-top: 6px;
-                    padding-bottom: 4px;
-                }
-            """)
-        else:
-            self.setStyleSheet("""
-                QPushButton {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                        stop:0 rgba(25, 118, 210, 0.9),
-                        stop:0.4 rgba(21, 101, 192, 0.9),
-                        stop:0.6 rgba(21, 101, 192, 0.9),
-                        stop:1 rgba(13, 71, 161, 0.9));
-                    border: 1px solid rgba(25, 118, 210, 0.5);
-                    border-top: 1px solid rgba(33, 150, 243, 0.7);
-                    border-bottom: 1px solid rgba(13, 71, 161, 0.7);
-                    border-radius: 15px;
-                    color: white;
-                    padding: 5px;
-                    font-size: 14px;
-                    font-family: "Segoe UI Symbol";
-                    min-width: 30px;
-                    max-width: 30px;
-                    min-height: 30px;
-                    max-height: 30px;
-                }
-                QPushButton:hover {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                        stop:0 rgba(30, 136, 229, 0.95),
-                        stop:0.4 rgba(25, 118, 210, 0.95),
-                        stop:0.6 rgba(25, 118, 210, 0.95),
-                        stop:1 rgba(21, 101, 192, 0.95));
-                    border: 1px solid rgba(25, 118, 210, 0.7);
-                    border-top: 1px solid rgba(33, 150, 243, 0.9);
-                }
-                QPushButton:pressed {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                        stop:0 rgba(21, 101, 192, 0.9),
-                        stop:0.4 rgba(13, 71, 161, 0.9),
-                        stop:0.6 rgba(13, 71, 161, 0.9),
-                        stop:1 rgba(8, 45, 102, 0.9));
-                    border: 1px solid rgba(13, 71, 161, 0.6);
-                    padding-top: 6px;
-                    padding-bottom: 4px;
-                }
-            """)
 
 class GlassButton(QPushButton):
     def __init__(self, text, parent=None):
         super().__init__(text, parent)
-        self.updateStyle()
         
         # 增强阴影效果
         shadow = QGraphicsDropShadowEffect(self)
@@ -294,87 +327,11 @@ class GlassButton(QPushButton):
         shadow.setColor(QColor(0, 0, 0, 50))
         shadow.setOffset(0, 4)
         self.setGraphicsEffect(shadow)
-        
-    def updateStyle(self):
-        theme = self.parent().current_theme if self.parent() and hasattr(self.parent(), 'current_theme') else ThemeManager.LIGHT_THEME
-        if theme == ThemeManager.DARK_THEME:
-            self.setStyleSheet("""
-                QPushButton {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                        stop:0 rgba(59, 89, 152, 0.9),
-                        stop:0.3 rgba(44, 62, 80, 0.9),
-                        stop:0.7 rgba(44, 62, 80, 0.9),
-                        stop:1 rgba(52, 73, 94, 0.9));
-                    border: 1px solid rgba(59, 89, 152, 0.3);
-                    border-top: 1px solid rgba(59, 89, 152, 0.5);
-                    border-bottom: 1px solid rgba(44, 62, 80, 0.5);
-                    border-radius: 6px;
-                    color: #E0E0E0;
-                    padding: 5px 10px;
-                    font-size: 13px;
-                }
-                QPushButton:hover {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                        stop:0 rgba(69, 99, 162, 0.95),
-                        stop:0.3 rgba(52, 73, 94, 0.95),
-                        stop:0.7 rgba(52, 73, 94, 0.95),
-                        stop:1 rgba(64, 86, 109, 0.95));
-                    border: 1px solid rgba(59, 89, 152, 0.5);
-                    border-top: 1px solid rgba(59, 89, 152, 0.7);
-                }
-                QPushButton:pressed {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                        stop:0 rgba(49, 79, 142, 0.9),
-                        stop:0.3 rgba(36, 51, 66, 0.9),
-                        stop:0.7 rgba(36, 51, 66, 0.9),
-                        stop:1 rgba(44, 62, 80, 0.9));
-                    border: 1px solid rgba(41, 62, 105, 0.5);
-                    padding-top: 6px;
-                    padding-bottom: 4px;
-                }
-            """)
-        else:
-            self.setStyleSheet("""
-                QPushButton {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                        stop:0 rgba(25, 118, 210, 0.9),
-                        stop:0.3 rgba(21, 101, 192, 0.9),
-                        stop:0.7 rgba(21, 101, 192, 0.9),
-                        stop:1 rgba(13, 71, 161, 0.9));
-                    border: 1px solid rgba(25, 118, 210, 0.5);
-                    border-top: 1px solid rgba(33, 150, 243, 0.7);
-                    border-bottom: 1px solid rgba(13, 71, 161, 0.7);
-                    border-radius: 6px;
-                    color: white;
-                    padding: 5px 10px;
-                    font-size: 13px;
-                }
-                QPushButton:hover {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                        stop:0 rgba(30, 136, 229, 0.95),
-                        stop:0.3 rgba(25, 118, 210, 0.95),
-                        stop:0.7 rgba(25, 118, 210, 0.95),
-                        stop:1 rgba(21, 101, 192, 0.95));
-                    border: 1px solid rgba(25, 118, 210, 0.7);
-                    border-top: 1px solid rgba(33, 150, 243, 0.9);
-                }
-                QPushButton:pressed {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                        stop:0 rgba(21, 101, 192, 0.9),
-                        stop:0.3 rgba(13, 71, 161, 0.9),
-                        stop:0.7 rgba(13, 71, 161, 0.9),
-                        stop:1 rgba(8, 45, 102, 0.9));
-                    border: 1px solid rgba(13, 71, 161, 0.6);
-                    padding-top: 6px;
-                    padding-bottom: 4px;
-                }
-            """)
 
 class ModernFrame(QFrame):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setObjectName("ModernFrame")
-        self.updateStyle()
         
         shadow = QGraphicsDropShadowEffect(self)
         shadow.setBlurRadius(20)
@@ -382,25 +339,6 @@ class ModernFrame(QFrame):
         shadow.setOffset(0, 2)
         self.setGraphicsEffect(shadow)
         self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Minimum)
-        
-    def updateStyle(self):
-        theme = self.window().current_theme if self.window() and hasattr(self.window(), 'current_theme') else ThemeManager.LIGHT_THEME
-        if theme == ThemeManager.DARK_THEME:
-            self.setStyleSheet("""
-                #ModernFrame {
-                    background: #242424;
-                    border-radius: 15px;
-                    padding: 20px;
-                }
-            """)
-        else:
-            self.setStyleSheet("""
-                #ModernFrame {
-                    background: #EAE6DD;
-                    border-radius: 15px;
-                    padding: 20px;
-                }
-            """)
 
 class ExpandableFrame(ModernFrame):
     def __init__(self, title, parent=None):
@@ -416,7 +354,8 @@ class ExpandableFrame(ModernFrame):
         self.header = QHBoxLayout()
         self.titleLabel = QLabel(title)
         self.titleLabel.setStyleSheet("font-size: 18px; font-weight: bold; color: #1976D2;")
-        self.toggleButton = GlassButton(LanguageManager.TRANSLATIONS[self.window().current_lang if self.window() else 'zh']['expand'])
+        self.toggleButton = GlassButton('')
+        LanguageManager.bind(self.toggleButton, 'expand')
         self.toggleButton.setMaximumWidth(100)
         self.toggleButton.clicked.connect(self.toggle)
         
@@ -445,7 +384,7 @@ class ExpandableFrame(ModernFrame):
             self.originalWindowHeight = mainWindow.height()
             self.animation.setStartValue(self.content.height())
             self.animation.setEndValue(0)
-            self.toggleButton.setText(LanguageManager.TRANSLATIONS[self.window().current_lang if self.window() else 'zh']['expand'])
+            LanguageManager.bind(self.toggleButton, 'expand')
         else:
             # 保存当前窗口高度
             if not self.originalWindowHeight:
@@ -454,7 +393,7 @@ class ExpandableFrame(ModernFrame):
             contentHeight = self.content.sizeHint().height()
             self.animation.setStartValue(0)
             self.animation.setEndValue(contentHeight)
-            self.toggleButton.setText(LanguageManager.TRANSLATIONS[self.window().current_lang if self.window() else 'zh']['collapse'])
+            LanguageManager.bind(self.toggleButton, 'collapse')
             
             # 计算需要的额外空间
             extraHeight = contentHeight - (self.content.maximumHeight() if self.content.maximumHeight() > 0 else 0)
@@ -476,86 +415,225 @@ class ExpandableFrame(ModernFrame):
                 mainWindow.setMinimumHeight(600)  # 恢复原始最小高度
                 mainWindow.resize(mainWindow.width(), self.originalWindowHeight)
 
-class CopyableTableWidget(QTableWidget):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.cellClicked.connect(self.copyCell)
+class ParamsTableModel(QAbstractTableModel):
+    """参数表模型：第一列为行名，其余列的数值保存在紧凑的 double 数组中，显示时才格式化"""
+    VALUE_COLUMNS = 3
+    HIGHLIGHT_COLOR = QColor("#B3E5FC")
+    
+    def __init__(self, labels, headers, parent=None):
+        super().__init__(parent)
+        self.labels = list(labels)
+        self.headers = list(headers)
+        self.values = array('d', [math.nan]) * (len(self.labels) * self.VALUE_COLUMNS)
+        self.labelBackground = None
+        self.highlighted = None
+        self.texts = None  # 预先格式化的显示文本（例如换算单位后），为 None 时按数值格式化
+        
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.labels)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.VALUE_COLUMNS + 1
+    
+    def value(self, row, column):
+        """返回数值列的原始数值，未计算时为 NaN"""
+        return self.values[row * self.VALUE_COLUMNS + column - 1]
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return self.labels[row]
+            if self.texts is not None:
+                return self.texts[row][column]
+            value = self.value(row, column)
+            return '' if math.isnan(value) else format_value(value)
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return Qt.AlignmentFlag.AlignCenter
+        if role == Qt.ItemDataRole.BackgroundRole:
+            if self.highlighted == (row, column):
+                return self.HIGHLIGHT_COLOR
+            if column == 0:
+                return self.labelBackground
+        return None
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.headers[section]
+        return None
+    
+    def setHeaders(self, headers):
+        self.headers = list(headers)
+        self.headerDataChanged.emit(Qt.Orientation.Horizontal, 0, len(self.headers) - 1)
+        
+    def setRows(self, rows, texts=None):
+        """写入 (行名, 数值...) 形式的行及可选的显示文本；有变化时只发出一次 dataChanged"""
+        values = array('d', [value for _, *row_values in rows for value in row_values])
+        if values == self.values and texts is self.texts:
+            return
+        self.values = values
+        self.texts = texts
+        self.emitValuesChanged()
+        
+    def setDisplayTexts(self, texts):
+        """只替换显示文本（例如切换单位），数值保持不变"""
+        if texts is not self.texts:
+            self.texts = texts
+            self.emitValuesChanged()
+            
+    def emitValuesChanged(self):
+        self.dataChanged.emit(self.index(0, 1),
+                              self.index(len(self.labels) - 1, self.VALUE_COLUMNS),
+                              [Qt.ItemDataRole.DisplayRole])
+        
+    def setLabelBackground(self, color):
+        self.labelBackground = color
+        self.dataChanged.emit(self.index(0, 0), self.index(len(self.labels) - 1, 0),
+                              [Qt.ItemDataRole.BackgroundRole])
+        
+    def setHighlight(self, row=None, column=None):
+        """高亮单个单元格，不传参数时取消高亮"""
+        previous = self.highlighted
+        self.highlighted = None if row is None else (row, column)
+        for cell in (previous, self.highlighted):
+            if cell:
+                index = self.index(*cell)
+                self.dataChanged.emit(index, index, [Qt.ItemDataRole.BackgroundRole])
+
+class CopyableTableView(QTableView):
+    """单击复制单元格；Ctrl+C 以 TSV 复制选区，右键菜单按 TSV、CSV 或 JSON 复制选区、整列或整张表
+    
+    复制都通过进程内的 QClipboard，不启动外部程序。
+    """
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.setModel(model)
+        self.clicked.connect(self.copyCell)
         self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
         self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
         self.setShowGrid(True)
         self.setFrameStyle(0)  # 移除边框
         self.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background: transparent;
                 border: none;
                 gridline-color: rgba(100, 181, 246, 0.2);
             }
-            QTableWidget::item {
+            QTableView::item {
                 border-bottom: none;
                 padding: 8px;
             }
-            QTableWidget QTableCornerButton::section {
+            QTableView QTableCornerButton::section {
                 background: transparent;
                 border: none;
             }
         """)
+        self.verticalHeader().hide()
         self.verticalHeader().setMinimumSectionSize(0)
         self.verticalHeader().setDefaultSectionSize(40)
         self.horizontalHeader().setMinimumSectionSize(0)
+        self.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         
-    def copyCell(self, row, column):
-        item = self.item(row, column)
-        if item and item.text():
-            pyperclip.copy(item.text())
-            # 获取当前语言并显示相应的提示文本
-            window = self.window()
-            if isinstance(window, DelayParamsWindow):
-                current_lang = window.current_lang
-            else:
-                current_lang = window.current_lang if window and hasattr(window, 'current_lang') else 'zh'
-            tooltip_text = LanguageManager.TRANSLATIONS[current_lang]['copied']
-            QToolTip.showText(QCursor.pos(), tooltip_text, self)
+    def copyCell(self, index):
+        text = index.data()
+        if text:
+            QApplication.clipboard().setText(text)
+            QToolTip.showText(QCursor.pos(), LanguageManager.text('copied'), self)
             
             # 创建临时高亮效果
-            original_bg = item.background()
-            item.setBackground(QColor("#B3E5FC"))
-            QTimer.singleShot(200, lambda: item.setBackground(original_bg))
+            model = self.model()
+            model.setHighlight(index.row(), index.column())
+            QTimer.singleShot(200, model.setHighlight)
+            
+    def exportText(self, rows, columns, fmt='tsv', cells=None):
+        """若干行、列的单元格连同表头格式化为文本；给出 cells 时只导出其中的 (行, 列)，其余留空"""
+        from table_export import format_table
+        model = self.model()
+        headers = [model.headerData(column, Qt.Orientation.Horizontal) for column in columns]
+        table = [[(model.index(row, column).data() or '') if cells is None or (row, column) in cells else ''
+                  for column in columns] for row in rows]
+        return format_table(headers, table, fmt)
+    
+    def copyText(self, text):
+        QApplication.clipboard().setText(text)
+        QToolTip.showText(QCursor.pos(), LanguageManager.text('copied'), self)
+        
+    def copySelection(self, fmt='tsv'):
+        cells = {(index.row(), index.column()) for index in self.selectionModel().selectedIndexes()}
+        if cells:
+            rows = sorted({row for row, _ in cells})
+            columns = sorted({column for _, column in cells})
+            self.copyText(self.exportText(rows, columns, fmt, cells))
+            
+    def copyColumn(self, column, fmt='tsv'):
+        self.copyText(self.exportText(range(self.model().rowCount()), [column], fmt))
+        
+    def copyTable(self, fmt='tsv'):
+        model = self.model()
+        self.copyText(self.exportText(range(model.rowCount()), range(model.columnCount()), fmt))
+        
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.StandardKey.Copy):
+            self.copySelection()
+            event.accept()
+        else:
+            super().keyPressEvent(event)
+            
+    def contextMenuEvent(self, event):
+        from table_export import FORMATS
+        index = self.indexAt(event.pos())
+        menu = QMenu(self)
+        for key, copy, enabled in (
+                ('copy_selection', self.copySelection, self.selectionModel().hasSelection()),
+                ('copy_column', lambda fmt: self.copyColumn(index.column(), fmt), index.isValid()),
+                ('copy_table', self.copyTable, True)):
+            submenu = menu.addMenu(LanguageManager.text(key))
+            submenu.setEnabled(enabled)
+            for fmt in FORMATS:
+                submenu.addAction(fmt.upper(), lambda checked=False, copy=copy, fmt=fmt: copy(fmt))
+        menu.exec(event.globalPos())
 
 class BPMCalculator(QWidget):
-    def __init__(self, parent=None):
+    SYNC_IDLE_MS = 3000  # 停止点击多久后把 BPM 同步到目标输入框
+    
+    def __init__(self, parent=None, sync_target=None, sync_idle_ms=SYNC_IDLE_MS):
         super().__init__(parent)
         self.parent = parent
         self.current_lang = self.parent.current_lang if self.parent else 'zh'
         self.current_theme = ThemeManager.LIGHT_THEME
         self.setWindowFlags(Qt.WindowType.Window | Qt.WindowType.WindowStaysOnTopHint)
-        self.setWindowTitle(LanguageManager.TRANSLATIONS[self.current_lang]['manual_bpm'])
+        LanguageManager.bind(self, 'manual_bpm', 'setWindowTitle')
         
-        # 设置窗口图标
-        icon_path = get_resource_path('icon.ico')
-        if os.path.exists(icon_path):
-            self.setWindowIcon(QIcon(icon_path))
-            
-        self.taps = []
+        self.tapTempo = TapTempo()  # 环形缓冲区，每次点击 O(1)
         self.last_tap_time = 0  # 添加最后一次点击时间记录
-        self.sync_timer = None  # 添加同步计时器
+        self.sync_target = sync_target  # 同步目标，默认为主窗口的 BPM 输入框
+        self.sync_idle_ms = sync_idle_ms
+        # 唯一的同步计时器，每次点击重新启动，不再反复创建 QTimer
+        self.sync_timer = QTimer(self)
+        self.sync_timer.setSingleShot(True)
+        self.sync_timer.timeout.connect(self.syncBPMToParent)
         self.initUI()
         
     def initUI(self):
-        self.setStyleSheet(StyleSheet.get_style(ThemeManager.LIGHT_THEME))  # 使用亮色主题
+        ThemeEngine.attach(self, 'calculator')  # 始终使用亮色主题
         layout = QVBoxLayout()
         
         frame = ModernFrame(self)
         frameLayout = QVBoxLayout(frame)
         
-        self.title = QLabel(LanguageManager.TRANSLATIONS[self.current_lang]['bpm_calc'])
-        self.updateTitleStyle()
+        self.title = QLabel()
+        LanguageManager.bind(self.title, 'bpm_calc')
+        self.title.setProperty('role', 'title')
         frameLayout.addWidget(self.title)
         
-        self.desc = QLabel(LanguageManager.TRANSLATIONS[self.current_lang]['bpm_desc'])
-        self.desc.setStyleSheet(f"color: {self.current_theme['text_color']};")
+        self.desc = QLabel()
+        LanguageManager.bind(self.desc, 'bpm_desc')
         frameLayout.addWidget(self.desc)
         
-        self.tapButton = GlassButton(LanguageManager.TRANSLATIONS[self.current_lang]['tap_button'])
+        self.tapButton = GlassButton('')
+        LanguageManager.bind(self.tapButton, 'tap_button')
         self.tapButton.setMinimumHeight(50)
         frameLayout.addWidget(self.tapButton)
         
@@ -563,14 +641,29 @@ class BPMCalculator(QWidget):
         self.updateBpmDisplayStyle()
         frameLayout.addWidget(self.bpmDisplay)
         
-        self.tapButton.clicked.connect(self.recordTap)
+        # 窗口大小：参与平均的最近点击次数
+        windowLayout = QHBoxLayout()
+        self.windowLabel = QLabel()
+        LanguageManager.bind(self.windowLabel, 'tap_window')
+        windowLayout.addWidget(self.windowLabel, 1)
+        self.windowSpin = QSpinBox()
+        self.windowSpin.setRange(MIN_WINDOW, MAX_WINDOW)
+        self.windowSpin.setValue(self.tapTempo.window)
+        self.windowSpin.setFocusPolicy(Qt.FocusPolicy.NoFocus)  # 不抢占空格键的焦点
+        self.windowSpin.valueChanged.connect(self.setTapWindow)
+        windowLayout.addWidget(self.windowSpin)
+        frameLayout.addLayout(windowLayout)
+        
+        # 调试浮层：输入到显示的延迟统计（F12 切换）
+        self.latencyOverlay = QLabel()
+        self.latencyOverlay.setStyleSheet("font-family: monospace; font-size: 11px; color: #757575;")
+        self.latencyOverlay.hide()
+        frameLayout.addWidget(self.latencyOverlay)
+        
+        # 点击由应用级事件过滤器 TapCapture 在按下时记录，这里不再连接 clicked
         layout.addWidget(frame)
         self.setLayout(layout)
         
-    def updateTitleStyle(self):
-        """更新标题样式"""
-        self.title.setStyleSheet("font-size: 18px; font-weight: bold; color: #1565C0;")  # 始终使用亮色主题的颜色
-
     def updateBpmDisplayStyle(self):
         """更新BPM显示样式"""
         self.bpmDisplay.setStyleSheet("""
@@ -580,127 +673,179 @@ class BPMCalculator(QWidget):
             padding: 10px;
         """)
 
-    def updateTheme(self):
-        """更新主题"""
-        # 不再跟随父窗口主题，始终使用亮色主题
-        self.current_theme = ThemeManager.LIGHT_THEME
-        self.setStyleSheet(StyleSheet.get_style(self.current_theme))
-        
-        # 更新所有子组件的主题
-        for frame in self.findChildren(ModernFrame):
-            frame.updateStyle()
-        
-        # 更新按钮样式
-        self.tapButton.updateStyle()
-        
-        # 更新标题和BPM显示颜色
-        self.updateTitleStyle()
-        self.updateBpmDisplayStyle()
-        
-        # 更新描述文本颜色
-        self.desc.setStyleSheet(f"color: {self.current_theme['text_color']};")
+    def setTapWindow(self, window):
+        """修改参与计算的点击次数，并按新的窗口重新显示 BPM"""
+        self.tapTempo.set_window(window)
+        self.calculateBPM()
 
-    def recordTap(self):
-        now = time.time() * 1000
+    def recordTap(self, timestamp=None):
+        """记录一次点击；timestamp 为输入事件发生的时刻（perf_counter 时钟，毫秒）"""
+        now = time.perf_counter_ns() / 1e6
         self.last_tap_time = now  # 记录最后一次点击时间
-        self.taps.append(now)
-        
-        # 保持最近20次点击记录
-        if len(self.taps) > 20:
-            self.taps.pop(0)
-            
+        self.tapTempo.tap(now if timestamp is None else timestamp)
         self.calculateBPM()
-        
-        # 重置同步计时器
-        if self.sync_timer:
-            self.sync_timer.stop()
-        self.sync_timer = QTimer()
-        self.sync_timer.setSingleShot(True)
-        self.sync_timer.timeout.connect(self.syncBPMToParent)
-        self.sync_timer.start(3000)  # 3秒后同步
+        self.sync_timer.start(self.sync_idle_ms)  # 重新计时，停止点击后同步
             
     def calculateBPM(self):
-        if len(self.taps) < 2:  # 至少需要2次点击才能开始计算
+        # 稳健估计：剔除多余点击、补上漏拍后做最小二乘拟合
+        estimate = self.tapTempo.estimate()
+        if estimate is None:  # 至少需要2次点击才能开始计算
             self.bpmDisplay.setText('0 BPM')
             return None
-            
-        # 计算所有相邻点击之间的时间间隔
-        intervals = []
-        for i in range(1, len(self.taps)):
-            intervals.append(self.taps[i] - self.taps[i-1])
-        
-        # 如果有超过20个间隔，只取最近20个
-        if len(intervals) > 20:
-            intervals = intervals[-20:]
-            
-        # 计算平均间隔
-        avg_interval = sum(intervals) / len(intervals)
-        bpm = round(60000 / avg_interval)  # 保持原有计算公式不变
+        bpm = round(estimate.bpm)
         
-        # 更新显示，添加当前使用的点击次数信息
-        self.bpmDisplay.setText(f'{bpm} BPM ({len(intervals)} taps)')
+        # 更新显示，添加参与计算的点击次数和置信度
+        self.bpmDisplay.setText(f'{bpm} BPM ({estimate.taps} taps · {estimate.confidence:.0%})')
         return bpm
 
     def syncBPMToParent(self):
         """3秒无操作后同步BPM到主窗口"""
-        current_time = time.time() * 1000
-        if current_time - self.last_tap_time >= 3000:  # 确保真的已经3秒无操作
+        current_time = time.perf_counter_ns() / 1e6
+        remaining_time = self.sync_idle_ms - (current_time - self.last_tap_time)
+        if remaining_time <= 0:  # 确保真的已经无操作
             bpm = self.calculateBPM()
-            if bpm is not None:  # 修改这里，只要有BPM值就同步
-                self.parent.bpmInput.setText(str(bpm))
-                self.sync_timer = None  # 清除计时器引用
+            target = self.syncTarget()
+            if bpm is not None and target is not None:  # 只要有BPM值就同步
+                target.setText(str(bpm))
         else:
-            # 如果还没到3秒，重新启动计时器
-            if self.sync_timer:
-                self.sync_timer.stop()
-            self.sync_timer = QTimer()
-            self.sync_timer.setSingleShot(True)
-            self.sync_timer.timeout.connect(self.syncBPMToParent)
-            # 将时间差值转换为整数
-            remaining_time = int(3000 - (current_time - self.last_tap_time))
-            self.sync_timer.start(max(0, remaining_time))  # 确保时间值不为负
+            # 如果还没到时间，重新启动同一个计时器
+            self.sync_timer.start(math.ceil(remaining_time))
+            
+    def syncTarget(self):
+        if self.sync_target is not None:
+            return self.sync_target
+        return getattr(self.parent, 'bpmInput', None)
+    
+    def setSyncTarget(self, widget):
+        """设置同步目标（任何带 setText 的控件），None 表示主窗口的 BPM 输入框"""
+        self.sync_target = widget
+        
+    def setSyncIdle(self, milliseconds):
+        """设置停止点击多久后同步"""
+        self.sync_idle_ms = max(0, int(milliseconds))
 
     def resetBPM(self):
         """重置BPM显示和计数器"""
-        self.taps = []
+        self.tapTempo.reset()
         self.last_tap_time = 0
-        if self.sync_timer:
-            self.sync_timer.stop()
+        self.sync_timer.stop()
         self.bpmDisplay.setText('0 BPM')
-        if self.parent:
-            self.parent.bpmInput.setText('')  # 清空主窗口的BPM输入
+        target = self.syncTarget()
+        if target is not None:
+            target.setText('')  # 清空同步目标（默认为主窗口的BPM输入）
 
-    def updateTexts(self):
-        """更新所有文本"""
-        self.current_lang = self.parent.current_lang if self.parent else 'zh'
-        texts = LanguageManager.TRANSLATIONS[self.current_lang]
-        
-        # 更新所有文本元素
-        self.title.setText(texts['bpm_calc'])
-        self.desc.setText(texts['bpm_desc'])
-        self.tapButton.setText(texts['tap_button'])
-        self.setWindowTitle(texts['manual_bpm'])  # 添加这行来更新窗口标题
-        
-    def updateTheme(self):
-        """更新主题"""
-        self.current_theme = ThemeManager.LIGHT_THEME
-        self.setStyleSheet(StyleSheet.get_style(self.current_theme))
-        
-        # 更新描述文本颜色
-        self.desc.setStyleSheet(f"color: {self.current_theme['text_color']};")
-        
-        # 更新按钮样式
-        self.tapButton.updateStyle()
+class TapCapture(QObject):
+    """应用级事件过滤器：在输入事件发生的时刻记录手动测速的点击
+
+    计算器显示时，本应用任何窗口中的空格键都算一次点击；输入框和数字框照常输入，
+    计算器之外获得焦点的按钮、下拉框以及对话框照常处理空格。F12 切换延迟统计的
+    显示，同样只在计算器显示、按键发给本应用窗口时截获。鼠标在按钮按下时即记录，而不是等到松开或事件处理时。双击间隔内的第二次
+    按下可能只以 MouseButtonDblClick 送达，同样算一次点击。时间戳取自 QInputEvent.timestamp()，并换算到
+    单调的 perf_counter 时钟，事件循环的排队延迟不会带入 BPM。同时统计
+    事件发生到处理、以及到 BPM 显示重绘的延迟。
+    """
+    MAX_CLOCK_SKEW = 1000  # 偏移变化超过该值（毫秒）时认为时钟基准变了，重新估计
+    
+    def __init__(self, calculator, parent=None):
+        super().__init__(parent)
+        self.calculator = calculator
+        self.clockOffset = None  # perf_counter 时钟减去事件时间戳（毫秒）
+        self.pendingInput = None  # 等待显示的点击的事件时刻
+        self.buttonDown = False  # 测速按钮的这次按下已经记录，尚未松开
+        self.handlerDelays = deque(maxlen=512)
+        self.displayLatencies = deque(maxlen=512)
+        calculator.bpmDisplay.installEventFilter(self)
         
-        # 更新标题和BPM显示颜色
-        self.updateTitleStyle()
-        self.updateBpmDisplayStyle()
+    @staticmethod
+    def now():
+        return time.perf_counter_ns() / 1e6
+    
+    def eventTime(self, event):
+        """输入事件发生的时刻（perf_counter 时钟，毫秒）"""
+        now = self.now()
+        stamp = event.timestamp()
+        if not stamp:  # 平台不提供时间戳时退回处理时刻
+            return now
+        # 偏移取观测到的最小值：最小的那次排队延迟最接近两个时钟的真实差值
+        offset = now - stamp
+        if (self.clockOffset is None or offset < self.clockOffset
+                or offset - self.clockOffset > self.MAX_CLOCK_SKEW):
+            self.clockOffset = offset
+        eventTime = stamp + self.clockOffset
+        self.handlerDelays.append(now - eventTime)
+        return eventTime
+    
+    def isAppWindowKey(self, receiver):
+        # 计算器显示时发给本应用窗口中控件的按键；对话框和弹出菜单自己处理按键
+        if not isinstance(receiver, QWidget) or self.calculator.isHidden():
+            return False
+        window = receiver.window()
+        return not isinstance(window, QDialog) and window.windowType() != Qt.WindowType.Popup
+    
+    def isCapturing(self, receiver):
+        if not self.isAppWindowKey(receiver):
+            return False
+        # 输入框（包括数字框内部的编辑框）照常输入
+        if isinstance(receiver, (QLineEdit, QAbstractSpinBox, QTextEdit, QPlainTextEdit)):
+            return False
+        # 计算器之外，获得焦点的按钮和下拉框照常用空格触发
+        return receiver.window() is self.calculator or not isinstance(receiver, (QAbstractButton, QComboBox))
+    
+    def tap(self, event):
+        eventTime = self.eventTime(event)
+        self.pendingInput = eventTime
+        self.calculator.recordTap(eventTime)
+        
+    def eventFilter(self, obj, event):
+        etype = event.type()
+        if etype == QEvent.Type.KeyPress:
+            key = event.key()
+            if key == Qt.Key.Key_Space and self.isCapturing(obj):
+                if not event.isAutoRepeat():
+                    self.tap(event)
+                return True
+            if key == Qt.Key.Key_F12 and not event.isAutoRepeat() and self.isAppWindowKey(obj):
+                self.calculator.latencyOverlay.setVisible(self.calculator.latencyOverlay.isHidden())
+                self.updateOverlay()
+                return True
+        elif etype in (QEvent.Type.MouseButtonPress, QEvent.Type.MouseButtonDblClick):
+            if obj is self.calculator.tapButton and event.button() == Qt.MouseButton.LeftButton:
+                # 有的平台在第二次按下时先发送 Press 再发送 DblClick，同一次按下只记录一次
+                if not (etype == QEvent.Type.MouseButtonDblClick and self.buttonDown):
+                    self.buttonDown = True
+                    self.tap(event)
+        elif etype == QEvent.Type.MouseButtonRelease:
+            if obj is self.calculator.tapButton and event.button() == Qt.MouseButton.LeftButton:
+                self.buttonDown = False
+        elif etype == QEvent.Type.Paint and obj is self.calculator.bpmDisplay:
+            if self.pendingInput is not None:
+                self.displayLatencies.append(self.now() - self.pendingInput)
+                self.pendingInput = None
+                self.updateOverlay()
+        return False
+    
+    def updateOverlay(self):
+        overlay = self.calculator.latencyOverlay
+        if overlay.isHidden():
+            return
+        overlay.setText(f'input→display {latencySummary(self.displayLatencies)}\n'
+                        f'input→handler {latencySummary(self.handlerDelays)}')
+
+
+def latencySummary(samples):
+    """延迟样本的 p50/p99 文本"""
+    if not samples:
+        return '-'
+    ordered = sorted(samples)
+    p50 = ordered[len(ordered) // 2]
+    p99 = ordered[min(len(ordered) - 1, len(ordered) * 99 // 100)]
+    return f'p50 {p50:.1f} ms · p99 {p99:.1f} ms · n={len(ordered)}'
+
 
 class DelayParamsWindow(QMainWindow):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
-        self.is_syncing = False
         self.is_animating = False
         self.is_snapped = False  # 添加吸附状态标志
         self.current_theme = self.parent.current_theme if self.parent else ThemeManager.DARK_THEME
@@ -709,12 +854,7 @@ class DelayParamsWindow(QMainWindow):
         
     def initUI(self):
         self.setWindowTitle(LanguageManager.TRANSLATIONS[self.parent.current_lang]['delay_params'])
-        self.setStyleSheet(StyleSheet.get_style(self.current_theme))
-        
-        # 设置窗口图标
-        icon_path = get_resource_path('icon.ico')
-        if os.path.exists(icon_path):
-            self.setWindowIcon(QIcon(icon_path))
+        ThemeEngine.attach(self)  # 样式来自应用级样式表，跟随当前主题
         
         # 主窗口部件
         mainWidget = QWidget()
@@ -726,148 +866,710 @@ class DelayParamsWindow(QMainWindow):
         # 延迟参数表格
         delayFrame = ModernFrame(self)  # 添加self作为parent
         delayLayout = QVBoxLayout(delayFrame)
-        self.delayTitle = QLabel(LanguageManager.TRANSLATIONS[self.parent.current_lang]['delay_params'])
-        self.updateTitleStyle()
-        delayLayout.addWidget(self.delayTitle)
-        
-        self.delayTable = CopyableTableWidget(10, 4)
-        self.delayTable.setHorizontalHeaderLabels([
+        titleLayout = QHBoxLayout()
+        self.delayTitle = QLabel()
+        self.delayTitle.setProperty('role', 'title')
+        titleLayout.addWidget(self.delayTitle, 1)
+        
+        # 单位选择：毫秒、秒、各采样率下的采样数、赫兹
+        self.delayBpm = None
+        self.unitSelector = QComboBox()
+        self.unitSelector.addItem('ms', ('ms', None))
+        self.unitSelector.addItem('s', ('s', None))
+        from audio_units import SAMPLE_RATES
+        for rate in SAMPLE_RATES:
+            self.unitSelector.addItem('', ('samples', rate))
+        self.unitSelector.addItem('Hz', ('hz', None))
+        self.unitSelector.currentIndexChanged.connect(self.updateUnitTexts)
+        titleLayout.addWidget(self.unitSelector)
+        delayLayout.addLayout(titleLayout)
+        self.updateTitleText()
+        
+        self.delayModel = ParamsTableModel(NOTE_NAMES, [
             LanguageManager.TRANSLATIONS[self.parent.current_lang]['note_value'],
             LanguageManager.TRANSLATIONS[self.parent.current_lang]['notes'],
             LanguageManager.TRANSLATIONS[self.parent.current_lang]['dotted'],
             LanguageManager.TRANSLATIONS[self.parent.current_lang]['triplets']
-        ])
-        self.delayTable.verticalHeader().hide()
-        
-        for i in range(10):
-            self.delayTable.setRowHeight(i, 40)
-        
-        note_values = ['1/1', '1/2', '1/4', '1/8', '1/16', '1/32', '1/64', '1/128', '1/256', '1/512']
-        for i, note in enumerate(note_values):
-            item = QTableWidgetItem(note)
-            item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            item.setBackground(QColor(self.current_theme['table_item_bg']))
-            self.delayTable.setItem(i, 0, item)
-            
-        self.delayTable.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        ], self)
+        self.delayModel.setLabelBackground(QColor(self.current_theme['table_item_bg']))
+        self.delayTable = CopyableTableView(self.delayModel)
         delayLayout.addWidget(self.delayTable)
         mainLayout.addWidget(delayFrame)
-        
-        # 设置窗口位置和大小
-        if self.parent:
-            self.updateGeometry()
+        # 位置和大小由 DockEngine（独立窗口）或主窗口的布局（面板）决定
             
-    def updateTitleStyle(self):
-        """更新标题样式"""
-        if self.current_theme == ThemeManager.DARK_THEME:
-            self.delayTitle.setStyleSheet("font-size: 18px; font-weight: bold; color: #64B5F6;")
-        else:
-            self.delayTitle.setStyleSheet("font-size: 18px; font-weight: bold; color: #1976D2;")
-        
-    def updateGeometry(self):
-        """更新窗口位置和大小以匹配父窗口"""
+    def updateTitleText(self):
+        """更新标题和单位选项的文本"""
+        texts = LanguageManager.TRANSLATIONS[self.parent.current_lang]
+        for i in range(self.unitSelector.count()):
+            unit, rate = self.unitSelector.itemData(i)
+            if unit == 'samples':
+                self.unitSelector.setItemText(i, texts['unit_samples'].format(rate=f'{rate / 1000:g}'))
+        title = texts['delay_params_unit'].format(unit=self.unitSelector.currentText())
+        self.setWindowTitle(title)
+        self.delayTitle.setText(title)
+        
+    def unitTexts(self):
+        """当前单位下的显示文本；毫秒直接按数值格式化，返回 None"""
+        unit, rate = self.unitSelector.currentData()
+        if unit == 'ms' or self.delayBpm is None:
+            return None
+        from audio_units import exact_bpm, formatted_delay_table
+        return formatted_delay_table(exact_bpm(self.delayBpm), unit, rate)
+    
+    def setDelayRows(self, bpm, rows):
+        self.delayBpm = bpm
+        self.delayModel.setRows(rows, self.unitTexts())
+        
+    def updateUnitTexts(self):
+        """切换单位：使用缓存的换算结果，不重新计算参数表"""
+        self.delayModel.setDisplayTexts(self.unitTexts())
+        self.updateTitleText()
+        
+    def showEvent(self, event):
+        """重新显示时补算隐藏期间跳过的延迟参数"""
+        super().showEvent(event)
         if self.parent:
-            # 先显示窗口以获取正确的框架尺寸
-            if not self.isVisible():
-                self.show()
-                self.hide()
-            
-            parentGeometry = self.parent.geometry()
-            frameGeometry = self.frameGeometry()
-            contentGeometry = self.geometry()
-            
-            # 计算标题栏高度差异
-            titleBarHeight = frameGeometry.height() - contentGeometry.height()
-            parentTitleBarHeight = self.parent.frameGeometry().height() - self.parent.geometry().height()
-            heightDiff = titleBarHeight - parentTitleBarHeight
+            self.parent.recomputeScheduler.refresh()
+    
+    def updateTheme(self):
+        """更新主题"""
+        self.current_theme = self.parent.current_theme
+        self.current_lang = self.parent.current_lang  # 更新语言
+        # 样式表由 ThemeEngine 在应用级切换，这里只更新表格模型中的背景色
+        self.delayModel.setLabelBackground(QColor(self.current_theme['table_item_bg']))
+
+class RecomputeScheduler(QObject):
+    """合并 BPM 输入引起的重算请求。
+    
+    连续的输入在一个间隔（默认约一帧）内最多触发一次重算；隐藏的表格不计算，
+    解析出的 BPM 与上次相同时也不计算。表格重新显示时调用 refresh 补算。
+    """
+    def __init__(self, textSource, interval=16, parent=None):
+        super().__init__(parent)
+        self.textSource = textSource
+        self.targets = {}  # 名称 -> (计算函数, 是否可见的判断函数)
+        self.lastBpm = {}  # 名称 -> 上次计算时使用的 BPM
+        # requested 按输入次数计数，executed 与各项 skipped 按表格计数
+        self.counters = {'requested': 0, 'executed': 0, 'skipped_unchanged': 0,
+                         'skipped_hidden': 0, 'skipped_invalid': 0}
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.flush)
+        
+    def register(self, name, compute, isVisible):
+        self.targets[name] = (compute, isVisible)
+        
+    def invalidate(self, name):
+        """丢弃某个表格的计算记录，下次一定会重算（例如表格被重建后）"""
+        self.lastBpm.pop(name, None)
+        
+    def setInterval(self, interval):
+        self.timer.setInterval(interval)
+        
+    def request(self):
+        """记录一次重算请求；间隔内的后续请求会合并到同一次重算"""
+        self.counters['requested'] += 1
+        if not self.timer.isActive():
+            self.timer.start()
             
-            # 设置窗口位置和大小
-            self.setGeometry(
-                parentGeometry.x() + parentGeometry.width(),
-                parentGeometry.y() - heightDiff,
-                600,
-                parentGeometry.height() + heightDiff
-            )
-    
-    def moveEvent(self, event):
-        """当延迟参数窗口移动时，处理吸附效果"""
-        super().moveEvent(event)
-        
-        if not (self.parent and self.isVisible() and not self.is_animating):
+    def refresh(self):
+        """立即处理，用于表格重新显示时"""
+        self.timer.stop()
+        self.flush()
+        
+    def flush(self):
+        bpm = parse_bpm(self.textSource())
+        if bpm is None:
+            self.counters['skipped_invalid'] += 1
+            return
+        for name, (compute, isVisible) in self.targets.items():
+            if not isVisible():
+                self.counters['skipped_hidden'] += 1
+            elif self.lastBpm.get(name) == bpm:
+                self.counters['skipped_unchanged'] += 1
+            else:
+                compute(bpm)
+                self.lastBpm[name] = bpm
+                self.counters['executed'] += 1
+
+class DockEngine(QObject):
+    """让独立的延迟参数窗口停靠在主窗口右侧：两个窗口一起移动，框架顶部和高度一致。
+    
+    两个窗口的移动、缩放事件只记录由哪一方发起，一个间隔（默认约一帧）内的事件
+    合并为一次同步。同步时设置的位置被记下，窗口管理器回送的同一位置的移动事件
+    直接忽略，不需要再用定时器清除同步标志。窗口边框（标题栏）的尺寸在窗口显示后
+    测量并缓存，尚未测量的窗口按主窗口的边框估算，不必为了测量先显示再隐藏窗口。
+    """
+    WIDTH = 600  # 延迟参数窗口（或面板）的宽度
+    
+    def __init__(self, main, dock, interval=16):
+        super().__init__(dock)  # 随延迟参数窗口一起销毁
+        self.main = main
+        self.dock = dock
+        self.leader = None     # 最近一次由用户移动的窗口
+        self.expected = {}     # 窗口 -> 同步时设置的位置（不含边框）
+        self.margins = {}      # 窗口 -> 测量到的边框尺寸
+        self.counters = {'requested': 0, 'synced': 0, 'skipped_echo': 0, 'skipped_unchanged': 0}
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.sync)
+        main.installEventFilter(self)
+        dock.installEventFilter(self)
+        
+    def eventFilter(self, obj, event):
+        kind = event.type()
+        if kind == QEvent.Type.Show:
+            # 重新显示（包括修改窗口标志之后）时边框可能改变，重新测量
+            self.margins.pop(obj, None)
+        elif kind == QEvent.Type.Move:
+            if self.expected.pop(obj, None) == obj.geometry().topLeft():
+                self.counters['skipped_echo'] += 1  # 同步时自己设置的位置
+            else:
+                self.request(obj)
+        elif kind == QEvent.Type.Resize and obj is self.main:
+            self.request(obj)
+        return False
+    
+    def frameMargins(self, window):
+        """窗口边框的尺寸；窗口可见且有边框时测量一次并缓存"""
+        margins = self.margins.get(window)
+        if margins is None:
+            if not window.isVisible():
+                return QMargins() if window is self.main else self.frameMargins(self.main)
+            frame, geometry = window.frameGeometry(), window.geometry()
+            margins = QMargins(geometry.left() - frame.left(), geometry.top() - frame.top(),
+                               frame.right() - geometry.right(), frame.bottom() - geometry.bottom())
+            if margins.isNull():
+                # 窗口管理器可能还没有加上边框，下次再测
+                return margins
+            self.margins[window] = margins
+        return margins
+    
+    def dockGeometry(self, width):
+        """延迟参数窗口的目标几何（不含边框）：紧贴主窗口右侧，框架顶部和高度与主窗口一致"""
+        frame = self.main.frameGeometry()
+        margins = self.frameMargins(self.dock)
+        return QRect(frame.right() + 1 + margins.left(), frame.top() + margins.top(),
+                     width, frame.height() - margins.top() - margins.bottom())
+    
+    def request(self, window):
+        """记录一次移动或缩放；间隔内的后续请求合并到同一次同步"""
+        if not (self.main.isVisible() and self.dock.isVisible()):
             return
+        self.counters['requested'] += 1
+        self.leader = window
+        if not self.timer.isActive():
+            self.timer.start()
             
-        if self.is_syncing:
+    def place(self):
+        """显示之前立即放置延迟参数窗口；右侧放不下时先把主窗口向左移"""
+        self.timer.stop()
+        screen = (self.main.screen() or QApplication.primaryScreen()).availableGeometry()
+        margins = self.frameMargins(self.dock)
+        frame = self.main.frameGeometry()
+        overflow = frame.right() + margins.left() + self.WIDTH + margins.right() - screen.right()
+        if overflow > 0:
+            self.moveMain(QPoint(max(screen.left(), frame.left() - overflow), frame.top()))
+        self.setDockGeometry(self.dockGeometry(self.WIDTH))
+        
+    def sync(self):
+        if not (self.main.isVisible() and self.dock.isVisible()):
             return
+        if self.leader is self.dock:
+            # 拖动的是延迟参数窗口：主窗口移到它的左侧
+            screen = (self.main.screen() or QApplication.primaryScreen()).availableGeometry()
+            frame = self.dock.frameGeometry()
+            left = frame.left() - self.main.frameGeometry().width()
+            self.moveMain(QPoint(max(screen.left(), left), frame.top()))
+        geometry = self.dockGeometry(self.dock.width())
+        if geometry == self.dock.geometry():
+            self.counters['skipped_unchanged'] += 1
+            return
+        self.setDockGeometry(geometry)
+        self.counters['synced'] += 1
+        
+    def moveMain(self, framePosition):
+        if framePosition != self.main.pos():
+            self.main.move(framePosition)
+            self.expected[self.main] = self.main.geometry().topLeft()
             
+    def setDockGeometry(self, geometry):
+        self.dock.setGeometry(geometry)
+        self.expected[self.dock] = geometry.topLeft()
+
+class AudioAnalysisTask(QObject):
+    """在后台线程中检测音频文件的 BPM 和速度曲线，通过信号报告进度和结果"""
+    progress = pyqtSignal(float)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+    
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.cancelRequested = False
+        
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+        
+    def cancel(self):
+        self.cancelRequested = True
+        
+    def run(self):
         try:
-            self.is_syncing = True
+            from audio_analysis import estimate_tempo, AnalysisCancelled
+        except ImportError as e:
+            self.failed.emit(str(e))
+            return
+        try:
+            result = estimate_tempo(self.path, progress=self.progress.emit,
+                                    cancelled=lambda: self.cancelRequested, curve=True)
+        except AnalysisCancelled:
+            self.cancelled.emit()
+        except Exception as e:  # 损坏的文件也可能抛出其他异常，线程结束前总要报告结果
+            self.failed.emit(str(e) or type(e).__name__)
+        else:
+            self.finished.emit(result)
+
+
+class LibraryScanTask(QObject):
+    """在后台线程中扫描素材库目录并更新速度索引"""
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+    
+    def __init__(self, root, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.cancelRequested = False
+        
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+        
+    def cancel(self):
+        self.cancelRequested = True
+        
+    def run(self):
+        from tempo_index import TempoIndex, ScanCancelled
+        try:
+            # SQLite 连接只能在创建它的线程中使用，扫描线程单独打开索引
+            with TempoIndex() as index:
+                stats = index.scan(self.root, progress=self.progress.emit,
+                                   cancelled=lambda: self.cancelRequested)
+        except ScanCancelled:
+            self.cancelled.emit()
+        except Exception as e:  # 包括 sqlite3.Error；线程结束前总要报告结果，进度条才会关闭
+            self.failed.emit(str(e) or type(e).__name__)
+        else:
+            self.finished.emit(stats)
+
+
+class LibraryModel(QAbstractTableModel):
+    """素材库查询结果，每行为 (路径, BPM, 置信度, 时长)"""
+    
+    def __init__(self, headers, parent=None):
+        super().__init__(parent)
+        self.headers = list(headers)
+        self.rows = []
+        
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        path, bpm, confidence, duration = self.rows[index.row()]
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return os.path.basename(path)
+            if column == 1:
+                return format_value(bpm)
+            if column == 2:
+                return f'{confidence:.0%}'
+            return f'{duration:.1f}'
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return path
+        if role == Qt.ItemDataRole.TextAlignmentRole and column > 0:
+            return Qt.AlignmentFlag.AlignCenter
+        return None
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.headers[section]
+        return None
+    
+    def setHeaders(self, headers):
+        self.headers = list(headers)
+        self.headerDataChanged.emit(Qt.Orientation.Horizontal, 0, len(self.headers) - 1)
+        
+    def setRows(self, rows):
+        self.beginResetModel()
+        self.rows = rows
+        self.endResetModel()
+
+
+class LibraryWindow(QMainWindow):
+    """素材库：按 BPM 范围和文件名筛选已索引的音频，选中后填入 BPM 输入框"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.parent = parent
+        self.current_theme = self.parent.current_theme if self.parent else ThemeManager.DARK_THEME
+        self.current_lang = self.parent.current_lang if self.parent else 'zh'
+        self.scanTask = None
+        from tempo_index import TempoIndex  # 打开素材库时才导入 sqlite3
+        self.index = TempoIndex()
+        self.initUI()
+        self.refresh()
+        
+    def initUI(self):
+        texts = LanguageManager.TRANSLATIONS[self.current_lang]
+        ThemeEngine.attach(self)  # 样式来自应用级样式表，跟随当前主题
+        LanguageManager.bind(self, 'library', 'setWindowTitle')
+        self.resize(620, 580)
+        
+        mainWidget = QWidget()
+        self.setCentralWidget(mainWidget)
+        mainLayout = QVBoxLayout(mainWidget)
+        mainLayout.setSpacing(20)
+        mainLayout.setContentsMargins(20, 20, 20, 20)
+        
+        libraryFrame = ModernFrame(self)
+        libraryLayout = QVBoxLayout(libraryFrame)
+        titleLayout = QHBoxLayout()
+        self.libraryTitle = QLabel()
+        self.libraryTitle.setProperty('role', 'title')
+        LanguageManager.bind(self.libraryTitle, 'library')
+        titleLayout.addWidget(self.libraryTitle, 1)
+        self.scanButton = GlassButton('')
+        LanguageManager.bind(self.scanButton, 'library_scan')
+        self.scanButton.clicked.connect(self.chooseFolder)
+        titleLayout.addWidget(self.scanButton)
+        libraryLayout.addLayout(titleLayout)
+        
+        # 扫描进度
+        self.scanFrame = QWidget()
+        scanLayout = QHBoxLayout(self.scanFrame)
+        scanLayout.setContentsMargins(0, 0, 0, 0)
+        self.scanProgress = QProgressBar()
+        self.scanProgress.setTextVisible(False)
+        self.cancelScanButton = GlassButton('✕')
+        self.cancelScanButton.setMaximumWidth(50)
+        self.cancelScanButton.clicked.connect(self.cancelScan)
+        scanLayout.addWidget(self.scanProgress, 1)
+        scanLayout.addWidget(self.cancelScanButton)
+        libraryLayout.addWidget(self.scanFrame)
+        self.scanFrame.hide()
+        
+        # 筛选条件：BPM 范围和文件名
+        filterLayout = QHBoxLayout()
+        self.rangeLabel = QLabel()
+        LanguageManager.bind(self.rangeLabel, 'library_bpm_range')
+        self.minBpmSpin = QDoubleSpinBox()
+        self.maxBpmSpin = QDoubleSpinBox()
+        for spin, value in ((self.minBpmSpin, 1), (self.maxBpmSpin, 999)):
+            spin.setRange(1, 999)
+            spin.setDecimals(1)
+            spin.setValue(value)
+            spin.valueChanged.connect(self.refresh)
+        self.searchInput = QLineEdit()
+        LanguageManager.bind(self.searchInput, 'library_search', 'setPlaceholderText')
+        self.searchInput.textChanged.connect(self.refresh)
+        filterLayout.addWidget(self.rangeLabel)
+        filterLayout.addWidget(self.minBpmSpin)
+        filterLayout.addWidget(QLabel('–'))
+        filterLayout.addWidget(self.maxBpmSpin)
+        filterLayout.addWidget(self.searchInput, 1)
+        libraryLayout.addLayout(filterLayout)
+        
+        self.libraryModel = LibraryModel([texts['library_file'], 'BPM', texts['library_confidence'],
+                                          texts['library_duration']], self)
+        self.libraryTable = QTableView()
+        self.libraryTable.setModel(self.libraryModel)
+        self.libraryTable.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.libraryTable.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.libraryTable.verticalHeader().setVisible(False)
+        self.libraryTable.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.libraryTable.activated.connect(self.pickRow)
+        self.libraryTable.doubleClicked.connect(self.pickRow)
+        libraryLayout.addWidget(self.libraryTable)
+        
+        self.statusLabel = QLabel()
+        libraryLayout.addWidget(self.statusLabel)
+        mainLayout.addWidget(libraryFrame)
+        self.updateTexts()
+        
+    def refresh(self):
+        """按当前筛选条件从索引读取（只查询数据库，不做检测）"""
+        low, high = sorted((self.minBpmSpin.value(), self.maxBpmSpin.value()))
+        self.libraryModel.setRows(self.index.search(low, high, self.searchInput.text().strip()))
+        self.updateStatus()
+        
+    def updateStatus(self, text=None):
+        if text is None:
+            text = LanguageManager.TRANSLATIONS[self.current_lang]['library_count'].format(
+                count=len(self.libraryModel.rows))
+        self.statusLabel.setText(text)
+        
+    def pickRow(self, index):
+        bpm = self.libraryModel.rows[index.row()][1]
+        self.parent.bpmInput.setText(format_bpm(bpm))
+        
+    def chooseFolder(self):
+        root = QFileDialog.getExistingDirectory(self, LanguageManager.TRANSLATIONS[self.current_lang]['library_scan'])
+        if root:
+            self.startScan(root)
             
-            # 获取当前延迟窗口位置
-            delay_pos = self.pos()
+    def startScan(self, root):
+        self.cancelScan()
+        task = LibraryScanTask(root, self)
+        task.progress.connect(self.updateScanProgress)
+        task.finished.connect(lambda stats, task=task: self.finishScan(task, stats))
+        task.failed.connect(lambda error, task=task: self.finishScan(task, error=error))
+        task.cancelled.connect(lambda task=task: self.finishScan(task))
+        self.scanTask = task
+        self.scanProgress.setRange(0, 0)  # 遍历目录时进度未知
+        self.scanFrame.show()
+        task.start()
+        
+    def updateScanProgress(self, done, total):
+        if self.scanTask:
+            self.scanProgress.setRange(0, max(1, total))
+            self.scanProgress.setValue(done)
+            self.updateStatus(LanguageManager.TRANSLATIONS[self.current_lang]['library_scanning'].format(
+                done=done, total=total))
             
-            # 计算主窗口应该在的位置(延迟窗口左侧)
-            parent_target_x = max(0, delay_pos.x() - self.parent.width())
+    def cancelScan(self):
+        if self.scanTask:
+            self.scanTask.cancel()
+            self.scanTask = None
+            self.scanFrame.hide()
             
-            # 移动主窗口到目标位置,保持顶部对齐
-            self.parent.move(parent_target_x, delay_pos.y())
+    def finishScan(self, task, stats=None, error=None):
+        task.deleteLater()
+        if task is self.scanTask:
+            self.scanTask = None
+            self.scanFrame.hide()
+        self.refresh()  # 取消时也显示已保存的部分结果
+        if error is not None:
+            QMessageBox.warning(self, LanguageManager.TRANSLATIONS[self.current_lang]['library'], error)
+        elif stats is not None:
+            self.updateStatus(LanguageManager.TRANSLATIONS[self.current_lang]['library_scanned'].format(
+                analyzed=stats.analyzed, reused=stats.reused, removed=stats.removed, failed=stats.failed))
             
-            # 保持两个窗口高度一致
-            if self.height() != self.parent.height():
-                self.resize(self.width(), self.parent.height())
-                
-        finally:
-            QTimer.singleShot(50, lambda: setattr(self, 'is_syncing', False))
-
+    def updateTexts(self):
+        """更新表头和状态文本，其余文本由 LanguageManager 按绑定更新"""
+        self.current_lang = self.parent.current_lang if self.parent else 'zh'
+        texts = LanguageManager.TRANSLATIONS[self.current_lang]
+        self.libraryModel.setHeaders([texts['library_file'], 'BPM', texts['library_confidence'],
+                                      texts['library_duration']])
+        if not self.scanTask:
+            self.updateStatus()
+        
     def updateTheme(self):
-        """更新主题"""
+        """更新主题（样式表由 ThemeEngine 在应用级切换）"""
         self.current_theme = self.parent.current_theme
-        self.current_lang = self.parent.current_lang  # 更新语言
-        self.setStyleSheet(StyleSheet.get_style(self.current_theme))
-        # 更新所有子组件的主题
-        for frame in self.findChildren(ModernFrame):
-            frame.updateStyle()
-        # 更新表格项的背景色
-        for row in range(self.delayTable.rowCount()):
-            item = self.delayTable.item(row, 0)
-            if item:
-                item.setBackground(QColor(self.current_theme['table_item_bg']))
-        self.updateTitleStyle()
+
+
+class IdleEviction(QObject):
+    """次要窗口隐藏超过 idleMs 毫秒后调用 evict 销毁它，下次使用时重新创建
+
+    evict 返回 False 表示暂时不能销毁（例如正在扫描），稍后再试。
+    """
+    
+    def __init__(self, window, idleMs, evict):
+        super().__init__(window)
+        self.window = window
+        self.evict = evict
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(idleMs)
+        self.timer.timeout.connect(self.expire)
+        window.installEventFilter(self)
+        if window.isHidden():
+            self.timer.start()
+            
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Hide:
+            self.timer.start()
+        elif event.type() == QEvent.Type.Show:
+            self.timer.stop()
+        return False
+    
+    def expire(self):
+        if not self.window.isHidden() or self.evict() is False:
+            self.timer.start()
+
+class StartupProbe(QObject):
+    """--startup-benchmark：记录启动各阶段的时刻，托盘和悬浮窗创建完成后
+    以一行 JSON（自模块开始执行起的毫秒数）输出到标准输出并退出"""
+    
+    def __init__(self, window, marks):
+        super().__init__(window)
+        self.marks = marks
+        window.installEventFilter(self)
+        window.startupFinished.connect(self.report)
+        
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint and 'first_paint' not in self.marks:
+            self.marks['first_paint'] = None
+            # 排在本次绘制（包括子控件和刷新到屏幕）之后执行
+            QTimer.singleShot(0, lambda: self.marks.update(first_paint=time.perf_counter()))
+        return False
+    
+    def report(self):
+        self.marks['ready'] = time.perf_counter()
+        print(json.dumps({name: round((value - STARTED) * 1000, 1)
+                          for name, value in self.marks.items()}), flush=True)
+        # quit() 会先向各窗口发送关闭事件，主窗口关闭时只是隐藏到托盘，因此直接退出事件循环
+        QApplication.exit(0)
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    WINDOW_IDLE_MS = 10 * 60 * 1000  # 次要窗口隐藏多久后销毁
+    SETTINGS_WRITE_MS = 1000  # 第一次修改设置后多久写回文件，期间的修改一起写入
+    DELAY_DOCK_MODES = ('window', 'panel')  # 延迟参数：右侧的独立窗口，或主窗口内的面板
+    startupFinished = pyqtSignal()
+    
+    def __init__(self, settings=None):
         super().__init__()
+        # 设置在启动时读取一次；不传入时只保存在内存中
+        self.settings = settings if settings is not None else Settings()
+        self.settingsTimer = QTimer(self)
+        self.settingsTimer.setSingleShot(True)
+        self.settingsTimer.setInterval(self.SETTINGS_WRITE_MS)
+        self.settingsTimer.timeout.connect(self.settings.flush)
+        
         self.delayWindow = None
-        self.stayOnTop = False  # 默认不置顶
-        self.slideAnimation = None  # 添加动画属性
-        self.current_theme = ThemeManager.DARK_THEME  # 默认使用暗色主题
-        self.current_lang = 'zh'  # 默认使用中文
+        self.delayDockMode = self.settings.get('delay_dock', 'window')
+        if self.delayDockMode not in self.DELAY_DOCK_MODES:
+            self.delayDockMode = 'window'
+        self.delayDock = None  # 独立窗口模式下的 DockEngine
+        self.delayAnimation = None  # 独立窗口的淡入淡出
+        self.delayPanelLayout = None  # 面板模式下容纳主界面和面板的布局
+        self.stayOnTop = self.settings.get('stay_on_top') is True  # 默认不置顶
+        # 默认使用暗色主题和中文
+        self.current_theme = (ThemeManager.LIGHT_THEME if self.settings.get('theme') == 'light'
+                              else ThemeManager.DARK_THEME)
+        self.current_lang = self.settings.get('language', 'zh')
+        if self.current_lang not in LanguageManager.languages():
+            self.current_lang = 'zh'
+        LanguageManager.apply(self.current_lang)  # 在创建任何绑定翻译的控件之前
+        
+        self.windowIdleMs = self.WINDOW_IDLE_MS  # 0 表示不销毁
+        self.debugOverlay = False  # BPM 计算器创建时是否显示点击延迟统计
+        
+        # 在后台打开（必要时生成）BPM 查找表，就绪前直接计算
+        self.tempoTable = None
+        threading.Thread(target=self.loadTempoTable, daemon=True).start()
+        
+        # 次要窗口在第一次使用时创建；托盘图标和悬浮窗在主窗口第一次绘制之后创建
+        self.bpmCalculator = None
+        self.tapCapture = None
+        self.trayIcon = None
+        self.floatingWindow = None
+        self.startupPending = True
         
-        # 创建系统托盘图标
-        self.createTrayIcon()
+        self.initUI()
+        self.restoreSettings()
         
-        # 创建悬浮窗
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.startupPending:
+            self.startupPending = False
+            QTimer.singleShot(0, self.finishStartup)
+            
+    def finishStartup(self):
+        """首屏绘制完成后再创建托盘图标和悬浮窗，它们不影响主窗口出现的时间"""
+        self.createTrayIcon()
         self.floatingWindow = FloatingWindow(self)
         self.floatingWindow.show()
+        # 上次退出时显示着的延迟参数同样在首屏之后创建
+        if self.settings.get('delay_visible') is True and self.delayWindow is None:
+            self.toggleDelayWindow()
+        self.startupFinished.emit()
         
-        self.initUI()
+    def restoreSettings(self):
+        """应用主题和语言之外的设置（主题和语言在创建控件之前应用）"""
+        if self.stayOnTop:
+            self.setWindowFlag(Qt.WindowType.WindowStaysOnTopHint, True)
+            LanguageManager.bind(self.stayOnTopButton, 'cancel_on_top', 'setToolTip')
+        bpm = parse_bpm(str(self.settings.get('bpm', '')))
+        if bpm:
+            self.bpmInput.setText(format_bpm(bpm))
+        self.bpmInput.textChanged.connect(lambda text: self.saveSetting('bpm', text))
+        
+    def saveSetting(self, key, value):
+        """修改设置；第一次修改后 SETTINGS_WRITE_MS 毫秒内的修改合并为一次写入"""
+        if self.settings.set(key, value) and not self.settingsTimer.isActive():
+            self.settingsTimer.start()
+            
+    def flushSettings(self):
+        self.settingsTimer.stop()
+        self.settings.flush()
+        
+    def evictWhenIdle(self, window, evict):
+        if self.windowIdleMs > 0:
+            IdleEviction(window, self.windowIdleMs, evict)
+            
+    def ensureBpmCalculator(self):
+        """第一次使用时创建 BPM 计算器和测速用的应用级事件过滤器"""
+        if self.bpmCalculator is None:
+            self.bpmCalculator = BPMCalculator(self)
+            self.bpmCalculator.hide()
+            self.bpmCalculator.latencyOverlay.setVisible(self.debugOverlay)
+            self.tapCapture = TapCapture(self.bpmCalculator, self)
+            QApplication.instance().installEventFilter(self.tapCapture)
+            self.evictWhenIdle(self.bpmCalculator, self.evictBpmCalculator)
+        return self.bpmCalculator
+    
+    def evictBpmCalculator(self):
+        # 计算器不存在时不再过滤每一个事件
+        QApplication.instance().removeEventFilter(self.tapCapture)
+        self.tapCapture.deleteLater()
+        self.bpmCalculator.deleteLater()
+        self.bpmCalculator = self.tapCapture = None
+        
+    def evictDelayWindow(self):
+        if self.delayWindow.is_animating:
+            return False
+        self.delayWindow.deleteLater()  # 停靠引擎和动画随之销毁
+        self.delayWindow = self.delayDock = self.delayAnimation = None
+        self.recomputeScheduler.invalidate('delay')  # 重新创建的表格是空的
+        
+    def evictLibraryWindow(self):
+        if self.libraryWindow.scanTask:
+            return False
+        self.libraryWindow.index.close()
+        self.libraryWindow.deleteLater()
+        self.libraryWindow = None
+        
+    def loadTempoTable(self):
+        from tempo_table import open_table
+        self.tempoTable = open_table()
         
     def createTrayIcon(self):
         # 创建托盘图标
-        self.trayIcon = QSystemTrayIcon(self)
-        icon_path = get_resource_path('icon.ico')
-        if os.path.exists(icon_path):
-            self.trayIcon.setIcon(QIcon(icon_path))
+        self.trayIcon = QSystemTrayIcon(QApplication.windowIcon(), self)
         
         # 创建托盘菜单
         self.trayMenu = QMenu()
         
         # 添加显示/隐藏动作
-        self.showAction = QAction("显示", self)
+        self.showAction = QAction(self)
+        LanguageManager.bind(self.showAction, 'show')
         self.showAction.triggered.connect(self.toggleAllWindows)
         self.trayMenu.addAction(self.showAction)
         
         # 添加退出动作
-        self.quitAction = QAction("退出", self)
+        self.quitAction = QAction(self)
+        LanguageManager.bind(self.quitAction, 'quit')
         self.quitAction.triggered.connect(self.realQuit)
         self.trayMenu.addAction(self.quitAction)
         
@@ -886,12 +1588,14 @@ class MainWindow(QMainWindow):
             self.delay_window_was_visible = self.delayWindow and self.delayWindow.isVisible()
             # 隐藏所有窗口
             if self.delayWindow and self.delayWindow.isVisible():
-                self.delayWindow.hide()
+                self.hideDelayWindow()
             if self.bpmCalculator and self.bpmCalculator.isVisible():
                 self.bpmCalculator.hide()
+            if self.libraryWindow and self.libraryWindow.isVisible():
+                self.libraryWindow.hide()
             self.hide()
             # 更新托盘菜单文本
-            self.showAction.setText("显示" if self.current_lang == 'zh' else "Show")
+            LanguageManager.bind(self.showAction, 'show')
         else:
             # 显示主窗口
             self.showNormal()
@@ -899,12 +1603,11 @@ class MainWindow(QMainWindow):
             # 恢复延迟窗口状态
             if hasattr(self, 'delay_window_was_visible') and self.delay_window_was_visible:
                 if self.delayWindow:
-                    self.delayWindow.show()
-                    self.delayWindow.updateGeometry()
+                    self.showDelayWindow()
                 else:
                     self.toggleDelayWindow()
             # 更新托盘菜单文本
-            self.showAction.setText("隐藏" if self.current_lang == 'zh' else "Hide")
+            LanguageManager.bind(self.showAction, 'hide')
 
     def trayIconActivated(self, reason):
         if reason == QSystemTrayIcon.ActivationReason.Trigger:  # 单击
@@ -912,20 +1615,27 @@ class MainWindow(QMainWindow):
             
     def closeEvent(self, event):
         # 最小化到系统托盘而不是退出
-        if self.trayIcon.isVisible():
+        if self.trayIcon is not None and self.trayIcon.isVisible():
             # 保存延迟窗口的状态
             self.delay_window_was_visible = self.delayWindow and self.delayWindow.isVisible()
             # 隐藏所有窗口
             if self.delayWindow and self.delayWindow.isVisible():
-                self.delayWindow.hide()
+                self.hideDelayWindow()
             if self.bpmCalculator and self.bpmCalculator.isVisible():
                 self.bpmCalculator.hide()
+            if self.libraryWindow and self.libraryWindow.isVisible():
+                self.libraryWindow.hide()
             self.hide()
             event.ignore()
             
     def realQuit(self):
         # 真正退出程序
-        self.trayIcon.hide()
+        self.flushSettings()
+        self.cancelAudioAnalysis()
+        if self.libraryWindow:
+            self.libraryWindow.cancelScan()
+        if self.trayIcon is not None:
+            self.trayIcon.hide()
         QApplication.quit()
         
     def showNormal(self):
@@ -935,20 +1645,21 @@ class MainWindow(QMainWindow):
         # 恢复延迟窗口状态
         if hasattr(self, 'delay_window_was_visible') and self.delay_window_was_visible:
             if self.delayWindow:
-                self.delayWindow.show()
-                self.delayWindow.updateGeometry()
+                self.showDelayWindow()
         
     def initUI(self):
-        # 设置窗口图标
+        # 应用程序图标只从磁盘读取一次：各窗口和托盘默认使用它，不必再分别加载
         icon_path = get_resource_path('icon.ico')
         if os.path.exists(icon_path):
-            self.setWindowIcon(QIcon(icon_path))
-            # 同时设置为应用程序图标
             QApplication.setWindowIcon(QIcon(icon_path))
             
-        self.setWindowTitle(LanguageManager.TRANSLATIONS[self.current_lang]['window_title'])
+        LanguageManager.bind(self, 'window_title', 'setWindowTitle')
         self.resize(620, 580)
         
+        # 应用主题：所有窗口共用应用级样式表，在创建子控件之前设置
+        ThemeEngine.apply(self.current_theme)
+        ThemeEngine.attach(self)
+        
         # 主窗口部件
         mainWidget = QWidget()
         self.setCentralWidget(mainWidget)
@@ -959,50 +1670,85 @@ class MainWindow(QMainWindow):
         # BPM输入区域
         inputFrame = ModernFrame()
         topLayout = QHBoxLayout(inputFrame)
-        bpmLabel = QLabel(LanguageManager.TRANSLATIONS[self.current_lang]['bpm_label'])
+        bpmLabel = QLabel()
+        LanguageManager.bind(bpmLabel, 'bpm_label')
         self.bpmInput = QLineEdit()
         self.bpmInput.setValidator(QDoubleValidator(1, 999, 2))
+        self.recomputeScheduler = RecomputeScheduler(self.bpmInput.text, parent=self)
+        self.recomputeScheduler.register('reverb', self.calculateReverbParams,
+                                         lambda: not self.isHidden())
+        self.recomputeScheduler.register('delay', self.calculateDelay,
+                                         lambda: self.delayWindow is not None and not self.delayWindow.isHidden())
         self.bpmInput.textChanged.connect(self.updateAllTables)
         self.bpmInput.setMinimumWidth(100)
-        self.manualBpmButton = GlassButton(LanguageManager.TRANSLATIONS[self.current_lang]['manual_bpm'])
+        self.manualBpmButton = GlassButton('')
+        LanguageManager.bind(self.manualBpmButton, 'manual_bpm')
+        self.libraryButton = GlassButton('')
+        LanguageManager.bind(self.libraryButton, 'library')
+        self.libraryButton.clicked.connect(self.toggleLibraryWindow)
+        self.libraryWindow = None  # 首次打开时创建
         
         topLayout.addWidget(bpmLabel)
         topLayout.addWidget(self.bpmInput)
         topLayout.addWidget(self.manualBpmButton)
+        topLayout.addWidget(self.libraryButton)
         mainLayout.addWidget(inputFrame)
         
-        # BPM计算器
-        self.bpmCalculator = BPMCalculator(self)
-        self.bpmCalculator.hide()
+        # 速度图段落切换（拖入速度图文件后显示）
+        self.tempoMap = None
+        self.tempoSectionIndex = 0
+        self.sectionFrame = ModernFrame()
+        sectionLayout = QHBoxLayout(self.sectionFrame)
+        self.prevSectionButton = GlassButton('◀')
+        self.prevSectionButton.setMaximumWidth(50)
+        self.prevSectionButton.clicked.connect(lambda: self.stepTempoSection(-1))
+        self.sectionLabel = QLabel()
+        self.sectionLabel.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.nextSectionButton = GlassButton('▶')
+        self.nextSectionButton.setMaximumWidth(50)
+        self.nextSectionButton.clicked.connect(lambda: self.stepTempoSection(1))
+        sectionLayout.addWidget(self.prevSectionButton)
+        sectionLayout.addWidget(self.sectionLabel, 1)
+        sectionLayout.addWidget(self.nextSectionButton)
+        mainLayout.addWidget(self.sectionFrame)
+        self.sectionFrame.hide()
+        
+        # 音频文件 BPM 检测进度（拖入音频文件后显示）
+        self.analysisTask = None
+        self.analysisFrame = ModernFrame()
+        analysisLayout = QHBoxLayout(self.analysisFrame)
+        self.analysisLabel = QLabel()
+        self.analysisProgress = QProgressBar()
+        self.analysisProgress.setRange(0, 1000)
+        self.analysisProgress.setTextVisible(False)
+        self.cancelAnalysisButton = GlassButton('✕')
+        self.cancelAnalysisButton.setMaximumWidth(50)
+        self.cancelAnalysisButton.clicked.connect(self.cancelAudioAnalysis)
+        analysisLayout.addWidget(self.analysisLabel)
+        analysisLayout.addWidget(self.analysisProgress, 1)
+        analysisLayout.addWidget(self.cancelAnalysisButton)
+        mainLayout.addWidget(self.analysisFrame)
+        self.analysisFrame.hide()
+        self.setAcceptDrops(True)
+        
         self.manualBpmButton.clicked.connect(self.toggleBpmCalculator)
         
         # 混响参数表格
         reverbFrame = ModernFrame()
         reverbLayout = QVBoxLayout(reverbFrame)
-        self.reverbTitle = QLabel(LanguageManager.TRANSLATIONS[self.current_lang]['reverb_params'])
-        self.updateReverbTitleStyle()
+        self.reverbTitle = QLabel()
+        LanguageManager.bind(self.reverbTitle, 'reverb_params')
+        self.reverbTitle.setProperty('role', 'title')
         reverbLayout.addWidget(self.reverbTitle)
         
-        self.reverbTable = CopyableTableWidget(4, 4)
-        self.reverbTable.setHorizontalHeaderLabels([
+        self.reverbModel = ParamsTableModel(REVERB_NAMES, [
             LanguageManager.TRANSLATIONS[self.current_lang]['reverb_type'],
             LanguageManager.TRANSLATIONS[self.current_lang]['pre_delay'],
             LanguageManager.TRANSLATIONS[self.current_lang]['decay_time'],
             LanguageManager.TRANSLATIONS[self.current_lang]['total_reverb']
-        ])
-        self.reverbTable.verticalHeader().hide()
-        
-        for i in range(4):
-            self.reverbTable.setRowHeight(i, 40)
-        
-        reverb_types = ['Hall', 'Large Room', 'Small Room', 'Tight Ambience']
-        for i, reverb_type in enumerate(reverb_types):
-            item = QTableWidgetItem(reverb_type)
-            item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            item.setBackground(QColor(self.current_theme['table_item_bg']))
-            self.reverbTable.setItem(i, 0, item)
-            
-        self.reverbTable.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        ], self)
+        self.reverbModel.setLabelBackground(QColor(self.current_theme['table_item_bg']))
+        self.reverbTable = CopyableTableView(self.reverbModel)
         reverbLayout.addWidget(self.reverbTable)
         mainLayout.addWidget(reverbFrame)
         
@@ -1013,23 +1759,28 @@ class MainWindow(QMainWindow):
         bottomLayout.setSpacing(10)
         
         # 音频应用链接按钮
-        audiobarButton = GlassButton(LanguageManager.TRANSLATIONS[self.current_lang]['audio_app'])
+        audiobarButton = GlassButton('')
+        LanguageManager.bind(audiobarButton, 'audio_app')
         audiobarButton.setMaximumWidth(120)  # 限制按钮宽度
         audiobarButton.clicked.connect(lambda: self.openUrl('http://audiobar.cn/'))
         bottomLayout.addWidget(audiobarButton)
         
         # 添加图标按钮
-        self.themeButton = IconButton('🎨', LanguageManager.TRANSLATIONS[self.current_lang]['theme_switch'])
+        self.themeButton = IconButton('🎨', '')
+        LanguageManager.bind(self.themeButton, 'theme_switch', 'setToolTip')
         self.themeButton.clicked.connect(self.toggleTheme)
         
-        self.langButton = IconButton('🌐', LanguageManager.TRANSLATIONS[self.current_lang]['lang_switch'])
+        self.langButton = IconButton('🌐', '')
+        LanguageManager.bind(self.langButton, 'lang_switch', 'setToolTip')
         self.langButton.clicked.connect(self.toggleLanguage)
         
-        self.stayOnTopButton = IconButton('📌', LanguageManager.TRANSLATIONS[self.current_lang]['stay_on_top'])
+        self.stayOnTopButton = IconButton('📌', '')
+        LanguageManager.bind(self.stayOnTopButton, 'stay_on_top', 'setToolTip')
         self.stayOnTopButton.clicked.connect(self.toggleStayOnTop)
         
         # 延迟参数按钮
-        self.toggleDelayButton = GlassButton(LanguageManager.TRANSLATIONS[self.current_lang]['show_delay'])
+        self.toggleDelayButton = GlassButton('')
+        LanguageManager.bind(self.toggleDelayButton, 'show_delay')
         self.toggleDelayButton.setMaximumWidth(120)  # 设置最大宽度为120px
         self.toggleDelayButton.clicked.connect(self.toggleDelayWindow)
         
@@ -1040,86 +1791,39 @@ class MainWindow(QMainWindow):
         
         mainLayout.addWidget(bottomFrame)
         
-        # 应用主题
-        self.setStyleSheet(StyleSheet.get_style(self.current_theme))
-        for button in self.findChildren(GlassButton):
-            button.updateStyle()
-        for button in self.findChildren(IconButton):
-            button.updateStyle()
-        for frame in self.findChildren(ModernFrame):
-            frame.updateStyle()
-            
-    def updateReverbTitleStyle(self):
-        """更新混响标题样式"""
-        if self.current_theme == ThemeManager.DARK_THEME:
-            self.reverbTitle.setStyleSheet("font-size: 18px; font-weight: bold; color: #64B5F6;")
-        else:
-            self.reverbTitle.setStyleSheet("font-size: 18px; font-weight: bold; color: #1976D2;")
-        
     def toggleTheme(self):
-        """切换主题"""
+        """切换主题：应用级样式表不变，只切换各窗口的作用域并重新 polish"""
         self.current_theme = ThemeManager.LIGHT_THEME if self.current_theme == ThemeManager.DARK_THEME else ThemeManager.DARK_THEME
-        self.setStyleSheet(StyleSheet.get_style(self.current_theme))
-        
-        # 更新所有 GlassButton
-        for button in self.findChildren(GlassButton):
-            button.updateStyle()
-            
-        # 更新所有 ModernFrame
-        for frame in self.findChildren(ModernFrame):
-            frame.updateStyle()
+        ThemeEngine.apply(self.current_theme)
+        self.saveSetting('theme', self.current_theme['name'])
         
         # 更新延迟参数窗口的主题
         if self.delayWindow:
             self.delayWindow.updateTheme()
             
         # 更新表格项的背景色
-        for i in range(4):
-            item = self.reverbTable.item(i, 0)
-            if item:
-                item.setBackground(QColor(self.current_theme['table_item_bg']))
+        self.reverbModel.setLabelBackground(QColor(self.current_theme['table_item_bg']))
                 
-        # 更新BPM计算器的主题
-        if self.bpmCalculator:
-            self.bpmCalculator.updateTheme()
+        if self.libraryWindow:
+            self.libraryWindow.updateTheme()
                 
     def toggleLanguage(self):
-        """切换语言"""
-        self.current_lang = 'en' if self.current_lang == 'zh' else 'zh'
+        """切换到下一种语言：绑定的控件由 LanguageManager 直接更新"""
+        self.current_lang = LanguageManager.nextLanguage(self.current_lang)
+        LanguageManager.apply(self.current_lang)
+        self.saveSetting('language', self.current_lang)
         self.updateTexts()
         
-        # 更新BPM计算器的语言
-        if hasattr(self, 'bpmCalculator'):
-            self.bpmCalculator.updateTexts()
-            self.bpmCalculator.updateTheme()  # 同时更新主题以确保颜色正确
+        if self.libraryWindow:
+            self.libraryWindow.updateTexts()
         
     def updateTexts(self):
-        """更新所有文本"""
+        """更新表头和带参数的文本，其余文本由 LanguageManager 按绑定更新"""
         texts = LanguageManager.TRANSLATIONS[self.current_lang]
-        self.setWindowTitle(texts['window_title'])
-        self.themeButton.setToolTip(texts['theme_switch'])
-        self.langButton.setToolTip(texts['lang_switch'])
-        self.stayOnTopButton.setToolTip(texts['stay_on_top'] if not self.stayOnTop else texts['cancel_on_top'])
-        self.manualBpmButton.setText(texts['manual_bpm'])
-        self.toggleDelayButton.setText(texts['show_delay'] if not self.delayWindow or self.delayWindow.isHidden() else texts['hide_delay'])
-        
-        # 更新托盘菜单文本
-        self.showAction.setText("显示" if self.current_lang == 'zh' else "Show")
-        self.quitAction.setText("退出" if self.current_lang == 'zh' else "Quit")
-        
-        # 更新标签和表头
-        for widget in self.findChildren(QLabel):
-            if widget.text() == LanguageManager.TRANSLATIONS['en']['bpm_label'] or widget.text() == LanguageManager.TRANSLATIONS['zh']['bpm_label']:
-                widget.setText(texts['bpm_label'])
-            elif widget.text() == LanguageManager.TRANSLATIONS['en']['reverb_params'] or widget.text() == LanguageManager.TRANSLATIONS['zh']['reverb_params']:
-                widget.setText(texts['reverb_params'])
-            
-            # 更新音频应用按钮文本
-            for button in self.findChildren(GlassButton):
-                if button.text() == LanguageManager.TRANSLATIONS['en']['audio_app'] or button.text() == LanguageManager.TRANSLATIONS['zh']['audio_app']:
-                    button.setText(texts['audio_app'])
-                
-        self.reverbTable.setHorizontalHeaderLabels([
+        self.updateSectionLabel()
+        self.updateAnalysisLabel()
+        
+        self.reverbModel.setHeaders([
             texts['reverb_type'],
             texts['pre_delay'],
             texts['decay_time'],
@@ -1128,9 +1832,8 @@ class MainWindow(QMainWindow):
         
         # 更新延迟参数窗口
         if self.delayWindow:
-            self.delayWindow.setWindowTitle(texts['delay_params'])
-            self.delayWindow.delayTitle.setText(texts['delay_params'])
-            self.delayWindow.delayTable.setHorizontalHeaderLabels([
+            self.delayWindow.updateTitleText()
+            self.delayWindow.delayModel.setHeaders([
                 texts['note_value'],
                 texts['notes'],
                 texts['dotted'],
@@ -1139,13 +1842,14 @@ class MainWindow(QMainWindow):
     
     def toggleStayOnTop(self):
         self.stayOnTop = not self.stayOnTop
+        self.saveSetting('stay_on_top', self.stayOnTop)
         flags = self.windowFlags()
         if self.stayOnTop:
             flags |= Qt.WindowType.WindowStaysOnTopHint
-            self.stayOnTopButton.setToolTip(LanguageManager.TRANSLATIONS[self.current_lang]['cancel_on_top'])
+            LanguageManager.bind(self.stayOnTopButton, 'cancel_on_top', 'setToolTip')
         else:
             flags &= ~Qt.WindowType.WindowStaysOnTopHint
-            self.stayOnTopButton.setToolTip(LanguageManager.TRANSLATIONS[self.current_lang]['stay_on_top'])
+            LanguageManager.bind(self.stayOnTopButton, 'stay_on_top', 'setToolTip')
         
         # 记录延迟参数窗口的可见状态
         delay_window_visible = self.delayWindow and self.delayWindow.isVisible()
@@ -1154,8 +1858,8 @@ class MainWindow(QMainWindow):
         self.setWindowFlags(flags)
         self.show()
         
-        # 更新延迟参数窗口状态
-        if self.delayWindow:
+        # 更新延迟参数窗口状态（面板模式下面板随主窗口一起更新）
+        if self.delayWindow and self.delayWindow.isWindow():
             delay_flags = self.delayWindow.windowFlags()
             if self.stayOnTop:
                 delay_flags |= Qt.WindowType.WindowStaysOnTopHint
@@ -1164,105 +1868,129 @@ class MainWindow(QMainWindow):
             self.delayWindow.setWindowFlags(delay_flags)
             # 如果之前是可见的，就保持可见
             if delay_window_visible:
-                self.delayWindow.show()
-                self.delayWindow.updateGeometry()
+                self.showDelayWindow()
     
-    def toggleDelayWindow(self):
-        if not self.delayWindow:
-            self.delayWindow = DelayParamsWindow(self)
+    def createDelayWindow(self):
+        self.delayWindow = DelayParamsWindow(self)
+        if self.delayDockMode == 'panel':
+            self.embedDelayPanel()
+        else:
             flags = Qt.WindowType.Tool
             if self.stayOnTop:
                 flags |= Qt.WindowType.WindowStaysOnTopHint
             self.delayWindow.setWindowFlags(flags)
+            self.delayDock = DockEngine(self, self.delayWindow)
+            # 显示和隐藏时只改变不透明度，不逐帧移动整个顶层窗口
+            self.delayAnimation = QPropertyAnimation(self.delayWindow, b"windowOpacity", self.delayWindow)
+            self.delayAnimation.setEasingCurve(QEasingCurve.Type.OutCubic)
+            self.delayAnimation.setDuration(200)
+            self.delayAnimation.finished.connect(self.onDelayAnimationFinished)
+        self.evictWhenIdle(self.delayWindow, self.evictDelayWindow)
+        
+        # 确保延迟窗口应用正确的主题
+        self.delayWindow.updateTheme()
+        
+    def embedDelayPanel(self):
+        """面板模式：延迟参数表作为主窗口右侧的面板，不需要同步两个窗口的位置"""
+        panel = self.delayWindow
+        panel.setWindowFlags(Qt.WindowType.Widget)
+        panel.setFixedWidth(DockEngine.WIDTH)
+        panel.hide()
+        if self.delayPanelLayout is None:
+            host = QWidget()
+            self.delayPanelLayout = QHBoxLayout(host)
+            self.delayPanelLayout.setContentsMargins(0, 0, 0, 0)
+            self.delayPanelLayout.setSpacing(0)
+            self.delayPanelLayout.addWidget(self.takeCentralWidget())
+            self.setCentralWidget(host)
+        self.delayPanelLayout.addWidget(panel)
+        
+    def setDelayDockMode(self, mode):
+        """切换延迟参数的显示方式，已创建的窗口或面板按新的方式重新创建"""
+        if mode == self.delayDockMode:
+            return
+        visible = self.delayWindow is not None and not self.delayWindow.isHidden()
+        self.saveSetting('delay_dock', mode)
+        if self.delayWindow is not None:
+            if self.delayAnimation is not None:
+                self.delayAnimation.stop()
+                self.delayWindow.is_animating = False
+            self.hideDelayWindow()
+            self.evictDelayWindow()
+        self.delayDockMode = mode
+        if visible:
+            self.toggleDelayWindow()
             
-            # 确保延迟窗口应用正确的主题
-            self.delayWindow.updateTheme()
-            
-            # 设置动画
-            self.slideAnimation = QPropertyAnimation(self.delayWindow, b"geometry")
-            self.slideAnimation.setEasingCurve(QEasingCurve.Type.OutCubic)
-            self.slideAnimation.setDuration(300)
+    def showDelayWindow(self):
+        """显示延迟参数：独立窗口先停靠到主窗口右侧，面板则加宽主窗口"""
+        if not self.delayWindow.isHidden():
+            return
+        if self.delayDock is not None:
+            self.delayDock.place()
+        elif not (self.isMaximized() or self.isFullScreen()):
+            self.resize(self.width() + DockEngine.WIDTH, self.height())
+        self.delayWindow.show()
         
-        try:
-            self.slideAnimation.finished.disconnect()
-        except:
-            pass
-            
+    def hideDelayWindow(self):
         if self.delayWindow.isHidden():
-            # 先显示窗口以获取正确的框架尺寸
-            self.delayWindow.show()
-            self.delayWindow.hide()
-            
-            # 获取屏幕尺寸
-            screen = QApplication.primaryScreen()
-            screen_geometry = screen.availableGeometry()
-            
-            # 获取主窗口的全局位置
-            parent_pos = self.mapToGlobal(QPoint(0, 0))
-            
-            # 设置动画起始和结束位置
-            target_rect = QRect(
-                parent_pos.x() + self.width(),  # 主窗口右边缘
-                parent_pos.y(),                 # 主窗口顶部
-                600,
-                self.height()                   # 主窗口高度
-            )
-            
-            # 检查是否超出屏幕边界
-            if target_rect.right() > screen_geometry.right():
-                # 如果超出右边界，将主窗口向左移动
-                new_x = screen_geometry.right() - (target_rect.width() + self.width())
-                new_pos = self.mapFromGlobal(QPoint(new_x, parent_pos.y()))
-                self.move(max(0, new_pos.x()), new_pos.y())
-                parent_pos = self.mapToGlobal(QPoint(0, 0))
-                target_rect.moveLeft(parent_pos.x() + self.width())
-            
-            start_rect = QRect(
-                target_rect.x() + 600,
-                target_rect.y(),
-                target_rect.width(),
-                target_rect.height()
-            )
+            return
+        self.delayWindow.hide()
+        if self.delayDock is None and not (self.isMaximized() or self.isFullScreen()):
+            # 先更新布局的最小尺寸，否则缩小会被仍包含面板的最小宽度挡住
+            self.delayPanelLayout.activate()
+            self.layout().activate()
+            self.resize(self.width() - DockEngine.WIDTH, self.height())
             
-            # 显示窗口并开始动画
-            self.delayWindow.setGeometry(start_rect)
-            self.delayWindow.show()
-            self.calculateDelay()
-            self.slideAnimation.setStartValue(start_rect)
-            self.slideAnimation.setEndValue(target_rect)
+    def toggleDelayWindow(self):
+        if not self.delayWindow:
+            self.createDelayWindow()
+        animation = self.delayAnimation
+        # 淡出过程中再次切换视为显示
+        showing = self.delayWindow.isHidden() or (self.delayWindow.is_animating
+                                                  and animation.endValue() == 0.0)
+        self.saveSetting('delay_visible', showing)
+        if animation is not None:
+            animation.stop()
             
-            def onShowFinished():
-                self.toggleDelayButton.setText(LanguageManager.TRANSLATIONS[self.current_lang]['hide_delay_params'])
-                self.delayWindow.is_animating = False
-                # 确保动画结束后主题正确应用
-                self.delayWindow.updateTheme()
-                
-            self.slideAnimation.finished.connect(onShowFinished)
-            self.delayWindow.is_animating = True
-            self.slideAnimation.start()
+        if showing:
+            LanguageManager.bind(self.toggleDelayButton, 'hide_delay_params')
+            if animation is None:
+                self.showDelayWindow()
+                return
+            if self.delayWindow.isHidden():
+                self.delayWindow.setWindowOpacity(0.0)
+            self.showDelayWindow()
+            animation.setStartValue(self.delayWindow.windowOpacity())
+            animation.setEndValue(1.0)
         else:
-            # 设置隐藏动画
-            current_rect = self.delayWindow.geometry()
-            end_rect = QRect(
-                current_rect.x() + 600,  # 向右滑动
-                current_rect.y(),        # 保持相同的y坐标
-                current_rect.width(),
-                current_rect.height()
-            )
-            
-            self.slideAnimation.setStartValue(current_rect)
-            self.slideAnimation.setEndValue(end_rect)
-            
-            def onHideFinished():
-                self.delayWindow.hide()
-                self.toggleDelayButton.setText(LanguageManager.TRANSLATIONS[self.current_lang]['show_delay_params'])
-                self.delayWindow.is_animating = False
-                
-            self.slideAnimation.finished.connect(onHideFinished)
-            self.delayWindow.is_animating = True
-            self.slideAnimation.start()
+            LanguageManager.bind(self.toggleDelayButton, 'show_delay_params')
+            if animation is None:
+                self.hideDelayWindow()
+                return
+            animation.setStartValue(self.delayWindow.windowOpacity())
+            animation.setEndValue(0.0)
+        self.delayWindow.is_animating = True
+        animation.start()
+        
+    def onDelayAnimationFinished(self):
+        self.delayWindow.is_animating = False
+        if self.delayAnimation.endValue() == 0.0:
+            self.hideDelayWindow()
+            self.delayWindow.setWindowOpacity(1.0)  # 其他途径（例如从托盘恢复）直接显示
     
+    def toggleLibraryWindow(self):
+        if self.libraryWindow is None:
+            self.libraryWindow = LibraryWindow(self)
+            self.evictWhenIdle(self.libraryWindow, self.evictLibraryWindow)
+        if self.libraryWindow.isHidden():
+            self.libraryWindow.refresh()  # 其他进程（例如命令行扫描）可能更新了索引
+            self.libraryWindow.show()
+            self.libraryWindow.activateWindow()
+        else:
+            self.libraryWindow.hide()
+            
     def toggleBpmCalculator(self):
+        self.ensureBpmCalculator()
         if self.bpmCalculator.isHidden():
             self.bpmCalculator.show()
             self.bpmCalculator.resetBPM()  # 显示时重置BPM
@@ -1271,115 +1999,235 @@ class MainWindow(QMainWindow):
             self.bpmCalculator.resetBPM()  # 隐藏时也重置BPM
             
     def keyPressEvent(self, event):
-        if event.key() == Qt.Key.Key_Space and not self.bpmCalculator.isHidden():
-            self.bpmCalculator.recordTap()
+        # 空格键点击由 TapCapture 在应用级捕获
+        if event.key() in (Qt.Key.Key_PageUp, Qt.Key.Key_PageDown) and self.tempoMap:
+            self.stepTempoSection(-1 if event.key() == Qt.Key.Key_PageUp else 1)
             event.accept()
         else:
             super().keyPressEvent(event)
             
-    def updateAllTables(self):
-        self.calculateReverbParams()
-        if self.delayWindow and not self.delayWindow.isHidden():
-            self.calculateDelay()
-    
-    def calculateReverbParams(self):
+    def dragEnterEvent(self, event):
+        if event.mimeData().hasUrls():
+            event.acceptProposedAction()
+            
+    def dropEvent(self, event):
+        for url in event.mimeData().urls():
+            if url.isLocalFile():
+                self.openFile(url.toLocalFile())
+                event.acceptProposedAction()
+                break
+                
+    def applyArguments(self, args):
+        """应用命令行参数：--bpm 填入 BPM，--tempo-map 打开文件"""
+        bpm = parse_bpm(args.bpm) if args.bpm else None
+        if bpm:
+            self.setTempoMap(None)
+            self.bpmInput.setText(format_bpm(bpm))
+        if args.tempo_map:
+            self.openFile(args.tempo_map)
+            
+    def handleLaunch(self, argv, cwd):
+        """再次启动程序时转交过来的参数：显示并激活窗口，再应用参数"""
+        if not self.isVisible():
+            self.toggleAllWindows()
+            if self.floatingWindow is not None:
+                self.floatingWindow.windows_hidden = False
+        elif self.isMinimized():
+            self.showNormal()
+        self.raise_()
+        self.activateWindow()
         try:
-            bpm = float(self.bpmInput.text() or 0)
-        except ValueError:
+            args, _ = build_arg_parser(add_help=False).parse_known_args(argv)
+        except argparse.ArgumentError:
             return
-            
-        if bpm <= 0:
+        if args.tempo_map:
+            args.tempo_map = os.path.join(cwd, args.tempo_map)  # 绝对路径保持不变
+        self.applyArguments(args)
+        
+    def openFile(self, path):
+        """打开拖入或从命令行传入的文件：音频文件检测 BPM，MIDI 文件读取速度事件，其他文件按速度图加载"""
+        from tempo_index import AUDIO_EXTENSIONS
+        extension = os.path.splitext(path)[1].lower()
+        if extension in AUDIO_EXTENSIONS:
+            self.analyzeAudioFile(path)
             return
-            
-        # Hall
-        hall_total = 60000 / bpm * 8
-        hall_predelay = hall_total / 64
-        hall_decay = hall_total - hall_predelay
-        
-        # Large Room
-        largeroom_total = 60000 / bpm * 4
-        largeroom_predelay = largeroom_total / 64
-        largeroom_decay = largeroom_total - largeroom_predelay
-        
-        # Small Room
-        smallroom_total = 60000 / bpm * 2
-        smallroom_predelay = smallroom_total / 64
-        smallroom_decay = smallroom_total - smallroom_predelay
-        
-        # Tight Ambience
-        tightambience_total = 60000 / bpm
-        tightambience_predelay = tightambience_total / 128
-        tightambience_decay = tightambience_total - tightambience_predelay
-        
-        # 更新表格
-        values = [
-            [hall_predelay, hall_decay, hall_total],
-            [largeroom_predelay, largeroom_decay, largeroom_total],
-            [smallroom_predelay, smallroom_decay, smallroom_total],
-            [tightambience_predelay, tightambience_decay, tightambience_total]
-        ]
-        
-        for row, row_values in enumerate(values):
-            for col, value in enumerate(row_values):
-                item = QTableWidgetItem(f'{value:.2f}')
-                item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                self.reverbTable.setItem(row, col + 1, item)
-                
-    def calculateDelay(self):
         try:
-            bpm = float(self.bpmInput.text() or 0)
-        except ValueError:
+            if extension in MIDI_EXTENSIONS:
+                self.loadMidiFile(path)
+            else:
+                self.loadTempoMap(path)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, LanguageManager.TRANSLATIONS[self.current_lang]['window_title'], str(e))
+            
+    def analyzeAudioFile(self, path):
+        """在后台检测音频文件的 BPM，完成后填入 BPM 输入框；速度有变化时按段落生成速度图"""
+        self.cancelAudioAnalysis()
+        task = AudioAnalysisTask(path, self)
+        task.progress.connect(lambda fraction: self.analysisProgress.setValue(int(fraction * 1000)))
+        task.finished.connect(lambda result, task=task: self.finishAudioAnalysis(task, result))
+        task.failed.connect(lambda error, task=task: self.finishAudioAnalysis(task, error=error))
+        task.cancelled.connect(lambda task=task: self.finishAudioAnalysis(task))
+        self.analysisTask = task
+        self.analysisProgress.setValue(0)
+        self.updateAnalysisLabel()
+        self.analysisFrame.show()
+        task.start()
+        
+    def cancelAudioAnalysis(self):
+        if self.analysisTask:
+            self.analysisTask.cancel()
+            self.analysisTask = None
+            self.analysisFrame.hide()
+            
+    def finishAudioAnalysis(self, task, result=None, error=None):
+        task.deleteLater()
+        if task is not self.analysisTask:  # 已被取消或被新的文件取代
             return
+        self.analysisTask = None
+        self.analysisFrame.hide()
+        if error is not None:
+            QMessageBox.warning(self, LanguageManager.TRANSLATIONS[self.current_lang]['window_title'], error)
+        elif result is not None:
+            tempoMap = result.curve.to_tempo_map() if result.curve else None
+            if tempoMap is not None and len(tempoMap) > 1:
+                # 速度有变化：按段落显示参数，PageUp / PageDown 切换
+                self.setTempoMap(tempoMap)
+            else:
+                self.setTempoMap(None)
+                self.bpmInput.setText(format_bpm(result.bpm))
             
-        if bpm <= 0:
+    def updateAnalysisLabel(self):
+        if self.analysisTask:
+            self.analysisLabel.setText(LanguageManager.TRANSLATIONS[self.current_lang]['analyzing'].format(
+                name=os.path.basename(self.analysisTask.path)))
+        
+    def loadTempoMap(self, path):
+        self.setTempoMap(TempoMap.load(path))
+        
+    def loadMidiFile(self, path):
+        """只有一个速度时填入 BPM 输入框，有速度或拍号变化时按速度图加载"""
+        tempoMap = read_midi_tempo(path).to_tempo_map()
+        if len(tempoMap) > 1:
+            self.setTempoMap(tempoMap)
+        else:
+            self.setTempoMap(None)
+            self.bpmInput.setText(format_bpm(tempoMap[0].bpm))
+        
+    def setTempoMap(self, tempoMap):
+        """显示速度图的第一个段落；tempoMap 为 None 时隐藏段落信息"""
+        self.tempoMap = tempoMap
+        if tempoMap is None:
+            self.sectionFrame.hide()
             return
+        self.sectionFrame.show()
+        self.showTempoSection(0)
+        
+    def stepTempoSection(self, step):
+        if self.tempoMap:
+            index = max(0, min(len(self.tempoMap) - 1, self.tempoSectionIndex + step))
+            self.showTempoSection(index)
             
-        note_values = {
-            "1/1": 1, "1/2": 0.5, "1/4": 0.25, "1/8": 0.125, "1/16": 0.0625,
-            "1/32": 0.03125, "1/64": 0.015625, "1/128": 0.0078125,
-            "1/256": 0.00390625, "1/512": 0.001953125
-        }
-        
-        for row, (note, value) in enumerate(note_values.items()):
-            notes_delay = (60 / bpm) * 1000 * 4 * value
-            dotted_delay = notes_delay * 1.5
-            triplets_delay = notes_delay / 3 * 2
+    def showTempoSection(self, index):
+        """切换到速度图的某个段落，参数表直接取自加载时的预计算结果"""
+        self.tempoSectionIndex = index
+        self.bpmInput.setText(format_bpm(self.tempoMap[index].bpm))
+        self.recomputeScheduler.refresh()
+        self.updateSectionLabel()
+        
+    def updateSectionLabel(self):
+        if not self.tempoMap:
+            return
+        segment = self.tempoMap[self.tempoSectionIndex]
+        self.sectionLabel.setText(LanguageManager.TRANSLATIONS[self.current_lang]['tempo_section'].format(
+            index=self.tempoSectionIndex + 1, count=len(self.tempoMap), bar=format_number(segment.bar),
+            bpm=format_number(segment.bpm), signature=segment.signature))
+        
+    def sectionRows(self, bpm):
+        """当前段落的预计算参数表 (混响, 延迟)；BPM 已被手动修改时返回 None"""
+        if self.tempoMap:
+            segment = self.tempoMap[self.tempoSectionIndex]
+            if parse_bpm(format_bpm(segment.bpm)) == bpm:
+                return segment.reverb, segment.delay
+        return None
             
-            for col, val in enumerate([notes_delay, dotted_delay, triplets_delay]):
-                item = QTableWidgetItem(f'{val:.2f}')
-                item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                self.delayWindow.delayTable.setItem(row, col + 1, item)
+    def updateAllTables(self):
+        self.recomputeScheduler.request()
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.recomputeScheduler.refresh()
+    
+    def calculateReverbParams(self, bpm):
+        section = self.sectionRows(bpm)
+        if section:
+            rows = section[0]
+        else:
+            rows = self.tempoTable.reverb(bpm) if self.tempoTable else None
+        self.reverbModel.setRows(rows or calculate_reverb(bpm))
+                
+    def calculateDelay(self, bpm):
+        section = self.sectionRows(bpm)
+        if section:
+            rows = section[1]
+        else:
+            rows = self.tempoTable.delay(bpm) if self.tempoTable else None
+        self.delayWindow.setDelayRows(bpm, rows or calculate_delay(bpm))
             
     def openUrl(self, url):
         import webbrowser
         webbrowser.open(url)
 
-    def moveEvent(self, event):
-        """当主窗口移动时，更新延迟参数窗口位置"""
-        super().moveEvent(event)
-        if self.delayWindow and self.delayWindow.isVisible():
-            if not self.delayWindow.is_syncing:
-                try:
-                    self.delayWindow.is_syncing = True
-                    
-                    # 获取主窗口位置
-                    parent_pos = self.pos()
-                    
-                    # 移动延迟窗口到主窗口右侧,保持顶部对齐
-                    self.delayWindow.move(parent_pos.x() + self.width(), parent_pos.y())
-                    
-                    # 保持两个窗口高度一致
-                    if self.delayWindow.height() != self.height():
-                        self.delayWindow.resize(self.delayWindow.width(), self.height())
-                        
-                finally:
-                    QTimer.singleShot(50, lambda: setattr(self.delayWindow, 'is_syncing', False))
-
-    def resizeEvent(self, event):
-        """当主窗口大小改变时，更新延迟参数窗口"""
-        super().resizeEvent(event)
-        if self.delayWindow and self.delayWindow.isVisible():
-            self.delayWindow.updateGeometry()
+class InstanceServer(QObject):
+    """单实例服务：接收再次启动时转交过来的命令行参数（客户端见 single_instance.py）"""
+    received = pyqtSignal(list, str)  # argv, 启动时的工作目录
+    MAX_MESSAGE_SIZE = 1 << 16
+    
+    def __init__(self, name, parent=None):
+        super().__init__(parent)
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.SocketOption.UserAccessOption)
+        self.server.newConnection.connect(self.acceptConnections)
+        if not self.server.listen(name):
+            # 只有重新连接被拒绝时才是上次异常退出留下的套接字文件，可以删除；有实例在监听时
+            # （例如它刚刚启动）不能删除，否则会同时运行两个界面
+            if not single_instance.is_running():
+                QLocalServer.removeServer(name)
+                self.server.listen(name)
+                
+    def isListening(self):
+        return self.server.isListening()
+            
+    def close(self):
+        self.server.close()
+        
+    def acceptConnections(self):
+        while self.server.hasPendingConnections():
+            connection = self.server.nextPendingConnection()
+            connection.disconnected.connect(connection.deleteLater)
+            connection.readyRead.connect(lambda connection=connection: self.readMessage(connection))
+            self.readMessage(connection)  # 数据可能在连接交给我们之前就已到达
+            
+    def readMessage(self, connection):
+        # 消息为一行字节数加正文，正文可能分几次到达
+        size = connection.property('messageSize')
+        if size is None:
+            if not connection.canReadLine():
+                return
+            try:
+                size = int(bytes(connection.readLine()))
+            except ValueError:
+                size = -1
+            if not 0 <= size <= self.MAX_MESSAGE_SIZE:
+                connection.abort()
+                return
+            connection.setProperty('messageSize', size)
+        if connection.bytesAvailable() < size:
+            return
+        argv, cwd = single_instance.decode_message(bytes(connection.read(size)))
+        connection.write(single_instance.REPLY)
+        connection.flush()
+        connection.disconnectFromServer()
+        self.received.emit(argv, cwd)
 
 class FloatingWindow(QWidget):
     def __init__(self, parent=None):
@@ -1399,8 +2247,10 @@ class FloatingWindow(QWidget):
         
         # 创建右键菜单
         self.context_menu = QMenu(self)
-        self.show_action = QAction(LanguageManager.TRANSLATIONS[self.main_window.current_lang]['show'], self)
-        self.quit_action = QAction(LanguageManager.TRANSLATIONS[self.main_window.current_lang]['quit'], self)
+        self.show_action = QAction(self)
+        LanguageManager.bind(self.show_action, 'show')
+        self.quit_action = QAction(self)
+        LanguageManager.bind(self.quit_action, 'quit')
         self.context_menu.addAction(self.show_action)
         self.context_menu.addAction(self.quit_action)
         
@@ -1409,7 +2259,7 @@ class FloatingWindow(QWidget):
         self.quit_action.triggered.connect(self.main_window.realQuit)
         
         self.initUI()
-        self.moveToDefaultPosition()
+        self.restorePosition()
 
     def toggleMainWindow(self):
         if not self.main_window:
@@ -1434,8 +2284,7 @@ class FloatingWindow(QWidget):
             # 恢复延迟窗口状态
             if hasattr(self.main_window, 'delay_window_was_visible') and self.main_window.delay_window_was_visible:
                 if self.main_window.delayWindow:
-                    self.main_window.delayWindow.show()
-                    self.main_window.delayWindow.updateGeometry()
+                    self.main_window.showDelayWindow()
                 else:
                     self.main_window.toggleDelayWindow()
             self.windows_hidden = False
@@ -1481,6 +2330,16 @@ class FloatingWindow(QWidget):
         screen = QApplication.primaryScreen().geometry()
         # 水平位置改为距离右边缘1/10宽度，垂直位置保持在1/5高度
         self.move(screen.width() - self.width() - screen.width() // 10, screen.height() // 10)
+        
+    def restorePosition(self):
+        """移到上次拖动到的位置；该位置已不在任何屏幕上（例如拔掉了显示器）时使用默认位置"""
+        position = self.main_window.settings.get('floating_position')
+        if (isinstance(position, list) and len(position) == 2
+                and all(isinstance(value, int) for value in position)
+                and QApplication.screenAt(QPoint(*position)) is not None):
+            self.move(*position)
+        else:
+            self.moveToDefaultPosition()
 
     def contextMenuEvent(self, event):
         # 显示右键菜单
@@ -1518,6 +2377,8 @@ class FloatingWindow(QWidget):
             # 如果没有发生拖动，则触发toggleMainWindow
             if not self.drag_started:
                 self.toggleMainWindow()
+            else:
+                self.main_window.saveSetting('floating_position', [self.x(), self.y()])
             self.press_pos = None
             self.dragging = False
             self.drag_started = False
@@ -1530,12 +2391,42 @@ class FloatingWindow(QWidget):
         if not self.dragging:  # 只有在不拖动时才改变透明度
             self.setWindowOpacity(0.9)  # 鼠标离开时恢复半透明
 
+def build_arg_parser(add_help=True):
+    """界面的命令行参数；转交过来的参数解析出错时抛出 ArgumentError 而不是退出"""
+    parser = argparse.ArgumentParser(add_help=add_help, exit_on_error=add_help)
+    parser.add_argument('--bpm', help='启动时填入的 BPM')
+    parser.add_argument('--tempo-map', help='启动时加载的速度图、MIDI 或音频文件')
+    parser.add_argument('--debug-overlay', action='store_true', help='显示点击延迟统计浮层')
+    parser.add_argument('--new-instance', action='store_true',
+                        help='总是启动新的实例，而不是把参数转交给正在运行的实例')
+    parser.add_argument('--delay-dock', choices=MainWindow.DELAY_DOCK_MODES,
+                        help='延迟参数显示为主窗口右侧的独立窗口（window）或主窗口内的面板（panel），'
+                             '默认沿用上次的选择')
+    parser.add_argument('--window-idle', type=float, default=MainWindow.WINDOW_IDLE_MS / 1000,
+                        metavar='SECONDS', help='次要窗口隐藏多少秒后释放，0 表示不释放')
+    parser.add_argument('--startup-benchmark', action='store_true',
+                        help='输出导入、创建主窗口和首次绘制的耗时后退出')
+    return parser
+
 def main():
+    marks = {'imported': time.perf_counter()}
     app = QApplication(sys.argv)
     app.setStyle('Fusion')  # 使用Fusion风格作为基础
+    marks['app_created'] = time.perf_counter()
+    
+    args, _ = build_arg_parser().parse_known_args(app.arguments()[1:])
+    # 尽早开始监听，缩短两个实例同时启动时都没有找到对方的时间窗口
+    server = None
+    if not (args.new_instance or args.startup_benchmark):
+        server = InstanceServer(single_instance.server_name(), app)
+        if not server.isListening():
+            # 另一个实例在本实例转交参数之后才开始监听（两个实例几乎同时启动）：转交给它
+            if single_instance.send(sys.argv[1:]) != single_instance.NO_INSTANCE:
+                sys.exit(0)
+            server = None
     
-    # 检查是否支持系统托盘
-    if not QSystemTrayIcon.isSystemTrayAvailable():
+    # 检查是否支持系统托盘（启动测速在无界面的 CI 环境中运行，不检查）
+    if not args.startup_benchmark and not QSystemTrayIcon.isSystemTrayAvailable():
         QMessageBox.critical(None, '系统托盘',
                            '找不到系统托盘，程序无法运行。')
         sys.exit(1)
@@ -1543,9 +2434,23 @@ def main():
     # 设置退出时不自动关闭
     app.setQuitOnLastWindowClosed(False)
     
-    window = MainWindow()
+    window = MainWindow(Settings(default_settings_path()))
+    window.debugOverlay = args.debug_overlay
+    window.windowIdleMs = int(args.window_idle * 1000)
+    if args.delay_dock:
+        window.setDelayDockMode(args.delay_dock)
+    if args.startup_benchmark:
+        marks['window_built'] = time.perf_counter()
+        StartupProbe(window, marks)
     window.show()
-    sys.exit(app.exec())
+    window.applyArguments(args)
+    if server is not None:
+        server.received.connect(window.handleLaunch)
+    status = app.exec()
+    window.flushSettings()  # 注销或关机时不经过 realQuit 退出
+    if server is not None:
+        server.close()  # 删除套接字文件
+    sys.exit(status)
 
 if __name__ == '__main__':
     main() 
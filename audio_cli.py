@@ -0,0 +1,194 @@
+"""无界面的批量命令行模式。
+
+从文件或标准输入逐行读取 {id, bpm}（CSV 或 JSONL），把混响/延迟参数以
+CSV、TSV 或 JSONL 写到标准输出。输入按块处理，内存占用与输入大小无关；
+--jobs N 时用进程池并行计算，输出顺序与输入一致。无法解析的行和无效的 BPM
+输出为带 error 字段的记录（CSV/TSV 中参数列为空），不会中断处理。
+
+用法：
+    python audio_cli.py catalog.csv -o tsv > params.tsv
+    cat tracks.jsonl | python audio_cli.py -i jsonl -o jsonl --jobs 8
+    python audio_calculator.py --batch catalog.csv
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from collections import deque
+from itertools import islice
+
+from audio_core import REVERB_TYPES, NOTE_VALUES, parse_bpm, calculate_reverb, calculate_delay
+
+FORMATS = ('csv', 'tsv', 'jsonl')
+TABLES = ('reverb', 'delay')
+
+
+def output_columns(tables):
+    """输出列名（不含 id 和 bpm），例如 hall_pre_delay、delay_1_4_dotted"""
+    columns = []
+    if 'reverb' in tables:
+        for name, _, _ in REVERB_TYPES:
+            slug = name.lower().replace(' ', '_')
+            columns += [f'{slug}_pre_delay', f'{slug}_decay', f'{slug}_total']
+    if 'delay' in tables:
+        for note, _ in NOTE_VALUES:
+            slug = note.replace('/', '_')
+            columns += [f'delay_{slug}_notes', f'delay_{slug}_dotted', f'delay_{slug}_triplets']
+    return columns
+
+
+def read_rows(stream, fmt):
+    """逐行产出 (id, bpm 原始值, 错误)；无法解析的行也产出一行，错误不为 None，不中断处理"""
+    if fmt == 'jsonl':
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield None, None, 'invalid json'
+                continue
+            if isinstance(record, dict):
+                yield record.get('id'), record.get('bpm'), None
+            else:
+                yield None, None, 'invalid record'
+    else:
+        delimiter = '\t' if fmt == 'tsv' else ','
+        for record in csv.DictReader(stream, delimiter=delimiter):
+            yield record.get('id'), record.get('bpm'), None
+
+
+def compute_values(bpm, tables):
+    """计算一行的全部参数，BPM 无效时返回 None"""
+    bpm = parse_bpm(bpm)
+    if bpm is None:
+        return None
+    values = []
+    if 'reverb' in tables:
+        for row in calculate_reverb(bpm):
+            values += row[1:]
+    if 'delay' in tables:
+        for row in calculate_delay(bpm):
+            values += row[1:]
+    return values
+
+
+def render_chunk(chunk, tables, fmt, precision):
+    """计算并序列化一块输入，返回可直接写出的文本（在工作进程中执行）"""
+    buffer = io.StringIO()
+    if fmt == 'jsonl':
+        columns = output_columns(tables)
+        for track_id, bpm, error in chunk:
+            values = None if error else compute_values(bpm, tables)
+            record = {'id': track_id, 'bpm': bpm}
+            if values is None:
+                record['error'] = error or 'invalid bpm'
+            else:
+                record.update(zip(columns, (round(value, precision) for value in values)))
+            buffer.write(json.dumps(record, ensure_ascii=False))
+            buffer.write('\n')
+    else:
+        writer = csv.writer(buffer, delimiter='\t' if fmt == 'tsv' else ',', lineterminator='\n')
+        empty = [''] * len(output_columns(tables))
+        formatter = f'{{:.{precision}f}}'.format
+        for track_id, bpm, error in chunk:
+            values = None if error else compute_values(bpm, tables)
+            if values is None:
+                writer.writerow([track_id, bpm] + empty)
+            else:
+                writer.writerow([track_id, bpm] + list(map(formatter, values)))
+    return buffer.getvalue()
+
+
+def iter_chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run(input_stream, output_stream, input_format='csv', output_format='csv',
+        tables=TABLES, jobs=1, chunk_size=2000, precision=2):
+    """流式处理整个输入，返回处理的行数"""
+    if output_format != 'jsonl':
+        writer = csv.writer(output_stream, delimiter='\t' if output_format == 'tsv' else ',',
+                            lineterminator='\n')
+        writer.writerow(['id', 'bpm'] + output_columns(tables))
+
+    count = 0
+    chunks = iter_chunks(read_rows(input_stream, input_format), chunk_size)
+    if jobs <= 1:
+        for chunk in chunks:
+            output_stream.write(render_chunk(chunk, tables, output_format, precision))
+            count += len(chunk)
+        return count
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    # 最多只让 2×jobs 个块同时在途，保证内存占用恒定，并按提交顺序写出
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append((len(chunk), pool.submit(render_chunk, chunk, tables,
+                                                    output_format, precision)))
+            if len(pending) >= jobs * 2:
+                size, future = pending.popleft()
+                output_stream.write(future.result())
+                count += size
+        while pending:
+            size, future = pending.popleft()
+            output_stream.write(future.result())
+            count += size
+    return count
+
+
+def _guess_format(path, default='csv'):
+    ext = os.path.splitext(path or '')[1].lower().lstrip('.')
+    if ext in ('json', 'ndjson'):
+        return 'jsonl'
+    return ext if ext in FORMATS else default
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='批量计算混响/延迟参数（无界面）')
+    parser.add_argument('input', nargs='?', default='-', help='输入文件，默认为标准输入')
+    parser.add_argument('-i', '--input-format', choices=FORMATS, help='输入格式，默认根据扩展名判断')
+    parser.add_argument('-o', '--output-format', choices=FORMATS, default='csv', help='输出格式')
+    parser.add_argument('--tables', default='reverb,delay', help='输出的表格：reverb、delay 或两者')
+    parser.add_argument('--jobs', type=int, default=1, help='并行进程数')
+    parser.add_argument('--chunk-size', type=int, default=2000, help='每块处理的行数')
+    parser.add_argument('--precision', type=int, default=2, help='保留的小数位数')
+    args = parser.parse_args(argv)
+
+    tables = tuple(t for t in TABLES if t in args.tables.split(','))
+    if not tables:
+        parser.error('--tables 至少包含 reverb 或 delay')
+    input_format = args.input_format or _guess_format(None if args.input == '-' else args.input)
+
+    if args.input == '-':
+        input_stream = sys.stdin
+    else:
+        # utf-8-sig：Excel 导出的 CSV 带 BOM，否则第一列的列名会变成 '\ufeffid'
+        input_stream = open(args.input, newline='', encoding='utf-8-sig')
+    try:
+        count = run(input_stream, sys.stdout, input_format, args.output_format, tables,
+                    max(1, args.jobs), max(1, args.chunk_size), args.precision)
+    except BrokenPipeError:
+        # 下游（例如 head）提前关闭管道时安静退出，避免解释器退出时再次报错
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 1
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+    print(f'{count} rows', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
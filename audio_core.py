@@ -0,0 +1,69 @@
+"""音频计算核心：根据 BPM 计算混响与延迟参数。
+
+本模块只依赖标准库，不导入 PyQt6 / pyperclip，可在无界面的脚本和
+短生命周期的工作进程中直接使用。为了保证导入足够快，这里刻意不导入
+typing 等较重的模块，返回值使用普通元组。
+"""
+from __future__ import annotations
+
+import math
+
+# 混响类型及其参数：(名称, 总时长对应的拍数, 预延迟占总时长的分母)
+REVERB_TYPES = (
+    ('Hall', 8, 64),
+    ('Large Room', 4, 64),
+    ('Small Room', 2, 64),
+    ('Tight Ambience', 1, 128),
+)
+
+# 延迟音符值：(名称, 相对全音符的比例)
+NOTE_VALUES = (
+    ('1/1', 1), ('1/2', 0.5), ('1/4', 0.25), ('1/8', 0.125), ('1/16', 0.0625),
+    ('1/32', 0.03125), ('1/64', 0.015625), ('1/128', 0.0078125),
+    ('1/256', 0.00390625), ('1/512', 0.001953125),
+)
+
+REVERB_NAMES = tuple(name for name, _, _ in REVERB_TYPES)
+NOTE_NAMES = tuple(name for name, _ in NOTE_VALUES)
+
+
+def parse_bpm(text: str) -> float | None:
+    """解析 BPM 文本，无效、非正数或非有限值时返回 None"""
+    if isinstance(text, bool):  # JSON 中的 true 不是 1 BPM
+        return None
+    try:
+        bpm = float(text or 0)
+    except (TypeError, ValueError):  # 例如 JSON 中的列表或对象
+        return None
+    if not math.isfinite(bpm) or bpm <= 0:
+        return None
+    return bpm
+
+
+def calculate_reverb(bpm: float) -> list[tuple[str, float, float, float]]:
+    """计算混响参数，返回 (混响类型, Pre-Delay, Decay Time, Total Reverb Time) 行，单位毫秒"""
+    rows = []
+    for name, beats, divisor in REVERB_TYPES:
+        total = 60000 / bpm * beats
+        predelay = total / divisor
+        rows.append((name, predelay, total - predelay, total))
+    return rows
+
+
+def calculate_delay(bpm: float) -> list[tuple[str, float, float, float]]:
+    """计算延迟参数，返回 (音符值, Notes, Dotted, Triplets) 行，单位毫秒"""
+    rows = []
+    for note, value in NOTE_VALUES:
+        notes_delay = (60 / bpm) * 1000 * 4 * value
+        rows.append((note, notes_delay, notes_delay * 1.5, notes_delay / 3 * 2))
+    return rows
+
+
+def format_value(value: float) -> str:
+    """按界面显示格式输出数值（保留两位小数）"""
+    return f'{value:.2f}'
+
+
+def format_bpm(bpm: float) -> str:
+    """按输入框允许的格式输出 BPM：最多两位小数，去掉末尾的 0"""
+    return f'{bpm:.2f}'.rstrip('0').rstrip('.')
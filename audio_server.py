@@ -0,0 +1,220 @@
+"""本地计算服务：通过 HTTP/JSON 提供混响与延迟参数。
+
+只监听回环地址，基于 asyncio，支持 HTTP/1.1 长连接。按 BPM 缓存序列化后的
+响应（有界 LRU），重复请求直接返回缓存的字节。
+
+接口：
+    GET  /params?bpm=128      混响和延迟参数
+    GET  /reverb?bpm=128      仅混响参数
+    GET  /delay?bpm=128       仅延迟参数
+    POST /batch               请求体 {"bpms": [120, 128.5, ...]}，按顺序返回参数
+    GET  /health              服务状态与缓存命中统计
+
+用法：
+    python audio_server.py [--port 8765] [--cache-size 4096]
+    python audio_calculator.py --serve [--port 8765]
+"""
+import argparse
+import asyncio
+import ipaddress
+import json
+import sys
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qs
+
+from audio_core import parse_bpm, calculate_reverb, calculate_delay
+
+DEFAULT_PORT = 8765
+MAX_BODY_SIZE = 1 << 20
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            413: 'Payload Too Large'}
+
+
+class ResponseCache:
+    """有界 LRU 缓存"""
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.items.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.items.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.items[key] = value
+        self.items.move_to_end(key)
+        if len(self.items) > self.maxsize:
+            self.items.popitem(last=False)
+
+    def stats(self):
+        return {'size': len(self.items), 'maxsize': self.maxsize,
+                'hits': self.hits, 'misses': self.misses}
+
+
+def reverb_json(bpm):
+    return [{'type': name, 'pre_delay': pre_delay, 'decay': decay, 'total': total}
+            for name, pre_delay, decay, total in calculate_reverb(bpm)]
+
+
+def delay_json(bpm):
+    return [{'note': note, 'notes': notes, 'dotted': dotted, 'triplets': triplets}
+            for note, notes, dotted, triplets in calculate_delay(bpm)]
+
+
+_RENDERERS = {
+    'params': lambda bpm: {'bpm': bpm, 'reverb': reverb_json(bpm), 'delay': delay_json(bpm)},
+    'reverb': lambda bpm: {'bpm': bpm, 'reverb': reverb_json(bpm)},
+    'delay': lambda bpm: {'bpm': bpm, 'delay': delay_json(bpm)},
+}
+
+
+class CalculationServer:
+    def __init__(self, cache_size=4096, max_batch=10000):
+        self.cache = ResponseCache(cache_size)
+        self.max_batch = max_batch
+        self.requests = 0
+
+    def render(self, kind, bpm):
+        """返回某个 BPM 的 JSON 字节，优先使用缓存"""
+        key = (kind, bpm)
+        body = self.cache.get(key)
+        if body is None:
+            body = json.dumps(_RENDERERS[kind](bpm), separators=(',', ':')).encode()
+            self.cache.put(key, body)
+        return body
+
+    def dispatch(self, method, target, body):
+        """处理一个请求，返回 (状态码, JSON 字节)"""
+        url = urlsplit(target)
+        path = url.path.rstrip('/') or '/'
+        kind = path.lstrip('/')
+        if kind in _RENDERERS:
+            if method != 'GET':
+                return 405, _error('method not allowed')
+            bpm = parse_bpm(parse_qs(url.query).get('bpm', [''])[0])
+            if bpm is None:
+                return 400, _error('invalid bpm')
+            return 200, self.render(kind, bpm)
+        if path == '/batch':
+            if method != 'POST':
+                return 405, _error('method not allowed')
+            try:
+                bpms = json.loads(body or b'{}').get('bpms')
+            except (ValueError, AttributeError):
+                return 400, _error('invalid json')
+            if not isinstance(bpms, list):
+                return 400, _error('"bpms" must be a list')
+            if len(bpms) > self.max_batch:
+                return 413, _error(f'at most {self.max_batch} bpms per batch')
+            results = []
+            for value in bpms:
+                # parse_bpm 拒绝列表、对象和 true/false，这些项与无效 BPM 一样返回 null
+                bpm = parse_bpm(value)
+                results.append(b'null' if bpm is None else self.render('params', bpm))
+            return 200, b'{"results":[' + b','.join(results) + b']}'
+        if path == '/health':
+            return 200, json.dumps({'status': 'ok', 'requests': self.requests,
+                                    'cache': self.cache.stats()}).encode()
+        return 404, _error('not found')
+
+    async def handle(self, reader, writer):
+        """处理一个连接上的全部请求（HTTP/1.1 长连接）"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get('content-length') or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    status, payload = 400, _error('invalid content-length')
+                    keep_alive = False
+                elif length > MAX_BODY_SIZE:
+                    status, payload = 413, _error('request body too large')
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    self.requests += 1
+                    status, payload = self.dispatch(method.upper(), target, body)
+                    connection = headers.get('connection', '').lower()
+                    keep_alive = (connection != 'close' if version == 'HTTP/1.1'
+                                  else connection == 'keep-alive')
+
+                writer.write(b'HTTP/1.1 %d %s\r\n'
+                             b'Content-Type: application/json\r\n'
+                             b'Content-Length: %d\r\n'
+                             b'Connection: %s\r\n\r\n'
+                             % (status, _REASONS[status].encode(), len(payload),
+                                b'keep-alive' if keep_alive else b'close'))
+                writer.write(payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def _error(message):
+    return json.dumps({'error': message}).encode()
+
+
+async def serve(host='127.0.0.1', port=DEFAULT_PORT, cache_size=4096, max_batch=10000):
+    """启动服务并返回 asyncio.Server；只允许回环地址"""
+    if not ipaddress.ip_address(host).is_loopback:
+        raise ValueError('计算服务只能监听回环地址')
+    server = CalculationServer(cache_size, max_batch)
+    return await asyncio.start_server(server.handle, host, port)
+
+
+async def _run(args):
+    server = await serve(args.host, args.port, args.cache_size, args.max_batch)
+    host, port = server.sockets[0].getsockname()[:2]
+    # 第一行输出监听地址，便于脚本（例如 benchmark.py server）读取实际端口
+    print(f'listening on http://{host}:{port}', flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='本地混响/延迟参数计算服务')
+    parser.add_argument('--host', default='127.0.0.1', help='回环地址，127.0.0.1 或 ::1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='端口，0 表示自动分配')
+    parser.add_argument('--cache-size', type=int, default=4096, help='LRU 缓存的响应数量')
+    parser.add_argument('--max-batch', type=int, default=10000, help='单次批量请求的最大 BPM 数')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_run(args))
+    except ValueError as e:
+        parser.error(str(e))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
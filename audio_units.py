@@ -0,0 +1,73 @@
+"""延迟参数的输出单位：毫秒、秒、指定采样率下的采样数、赫兹。
+
+内部使用 fractions.Fraction 精确计算，采样数不受浮点误差影响（例如 120 BPM、
+48 kHz 下的 1/4 音符恰好是 24000 个采样）。精确的参数表按 BPM 缓存，格式化结果
+按 (BPM, 单位, 采样率) 缓存，切换单位时不会重新计算参数表。
+"""
+from fractions import Fraction
+from functools import lru_cache
+
+from audio_core import NOTE_VALUES
+
+UNITS = ('ms', 's', 'samples', 'hz')
+SAMPLE_RATES = (44100, 48000, 96000, 192000)
+DEFAULT_SAMPLE_RATE = 48000
+
+# 各单位显示的小数位数；整数个采样不显示小数
+_DECIMALS = {'ms': 2, 's': 4, 'samples': 2, 'hz': 3}
+
+
+def exact_bpm(bpm):
+    """把 BPM 转为精确分数：浮点数取其最短十进制表示，即用户输入的数值"""
+    if isinstance(bpm, Fraction):
+        return bpm
+    if isinstance(bpm, float):
+        bpm = repr(bpm)
+    return Fraction(bpm)
+
+
+@lru_cache(maxsize=256)
+def exact_delay_table(bpm):
+    """精确的延迟参数表（毫秒），每行为 (音符值, Notes, Dotted, Triplets)"""
+    whole = Fraction(60 * 1000 * 4) / bpm
+    rows = []
+    for note, value in NOTE_VALUES:
+        notes = whole * Fraction(value)
+        rows.append((note, notes, notes * 3 / 2, notes * 2 / 3))
+    return tuple(rows)
+
+
+def convert(ms, unit, rate=DEFAULT_SAMPLE_RATE):
+    """把精确的毫秒数换算到指定单位"""
+    if unit == 'ms':
+        return ms
+    if unit == 's':
+        return ms / 1000
+    if unit == 'samples':
+        return ms * rate / 1000
+    if unit == 'hz':
+        return 1000 / ms
+    raise ValueError(f'未知单位: {unit}')
+
+
+def format_exact(value, decimals):
+    """精确地四舍五入（银行家舍入）并格式化分数"""
+    scaled = round(value * 10 ** decimals)
+    sign = '-' if scaled < 0 else ''
+    digits = str(abs(scaled)).rjust(decimals + 1, '0')
+    return f'{sign}{digits[:-decimals]}.{digits[-decimals:]}' if decimals else f'{sign}{digits}'
+
+
+@lru_cache(maxsize=1024)
+def formatted_delay_table(bpm, unit='ms', rate=DEFAULT_SAMPLE_RATE):
+    """按单位格式化的延迟参数表，每行为 (音符值, Notes, Dotted, Triplets) 字符串"""
+    decimals = _DECIMALS[unit]
+
+    def format_one(value):
+        value = convert(value, unit, rate)
+        if unit == 'samples' and value.denominator == 1:
+            return str(value.numerator)
+        return format_exact(value, decimals)
+
+    return tuple((note,) + tuple(format_one(value) for value in values)
+                 for note, *values in exact_delay_table(bpm))
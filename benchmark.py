@@ -0,0 +1,1569 @@
+"""性能基准与自检脚本
+
+用法：
+    python benchmark.py import-time [--runs 20] [--budget-ms 5]
+    python benchmark.py batch [--size 1000000] [--scalar-size 20000]
+    python benchmark.py cli [--rows 50000] [--jobs 4]
+    python benchmark.py table-update [--updates 2000]
+    python benchmark.py recompute [--keys 500] [--key-interval-ms 5]
+    python benchmark.py server [--port PORT] [--clients 64] [--requests 20000]
+    python benchmark.py taps [--taps 100000] [--window 20] [--max-ratio 1.5]
+    python benchmark.py tap-replay [--corpus tap_corpus.jsonl] [--tolerance 0.5]
+    python benchmark.py tap-timers [--taps 10000]
+    python benchmark.py tap-capture [--taps 1000]
+    python benchmark.py theme-toggle [--toggles 40]
+    python benchmark.py language-toggle [--toggles 40]
+    python benchmark.py dock-sync [--moves 500] [--move-interval-ms 2]
+    python benchmark.py table-copy [--copies 200]
+    python benchmark.py settings [--toggles 40] [--interval-ms 5]
+    python benchmark.py single-instance [--launches 10] [--budget-ms 50]
+    python benchmark.py startup [--runs 10] [--max-first-paint-ms 1500]
+    python benchmark.py analysis [--bpms 90,120,128,140] [--seconds 60] [--long-minutes 20]
+    python benchmark.py curve [--jitter-ms 5] [--long-minutes 10]
+    python benchmark.py midi [--megabytes 16]
+    python benchmark.py index [--files 200] [--jobs 4]
+
+每个子命令输出测量结果；带预算或校验的子命令在不满足要求时返回非零退出码，
+便于在 CI 或发布前检查中直接使用。
+"""
+import argparse
+import asyncio
+import math
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def bench_import_time(args):
+    """在全新的解释器中测量 audio_core 的导入耗时，并确认没有带入界面依赖"""
+    code = (
+        "import sys, time\n"
+        "t = time.perf_counter()\n"
+        "import audio_core\n"
+        "elapsed = time.perf_counter() - t\n"
+        "heavy = [m for m in ('PyQt6', 'pyperclip') if m in sys.modules]\n"
+        "print(elapsed * 1000, ','.join(heavy))\n"
+    )
+    samples = []
+    for _ in range(args.runs):
+        out = subprocess.run([sys.executable, '-c', code], cwd=HERE, check=True,
+                             capture_output=True, text=True).stdout.split()
+        if len(out) > 1:
+            print(f'audio_core 导入了界面依赖: {out[1]}')
+            return 1
+        samples.append(float(out[0]))
+
+    median = statistics.median(samples)
+    print(f'audio_core import: median {median:.3f} ms, '
+          f'min {min(samples):.3f} ms, max {max(samples):.3f} ms ({args.runs} runs)')
+    if median > args.budget_ms:
+        print(f'超出导入预算 {args.budget_ms} ms')
+        return 1
+    return 0
+
+
+def bench_batch(args):
+    """比较 NumPy 批量计算与标量计算的速度，并逐位校验结果一致"""
+    import numpy as np
+    from audio_batch import batch_reverb, batch_delay
+    from audio_core import calculate_reverb, calculate_delay
+
+    rng = np.random.default_rng(args.seed)
+    # 与输入框一致：1 到 999 之间、保留两位小数的 BPM
+    bpms = rng.integers(100, 99901, size=args.size) / 100
+
+    t = time.perf_counter()
+    reverb = batch_reverb(bpms)
+    delay = batch_delay(bpms)
+    batch_elapsed = time.perf_counter() - t
+
+    sample = bpms[:args.scalar_size].tolist()
+    t = time.perf_counter()
+    scalar = [(calculate_reverb(bpm), calculate_delay(bpm)) for bpm in sample]
+    scalar_elapsed = time.perf_counter() - t
+
+    expected_reverb = np.array([[row[1:] for row in r] for r, _ in scalar])
+    expected_delay = np.array([[row[1:] for row in d] for _, d in scalar])
+    exact = (np.array_equal(reverb[:len(sample)], expected_reverb)
+             and np.array_equal(delay[:len(sample)], expected_delay))
+
+    batch_rate = args.size / batch_elapsed
+    scalar_rate = len(sample) / scalar_elapsed
+    print(f'batch:  {args.size} BPM in {batch_elapsed:.3f} s ({batch_rate:,.0f} BPM/s)')
+    print(f'scalar: {len(sample)} BPM in {scalar_elapsed:.3f} s ({scalar_rate:,.0f} BPM/s)')
+    print(f'speedup: {batch_rate / scalar_rate:.1f}x, exact match: {exact}')
+    return 0 if exact else 1
+
+
+def bench_cli(args):
+    """命令行批量模式的吞吐量，并检查无效的行输出带 error 字段的记录、带 BOM 的 CSV 保留 id"""
+    import json
+    import tempfile
+    invalid = (('{"id": "bool", "bpm": true}', 'invalid bpm'),
+               ('{"id": "text", "bpm": "fast"}', 'invalid bpm'),
+               ('{"id": "list", "bpm": [120]}', 'invalid bpm'),
+               ('{"id": "zero", "bpm": 0}', 'invalid bpm'),
+               ('not json', 'invalid json'),
+               ('[120]', 'invalid record'))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'tracks.jsonl')
+        with open(path, 'w', encoding='utf-8') as f:
+            for line, _ in invalid:
+                f.write(line + '\n')
+            for i in range(args.rows):
+                f.write(json.dumps({'id': i, 'bpm': 60 + i % 14000 / 100}) + '\n')
+
+        ok = True
+        for jobs in sorted({1, args.jobs}):
+            t = time.perf_counter()
+            out = subprocess.run([sys.executable, os.path.join(HERE, 'audio_cli.py'), path, '-o', 'jsonl',
+                                  '--jobs', str(jobs)], check=True, capture_output=True, text=True).stdout
+            elapsed = time.perf_counter() - t
+            records = [json.loads(line) for line in out.splitlines()]
+            errors = [record.get('error') for record in records[:len(invalid)]]
+            valid = records[len(invalid):]
+            passed = (errors == [error for _, error in invalid] and len(valid) == args.rows
+                      and not any('error' in record for record in valid))
+            ok &= passed
+            print(f'jobs {jobs}: {len(records)} rows in {elapsed:.2f} s ({len(records) / elapsed:,.0f} rows/s), '
+                  f'invalid rows reported: {"ok" if passed else "FAIL " + str(errors)}')
+
+        # Excel 导出的 CSV 以 BOM 开头：id 列仍应被识别
+        path = os.path.join(directory, 'excel.csv')
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            f.write('id,bpm\r\ntrack-1,120\r\n')
+        out = subprocess.run([sys.executable, os.path.join(HERE, 'audio_cli.py'), path, '-o', 'jsonl'],
+                             check=True, capture_output=True, text=True).stdout
+        bom_ok = json.loads(out).get('id') == 'track-1'
+        ok &= bom_ok
+        print(f'csv with a byte order mark: {"ok" if bom_ok else "FAIL"}')
+    return 0 if ok else 1
+
+
+_app = None
+
+
+def _qt_app():
+    """创建 QApplication；未指定平台时使用 offscreen，便于在无显示环境下运行
+
+    保存在模块中：基准函数返回时窗口仍然存在，QApplication 不能随局部变量一起销毁。
+    """
+    global _app
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtWidgets import QApplication
+    if _app is None:
+        _app = QApplication.instance() or QApplication(sys.argv[:1])
+    return _app
+
+
+def _wait_for_startup(app, window, timeout=10):
+    """处理事件直到主窗口完成首次绘制后的初始化（托盘图标和悬浮窗）"""
+    deadline = time.perf_counter() + timeout
+    while window.floatingWindow is None and time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+
+
+def _close_main_window(app, window):
+    """退出并立即销毁主窗口、悬浮窗及各个子窗口
+
+    窗口对象之间有循环引用，留给解释器退出时的垃圾回收会在 QApplication 销毁之后
+    才释放它们，可能导致崩溃。
+    """
+    from PyQt6.QtCore import QEvent
+    window.realQuit()
+    if window.floatingWindow is not None:
+        window.floatingWindow.deleteLater()
+    window.deleteLater()
+    app.sendPostedEvents(None, QEvent.Type.DeferredDelete.value)
+
+
+def _percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def bench_table_update(args):
+    """比较 QTableWidget 每次新建单元格与参数表模型更新的耗时和内存分配"""
+    app = _qt_app()
+    from PyQt6.QtCore import Qt
+    from PyQt6.QtWidgets import QTableWidget, QTableWidgetItem
+    from audio_calculator import ParamsTableModel, CopyableTableView
+    from audio_core import (REVERB_NAMES, NOTE_NAMES, calculate_reverb,
+                            calculate_delay, format_value)
+
+    # 模拟连续输入的速度：120.00、120.01 …
+    bpms = [120 + i / 100 for i in range(args.updates)]
+    headers = ['', '', '', '']
+
+    def item_tables():
+        tables = [QTableWidget(len(REVERB_NAMES), 4), QTableWidget(len(NOTE_NAMES), 4)]
+
+        def update(bpm):
+            for table, rows in zip(tables, (calculate_reverb(bpm), calculate_delay(bpm))):
+                for row, (_, *values) in enumerate(rows):
+                    for col, value in enumerate(values):
+                        item = QTableWidgetItem(format_value(value))
+                        item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+                        table.setItem(row, col + 1, item)
+        return tables, update
+
+    def model_tables():
+        models = [ParamsTableModel(REVERB_NAMES, headers), ParamsTableModel(NOTE_NAMES, headers)]
+        views = [CopyableTableView(model) for model in models]
+
+        def update(bpm):
+            models[0].setRows(calculate_reverb(bpm))
+            models[1].setRows(calculate_delay(bpm))
+        return (models, views), update
+
+    for name, factory in (('items', item_tables), ('model', model_tables)):
+        keep, update = factory()
+        timings = []
+        peaks = []
+        tracemalloc.start()
+        blocks_before = sys.getallocatedblocks()
+        for bpm in bpms:
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            t = time.perf_counter()
+            update(bpm)
+            app.processEvents()
+            timings.append(time.perf_counter() - t)
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+        blocks = sys.getallocatedblocks() - blocks_before
+        tracemalloc.stop()
+        print(f'{name:>5}: mean {statistics.mean(timings) * 1e6:.1f} us, '
+              f'p99 {_percentile(timings, 99) * 1e6:.1f} us, '
+              f'peak alloc {statistics.mean(peaks):.0f} B/update, '
+              f'retained blocks {blocks}')
+        del keep
+    return 0
+
+
+def bench_recompute(args):
+    """模拟快速输入 BPM，统计请求与实际执行的重算次数"""
+    app = _qt_app()
+    from audio_calculator import MainWindow, ThemeManager
+
+    window = MainWindow()
+    window.show()
+    window.toggleDelayWindow()
+    window.recomputeScheduler.setInterval(args.interval_ms)
+    app.processEvents()
+
+    # 依次输入 "1"、"12"、"128"、"128."、"128.0" 等，模拟打字和连续推送的速度
+    texts = []
+    while len(texts) < args.keys:
+        bpm = f'{60 + len(texts) % 140}.0'
+        texts.extend(bpm[:i] for i in range(1, len(bpm) + 1))
+    texts = texts[:args.keys]
+
+    counters = window.recomputeScheduler.counters
+    for key in counters:
+        counters[key] = 0
+    t = time.perf_counter()
+    for text in texts:
+        window.bpmInput.setText(text)
+        deadline = time.perf_counter() + args.key_interval_ms / 1000
+        while time.perf_counter() < deadline:
+            app.processEvents()
+    window.recomputeScheduler.refresh()
+    elapsed = time.perf_counter() - t
+
+    print(f'{len(texts)} keystrokes in {elapsed:.2f} s')
+    for key, value in counters.items():
+        print(f'{key:>17}: {value}')
+    _close_main_window(app, window)
+    return 0
+
+
+async def _load_client(host, port, requests, bpms, batch, latencies, rng):
+    """单个长连接客户端：顺序发送请求并记录每个请求的延迟"""
+    import json
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(requests):
+            if batch:
+                body = json.dumps({'bpms': rng.sample(bpms, batch)}).encode()
+                request = (b'POST /batch HTTP/1.1\r\nHost: %s\r\nContent-Length: %d\r\n\r\n'
+                           % (host.encode(), len(body)) + body)
+            else:
+                request = (b'GET /params?bpm=%s HTTP/1.1\r\nHost: %s\r\n\r\n'
+                           % (rng.choice(bpms).encode(), host.encode()))
+            t = time.perf_counter()
+            writer.write(request)
+            length = 0
+            status = await reader.readline()
+            while True:
+                line = await reader.readline()
+                if line == b'\r\n':
+                    break
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':')[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - t)
+            if not status.startswith(b'HTTP/1.1 200'):
+                raise RuntimeError(status.decode().strip())
+    finally:
+        writer.close()
+
+
+async def _exchange(host, port, request):
+    """在新连接上发送一个原始请求，返回 (状态码, 响应体)；服务没有响应就关闭连接时状态码为 None"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(request)
+        status = await reader.readline()
+        if not status:
+            return None, b''
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line == b'\r\n':
+                break
+            if line.lower().startswith(b'content-length:'):
+                length = int(line.split(b':')[1])
+        return int(status.split()[1]), await reader.readexactly(length)
+    finally:
+        writer.close()
+
+
+async def _check_server(host, port):
+    """边界情况的请求：返回 [(名称, 是否通过)]"""
+    import json
+    body = b'{"bpms": [true, 120, "fast", [120]]}'
+    status, payload = await _exchange(host, port, b'POST /batch HTTP/1.1\r\nContent-Length: %d\r\n\r\n'
+                                      % len(body) + body)
+    results = json.loads(payload).get('results') if status == 200 else None
+    batch_ok = (results is not None and results[0] is None and isinstance(results[1], dict)
+                and results[2] is None and results[3] is None)
+    checks = [('batch items true/"fast"/[120] -> null', batch_ok)]
+    for length in (b'-5', b'abc'):
+        status, _ = await _exchange(host, port, b'POST /batch HTTP/1.1\r\nContent-Length: %s\r\n\r\n{}'
+                                    % length)
+        checks.append((f'content-length {length.decode()} -> 400', status == 400))
+    return checks
+
+
+def bench_server(args):
+    """对本地计算服务施加并发负载，报告 p50/p99 延迟和每秒请求数，并检查无效输入的响应"""
+    import random
+    process = None
+    host, port = args.host, args.port
+    if not port:
+        # 未指定端口时启动一个临时服务进程，从其第一行输出读取端口
+        process = subprocess.Popen([sys.executable, 'audio_server.py', '--port', '0',
+                                    '--cache-size', str(args.cache_size)],
+                                   cwd=HERE, stdout=subprocess.PIPE, text=True)
+        host, port = process.stdout.readline().strip().rsplit('/', 1)[1].rsplit(':', 1)
+        port = int(port)
+
+    rng = random.Random(args.seed)
+    # 取值范围决定缓存命中率：默认 2000 个不同 BPM
+    bpms = [f'{rng.randint(6000, 20000) / 100}' for _ in range(args.distinct)]
+    # 余数分给前几个客户端，实际请求数与 --requests 一致
+    quotient, remainder = divmod(args.requests, args.clients)
+    per_client = [quotient + (i < remainder) for i in range(args.clients)]
+    latencies = []
+
+    async def run():
+        await asyncio.gather(*(
+            _load_client(host, port, count, bpms, args.batch, latencies,
+                         random.Random(args.seed + i))
+            for i, count in enumerate(per_client) if count))
+
+    try:
+        checks = asyncio.run(_check_server(host, port))
+        t = time.perf_counter()
+        asyncio.run(run())
+        elapsed = time.perf_counter() - t
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    print(f'{len(latencies)} requests, {sum(1 for count in per_client if count)} clients, '
+          f'{"batch of %d" % args.batch if args.batch else "single BPM"}')
+    print(f'p50 {_percentile(latencies, 50) * 1000:.2f} ms, '
+          f'p99 {_percentile(latencies, 99) * 1000:.2f} ms, '
+          f'{len(latencies) / elapsed:,.0f} req/s')
+    for name, passed in checks:
+        print(f'{name}: {"ok" if passed else "FAIL"}')
+    return 0 if all(passed for _, passed in checks) else 1
+
+
+def bench_taps(args):
+    """用合成的点击序列驱动测速引擎（不加载 Qt），并与原来的列表实现逐次比较
+
+    另外测量稳健估计（每次点击后调用 estimate()，与计算器相同）在默认窗口和最大
+    窗口下的每次点击耗时：有序间隔列表的移动随窗口变长，比值超过 --max-ratio 时失败。
+    """
+    import random
+    from tap_tempo import TapTempo, DEFAULT_WINDOW, MAX_WINDOW
+
+    rng = random.Random(args.seed)
+    # 120 BPM 附近、带 ±5 ms 抖动的点击时间戳（毫秒）
+    timestamps = []
+    now = 0.0
+    for _ in range(args.taps):
+        now += 500 + rng.uniform(-5, 5)
+        timestamps.append(now)
+
+    engine = TapTempo(args.window)
+    results = []
+    t = time.perf_counter()
+    for timestamp in timestamps:
+        engine.tap(timestamp)
+        results.append(engine.bpm())
+    ring_elapsed = time.perf_counter() - t
+
+    # 原实现：列表 append + pop(0)，每次点击重建间隔列表并求和
+    taps = []
+    expected = []
+    t = time.perf_counter()
+    for timestamp in timestamps:
+        taps.append(timestamp)
+        if len(taps) > engine.window:
+            taps.pop(0)
+        if len(taps) < 2:
+            expected.append(None)
+            continue
+        intervals = [taps[i] - taps[i - 1] for i in range(1, len(taps))]
+        expected.append(60000 / (sum(intervals) / len(intervals)))
+    list_elapsed = time.perf_counter() - t
+
+    mismatches = sum(1 for a, b in zip(results, expected)
+                     if (a is None) != (b is None) or (a is not None and abs(a - b) > 1e-6))
+    qt_loaded = 'PyQt6' in sys.modules
+    print(f'ring buffer: {args.taps} taps in {ring_elapsed * 1000:.1f} ms '
+          f'({ring_elapsed / args.taps * 1e9:.0f} ns/tap), window {engine.window}')
+    print(f'list:        {args.taps} taps in {list_elapsed * 1000:.1f} ms '
+          f'({list_elapsed / args.taps * 1e9:.0f} ns/tap)')
+    print(f'final bpm {results[-1]:.3f}, mismatches: {mismatches}, PyQt6 loaded: {qt_loaded}')
+
+    per_tap = {}
+    for window in (DEFAULT_WINDOW, MAX_WINDOW):
+        engine = TapTempo(window)
+        t = time.perf_counter()
+        for timestamp in timestamps:
+            engine.tap(timestamp)
+            engine.estimate()
+        per_tap[window] = (time.perf_counter() - t) / args.taps
+    ratio = per_tap[MAX_WINDOW] / per_tap[DEFAULT_WINDOW]
+    print(f'tap + estimate: window {DEFAULT_WINDOW} {per_tap[DEFAULT_WINDOW] * 1e6:.2f} µs/tap, '
+          f'window {MAX_WINDOW} {per_tap[MAX_WINDOW] * 1e6:.2f} µs/tap '
+          f'(ratio {ratio:.2f}, max {args.max_ratio:g})')
+    return 0 if mismatches == 0 and not qt_loaded and ratio <= args.max_ratio else 1
+
+
+def bench_tap_replay(args):
+    """回放点击序列语料，检查稳健估计的 BPM 误差，并与算术平均比较"""
+    import json
+    from tap_tempo import TapTempo
+
+    with open(args.corpus, encoding='utf-8') as f:
+        cases = [json.loads(line) for line in f if line.strip()]
+
+    failures = 0
+    taps = 0
+    elapsed = 0.0
+    print(f'{"sequence":<24} {"expected":>8} {"robust":>8} {"conf":>5} {"missed":>6} '
+          f'{"extra":>5} {"mean":>8}')
+    for case in cases:
+        engine = TapTempo(args.window)
+        t = time.perf_counter()
+        for timestamp in case['taps']:
+            engine.tap(timestamp)
+            estimate = engine.estimate()
+        elapsed += time.perf_counter() - t
+        taps += len(case['taps'])
+
+        ok = estimate is not None and abs(estimate.bpm - case['bpm']) <= args.tolerance
+        failures += not ok
+        mean = engine.bpm()
+        print(f'{case["name"]:<24} {case["bpm"]:>8.2f} '
+              + (f'{estimate.bpm:>8.2f} {estimate.confidence:>5.2f} {estimate.missed:>6} '
+                 f'{estimate.extra:>5}' if estimate else f'{"-":>8} {"-":>5} {"-":>6} {"-":>5}')
+              + f' {mean:>8.2f}' + ('' if ok else '  FAIL'))
+
+    print(f'{len(cases) - failures}/{len(cases)} sequences within ±{args.tolerance} BPM, '
+          f'{elapsed / taps * 1e6:.1f} µs per tap (tap + estimate)')
+    return 0 if failures == 0 else 1
+
+
+def bench_tap_timers(args):
+    """连续点击时确认同步计时器被复用：QObject 数量和 Python 内存都不增长"""
+    import gc
+    app = _qt_app()
+    from PyQt6.QtCore import QObject
+    from PyQt6.QtWidgets import QLineEdit
+    from audio_calculator import BPMCalculator
+
+    target = QLineEdit()
+    calculator = BPMCalculator(sync_target=target, sync_idle_ms=args.idle_ms)
+    now = time.perf_counter_ns() / 1e6
+
+    def drive(count):
+        nonlocal now
+        for i in range(count):
+            now += 500
+            calculator.recordTap(now)
+            if i % 100 == 0:
+                app.processEvents()
+        app.processEvents()
+
+    drive(1000)  # 预热，让缓存和窗口填满
+    gc.collect()
+    objects_before = len(calculator.findChildren(QObject))
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    t = time.perf_counter()
+    drive(args.taps)
+    elapsed = time.perf_counter() - t
+    gc.collect()
+    growth = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(before, 'filename'))
+    tracemalloc.stop()
+    objects_after = len(calculator.findChildren(QObject))
+
+    # 停止点击后应只同步一次
+    deadline = time.perf_counter() + args.idle_ms / 1000 + 2
+    while not target.text() and time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.005)
+
+    print(f'{args.taps} taps in {elapsed * 1000:.1f} ms ({elapsed / args.taps * 1e6:.1f} µs/tap)')
+    print(f'QObject children: {objects_before} -> {objects_after}, '
+          f'python memory growth: {growth / 1024:.1f} KiB, synced bpm: {target.text() or "-"}')
+    ok = objects_after == objects_before and growth <= args.max_growth_kib * 1024 and target.text() == '120'
+    return 0 if ok else 1
+
+
+def bench_tap_capture(args):
+    """应用级截获空格键的耗时，并检查哪些控件收到空格、哪些算作点击
+
+    计算器显示时，发给主窗口中控件（参数表格、主窗口本身）和计算器的空格算一次点击；
+    输入框和主窗口中获得焦点的按钮照常收到空格。F12 只在计算器显示时切换延迟统计。
+    """
+    app = _qt_app()
+    from PyQt6.QtCore import QEvent, QObject, Qt
+    from PyQt6.QtGui import QKeyEvent
+    from audio_calculator import MainWindow
+
+    class KeyRecorder(QObject):
+        """控件级事件过滤器在应用级过滤器之后调用：记录按键是否送达了控件"""
+        def __init__(self):
+            super().__init__()
+            self.received = False
+
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Type.KeyPress:
+                self.received = True
+            return False
+
+    recorder = KeyRecorder()
+    window = MainWindow()
+    window.show()
+    _wait_for_startup(app, window)
+    window.toggleBpmCalculator()
+    calculator = window.bpmCalculator
+    app.processEvents()
+
+    def press(widget, key, text=''):
+        """发送一次按键，返回是否算作点击、控件是否收到了按键"""
+        before = calculator.tapTempo.count
+        recorder.received = False
+        widget.installEventFilter(recorder)
+        app.sendEvent(widget, QKeyEvent(QEvent.Type.KeyPress, key, Qt.KeyboardModifier.NoModifier, text))
+        widget.removeEventFilter(recorder)
+        return calculator.tapTempo.count > before, recorder.received
+
+    ok = True
+    for name, widget, expected in (('main window table', window.reverbTable, True),
+                                   ('main window', window, True),
+                                   ('calculator tap button', calculator.tapButton, True),
+                                   ('main window bpm input', window.bpmInput, False),
+                                   ('main window button', window.themeButton, False)):
+        calculator.resetBPM()
+        tapped, received = press(widget, Qt.Key.Key_Space, ' ')
+        passed = tapped == expected and received != expected
+        ok &= passed
+        print(f'space -> {name}: {"tap" if tapped else "no tap"} ({"ok" if passed else "FAIL"})')
+
+    overlay = calculator.latencyOverlay
+    shown = overlay.isHidden()
+    press(window.reverbTable, Qt.Key.Key_F12)
+    toggled = overlay.isHidden() != shown
+    press(window.reverbTable, Qt.Key.Key_F12)
+    window.toggleBpmCalculator()  # 隐藏计算器
+    _, received = press(window.reverbTable, Qt.Key.Key_F12)
+    f12_ok = toggled and overlay.isHidden() == shown and received
+    ok &= f12_ok
+    print(f'F12 toggles the overlay only while the calculator is shown: {"ok" if f12_ok else "FAIL"}')
+
+    window.toggleBpmCalculator()
+    app.processEvents()
+    t = time.perf_counter()
+    for _ in range(args.taps):
+        app.sendEvent(window.reverbTable, QKeyEvent(QEvent.Type.KeyPress, Qt.Key.Key_Space,
+                                                    Qt.KeyboardModifier.NoModifier, ' '))
+    elapsed = time.perf_counter() - t
+    _close_main_window(app, window)
+    print(f'{args.taps} space taps via the application event filter in {elapsed * 1000:.1f} ms '
+          f'({elapsed / args.taps * 1e6:.1f} µs/tap)')
+    print('tap capture ' + ('ok' if ok else 'FAIL'))
+    return 0 if ok else 1
+
+
+def bench_theme_toggle(args):
+    """切换主题的耗时与样式重算次数（主窗口、延迟参数窗口和 BPM 计算器都已显示）"""
+    app = _qt_app()
+    from PyQt6.QtCore import QObject, QEvent
+    from audio_calculator import MainWindow, ThemeManager
+
+    class StyleChangeCounter(QObject):
+        count = 0
+
+        def eventFilter(self, obj, event):
+            if event.type() in (QEvent.Type.StyleChange, QEvent.Type.PaletteChange):
+                self.count += 1
+            return False
+
+    window = MainWindow()
+    window.show()
+    _wait_for_startup(app, window)
+    window.toggleDelayWindow()
+    window.toggleBpmCalculator()
+    app.processEvents()
+    counter = StyleChangeCounter()
+    app.installEventFilter(counter)
+
+    def colors():
+        """主题相关的几个前景色：混响标题、BPM 计算器标题（始终为亮色主题）、按钮文字"""
+        widgets = (window.reverbTitle, window.bpmCalculator.title, window.manualBpmButton)
+        return tuple(widget.palette().color(widget.foregroundRole()).name() for widget in widgets)
+
+    timings = []
+    events = []
+    seen = {}
+    for _ in range(args.toggles):
+        counter.count = 0
+        t = time.perf_counter()
+        window.toggleTheme()
+        app.processEvents()  # 包括重新布局和绘制
+        timings.append(time.perf_counter() - t)
+        events.append(counter.count)
+        seen.setdefault('dark' if window.current_theme is ThemeManager.DARK_THEME else 'light', colors())
+    app.removeEventFilter(counter)
+    _close_main_window(app, window)
+
+    widgets = len(app.allWidgets())
+    print(f'{args.toggles} toggles, {widgets} widgets: median {statistics.median(timings) * 1000:.1f} ms, '
+          f'p95 {_percentile(timings, 95) * 1000:.1f} ms, '
+          f'{statistics.median(events):.0f} style/palette changes per toggle')
+    for theme, values in sorted(seen.items()):
+        print(f'{theme:<5} reverb title {values[0]}, bpm calculator title {values[1]}, '
+              f'button text {values[2]}')
+    ok = (seen.get('dark', (None,))[0] == '#64b5f6' and seen.get('light', (None,))[0] == '#1976d2'
+          and all(values[1] == '#1565c0' for values in seen.values()))
+    print('colors ' + ('ok' if ok else 'FAIL'))
+    return 0 if ok else 1
+
+
+def bench_language_toggle(args):
+    """切换语言的耗时，并检查切换后没有控件残留上一种语言的文本
+
+    主窗口、延迟参数窗口、BPM 计算器和素材库窗口都已显示。
+    """
+    app = _qt_app()
+    from PyQt6.QtWidgets import QWidget, QLabel, QAbstractButton, QLineEdit
+    from PyQt6.QtGui import QAction
+    from audio_calculator import MainWindow, LanguageManager
+
+    window = MainWindow()
+    window.show()
+    _wait_for_startup(app, window)
+    window.toggleDelayWindow()
+    window.toggleBpmCalculator()
+    window.toggleLibraryWindow()
+    app.processEvents()
+
+    def texts():
+        """所有控件和菜单项当前显示的文本"""
+        found = set()
+        for widget in app.allWidgets():
+            if widget.window() is window.floatingWindow:
+                continue  # 悬浮窗显示固定的程序名，不随语言变化
+            found.add(widget.toolTip())
+            if widget.isWindow():
+                found.add(widget.windowTitle())
+            if isinstance(widget, (QLabel, QAbstractButton)):
+                found.add(widget.text())
+            elif isinstance(widget, QLineEdit):
+                found.add(widget.placeholderText())
+        for action in window.findChildren(QAction) + window.floatingWindow.findChildren(QAction):
+            found.add(action.text())
+        return found
+
+    updates = []
+    timings = []
+    stale = set()
+    for _ in range(args.toggles):
+        t = time.perf_counter()
+        window.toggleLanguage()
+        updates.append(time.perf_counter() - t)
+        app.processEvents()  # 包括重新布局和绘制
+        timings.append(time.perf_counter() - t)
+        # 只在另一种语言中出现的文本不应再显示
+        current = LanguageManager.TRANSLATIONS[window.current_lang]
+        for lang in LanguageManager.languages():
+            if lang != window.current_lang:
+                other = set(LanguageManager.TRANSLATIONS[lang].values()) - set(current.values())
+                stale |= texts() & other
+    widgets = len(app.allWidgets())
+    _close_main_window(app, window)
+
+    print(f'{args.toggles} toggles, {widgets} widgets: text update median '
+          f'{statistics.median(updates) * 1000:.2f} ms, p95 {_percentile(updates, 95) * 1000:.2f} ms; '
+          f'with layout and paint median {statistics.median(timings) * 1000:.1f} ms')
+    if stale:
+        print('stale texts: ' + ', '.join(sorted(stale)))
+    print('texts ' + ('FAIL' if stale else 'ok'))
+    return 1 if stale else 0
+
+
+def bench_dock_sync(args):
+    """拖动主窗口时延迟参数的同步次数：独立窗口每帧最多同步一次，面板模式不需要同步"""
+    app = _qt_app()
+    from PyQt6.QtCore import QObject, QEvent, QPoint
+    from audio_calculator import MainWindow
+
+    class GeometryCounter(QObject):
+        count = 0
+
+        def eventFilter(self, obj, event):
+            if event.type() in (QEvent.Type.Move, QEvent.Type.Resize):
+                self.count += 1
+            return False
+
+    def pump(seconds):
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            app.processEvents()
+
+    ok = True
+    for mode in MainWindow.DELAY_DOCK_MODES:
+        window = MainWindow()
+        window.setDelayDockMode(mode)
+        window.show()
+        _wait_for_startup(app, window)
+        window.move(0, 0)
+        t = time.perf_counter()
+        window.toggleDelayWindow()
+        shown = time.perf_counter() - t
+        pump(0.3)  # 淡入结束
+        delay = window.delayWindow
+        counter = GeometryCounter()
+        delay.installEventFilter(counter)
+
+        # 模拟拖动：每隔 move_interval_ms 移动一次主窗口
+        t = time.perf_counter()
+        for i in range(args.moves):
+            window.move(QPoint(i % 200, i % 100))
+            pump(args.move_interval_ms / 1000)
+        pump(0.05)  # 最后一次同步
+        elapsed = time.perf_counter() - t
+        delay.removeEventFilter(counter)
+
+        if mode == 'panel':
+            aligned = delay.isVisible() and not delay.isWindow()
+            print(f'panel:  show {shown * 1000:.1f} ms, {args.moves} moves in {elapsed:.2f} s, '
+                  f'{counter.count} geometry changes of the panel')
+            ok &= aligned and counter.count == 0
+        else:
+            counters = window.delayDock.counters
+            frames = elapsed * 1000 / window.delayDock.timer.interval()
+            main, dock = window.frameGeometry(), delay.frameGeometry()
+            aligned = (main.right() + 1 == dock.left() and main.top() == dock.top()
+                       and main.height() == dock.height())
+            print(f'window: show {shown * 1000:.1f} ms, {args.moves} moves in {elapsed:.2f} s '
+                  f'({frames:.0f} frames), {counters["synced"]} syncs, '
+                  f'{counter.count} geometry changes of the delay window, '
+                  f'{counters["skipped_echo"]} echoed moves ignored')
+            ok &= aligned and counters['synced'] <= frames + 1
+        print(f'{mode:<6} ' + ('aligned' if aligned else 'NOT aligned'))
+        _close_main_window(app, window)
+    return 0 if ok else 1
+
+
+def bench_table_copy(args):
+    """单元格复制的耗时（QClipboard，可用时与 pyperclip 比较），并检查整表复制的往返结果
+
+    混响表和延迟表（所有单位）分别按 TSV、CSV、JSON 复制，从剪贴板读回后应与
+    表格中显示的文本一致。
+    """
+    app = _qt_app()
+    import csv
+    import io
+    import json
+    from PyQt6.QtCore import Qt
+    from table_export import FORMATS
+    from audio_calculator import MainWindow
+
+    window = MainWindow()
+    window.show()
+    _wait_for_startup(app, window)
+    window.toggleDelayWindow()
+    app.processEvents()
+    clipboard = app.clipboard()
+    table = window.reverbTable
+    index = table.model().index(1, 2)
+
+    samples = []
+    for _ in range(args.copies):
+        t = time.perf_counter()
+        table.copyCell(index)
+        samples.append(time.perf_counter() - t)
+    ok = clipboard.text() == index.data()
+    print(f'QClipboard: {args.copies} copies, median {statistics.median(samples) * 1000:.3f} ms, '
+          f'p95 {_percentile(samples, 95) * 1000:.3f} ms')
+    try:
+        import pyperclip
+        samples = []
+        for _ in range(min(args.copies, 20)):
+            t = time.perf_counter()
+            pyperclip.copy(index.data())
+            samples.append(time.perf_counter() - t)
+        print(f'pyperclip:  {len(samples)} copies, median {statistics.median(samples) * 1000:.3f} ms')
+    except Exception as e:  # 未安装，或没有可用的 xclip/xsel
+        print(f'pyperclip:  skipped ({type(e).__name__})')
+
+    def expected(view):
+        model = view.model()
+        headers = [model.headerData(column, Qt.Orientation.Horizontal)
+                   for column in range(model.columnCount())]
+        rows = [[model.index(row, column).data() or '' for column in range(model.columnCount())]
+                for row in range(model.rowCount())]
+        return headers, rows
+
+    def parse(text, fmt, headers):
+        if fmt == 'json':
+            return headers, [[record[header] for header in headers] for record in json.loads(text)]
+        rows = list(csv.reader(io.StringIO(text), delimiter='\t' if fmt == 'tsv' else ','))
+        return rows[0], rows[1:]
+
+    def same(value, text):
+        return value == text if isinstance(value, str) else text != '' and float(text) == value
+
+    delay = window.delayWindow
+    views = [('reverb', window.reverbTable)]
+    views += [(f'delay ({delay.unitSelector.itemText(i)})', delay.delayTable)
+              for i in range(delay.unitSelector.count())]
+    for i, (name, view) in enumerate(views):
+        if i:
+            delay.unitSelector.setCurrentIndex(i - 1)
+            app.processEvents()
+        headers, rows = expected(view)
+        results = []
+        for fmt in FORMATS:
+            t = time.perf_counter()
+            view.copyTable(fmt)
+            elapsed = time.perf_counter() - t
+            got_headers, got_rows = parse(clipboard.text(), fmt, headers)
+            match = got_headers == headers and len(got_rows) == len(rows) and all(
+                same(value, text) for got, row in zip(got_rows, rows) for value, text in zip(got, row))
+            ok &= match
+            results.append(f'{fmt} {elapsed * 1000:.2f} ms {"ok" if match else "MISMATCH"}')
+        print(f'{name:<18} {len(rows)}x{len(headers)}: ' + ', '.join(results))
+    _close_main_window(app, window)
+    print('round trip ' + ('ok' if ok else 'FAIL'))
+    return 0 if ok else 1
+
+
+def bench_settings(args):
+    """连续切换设置时的写盘次数，以及退出时写回、重新启动后恢复的结果
+
+    每次切换之间处理 interval_ms 毫秒的事件；写回在第一次修改后 SETTINGS_WRITE_MS
+    毫秒进行，期间的修改合并为一次写入，写盘次数应远少于修改次数。
+    """
+    app = _qt_app()
+    import json
+    import tempfile
+    from app_settings import Settings
+    from audio_calculator import MainWindow
+
+    def pump(seconds):
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            app.processEvents()
+            time.sleep(0.001)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'settings.json')
+        settings = Settings(path)
+        window = MainWindow(settings)
+        window.show()
+        _wait_for_startup(app, window)
+        toggles = [window.toggleTheme, window.toggleLanguage, window.toggleStayOnTop,
+                   window.toggleDelayWindow]
+        changes = 0
+        t = time.perf_counter()
+        for i in range(args.toggles):
+            toggles[i % len(toggles)]()
+            window.bpmInput.setText(f'{100 + i}')
+            changes += 2
+            pump(args.interval_ms / 1000)
+        elapsed = time.perf_counter() - t
+        window.floatingWindow.move(12, 34)
+        window.saveSetting('floating_position', [12, 34])
+        during = settings.writes
+        expected = {'theme': window.current_theme['name'], 'language': window.current_lang,
+                    'stay_on_top': window.stayOnTop, 'bpm': window.bpmInput.text(),
+                    'delay_visible': args.toggles // 4 % 2 == 1,  # 延迟参数切换了奇数次
+                    'floating_position': [12, 34]}
+        _close_main_window(app, window)  # realQuit 写回尚未保存的修改
+        with open(path, encoding='utf-8') as f:
+            saved = json.load(f)
+
+        # 重新启动：从文件恢复
+        window = MainWindow(Settings(path))
+        window.show()
+        _wait_for_startup(app, window)
+        restored = {'theme': window.current_theme['name'], 'language': window.current_lang,
+                    'stay_on_top': window.stayOnTop, 'bpm': window.bpmInput.text(),
+                    'delay_visible': window.delayWindow is not None,
+                    'floating_position': [window.floatingWindow.x(), window.floatingWindow.y()]}
+        _close_main_window(app, window)
+
+    budget = elapsed * 1000 / MainWindow.SETTINGS_WRITE_MS + 1
+    print(f'{changes} changes in {elapsed:.2f} s: {during} writes while toggling '
+          f'(budget {budget:.0f}), {settings.writes} including the flush on quit')
+    ok = during <= budget and during < changes
+    saved_ok = all(saved.get(key) == value for key, value in expected.items())
+    restored_ok = restored == expected
+    print('writes ' + ('ok' if ok else 'FAIL'))
+    print('saved ' + ('ok' if saved_ok else f'FAIL {saved} != {expected}'))
+    print('restored ' + ('ok' if restored_ok else f'FAIL {restored} != {expected}'))
+    return 0 if ok and saved_ok and restored_ok else 1
+
+
+def bench_single_instance(args):
+    """再次启动程序时转交参数的耗时
+
+    本进程作为正在运行的实例（真实的 InstanceServer 和 MainWindow），子进程按
+    正常方式启动 audio_calculator.py --bpm N。检查子进程成功退出、没有导入 PyQt6、
+    BPM 已填入窗口；运行中的实例暂时不处理事件时，子进程同样退出而不启动第二个界面；
+    上次异常退出留下的套接字文件被新实例替换。从源码运行时解释器每次都要编译主脚本（打包后的程序使用预编译
+    的字节码），因此对照组是只编译 audio_calculator.py 的 Python 进程。
+    """
+    import tempfile
+    app = _qt_app()
+    # 使用独立的套接字名称，不影响本机正在运行的程序
+    runtime = tempfile.mkdtemp()
+    os.environ['XDG_RUNTIME_DIR'] = runtime
+    os.environ['USERNAME'] = f'benchmark-{os.getpid()}'
+    import single_instance
+    from audio_calculator import MainWindow, InstanceServer
+    from audio_core import format_bpm
+
+    server = InstanceServer(single_instance.server_name())
+    window = MainWindow()
+    server.received.connect(window.handleLaunch)
+    window.show()
+    app.processEvents()
+
+    def launch(command):
+        """启动子进程并在等待期间处理事件，返回 (耗时, 子进程)"""
+        t = time.perf_counter()
+        proc = subprocess.Popen(command, cwd=HERE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        while proc.poll() is None:
+            app.processEvents()
+            time.sleep(0.0005)
+            if time.perf_counter() - t > 30:
+                proc.kill()
+        elapsed = time.perf_counter() - t
+        return elapsed, proc
+
+    script = os.path.join(HERE, 'audio_calculator.py')
+    compile_only = "import sys; compile(open(sys.argv[1], encoding='utf-8').read(), sys.argv[1], 'exec')"
+    # 第一次启动用 -X importtime 检查导入的模块
+    _, proc = launch([sys.executable, '-X', 'importtime', script, '--bpm', '99'])
+    imports = proc.stderr.read().decode('utf-8', 'replace')
+    gui_imported = 'PyQt6' in imports
+    ok = proc.returncode == 0 and not gui_imported
+
+    handoffs, baseline = [], []
+    for i in range(args.launches):
+        bpm = 100 + i
+        elapsed, proc = launch([sys.executable, script, '--bpm', str(bpm)])
+        proc.stderr.close()
+        handoffs.append(elapsed)
+        app.processEvents()
+        if proc.returncode != 0 or window.bpmInput.text() != format_bpm(bpm):
+            print(f'launch {i}: exit code {proc.returncode}, bpm field {window.bpmInput.text()!r}')
+            ok = False
+        elapsed, proc = launch([sys.executable, '-c', compile_only, script])
+        proc.stderr.close()
+        baseline.append(elapsed)
+
+    # 运行中的实例正忙（不处理事件）：子进程等不到确认，但不能删除套接字另起界面
+    t = time.perf_counter()
+    proc = subprocess.run([sys.executable, script, '--bpm', '77'], cwd=HERE, timeout=60,
+                          capture_output=True)
+    busy = time.perf_counter() - t
+    busy_ok = (proc.returncode == 0 and server.isListening()
+               and os.path.exists(single_instance.server_name()))
+    app.processEvents()
+    time.sleep(0.05)
+    app.processEvents()
+    busy_ok &= window.bpmInput.text() == format_bpm(77)
+
+    server.close()
+    t = time.perf_counter()
+    found = single_instance.forward(['--bpm', '120'])
+    missing = time.perf_counter() - t
+
+    # 异常退出留下的套接字文件：没有实例监听，新实例删除它并开始监听（Windows 的命名管道
+    # 随进程消失，不会残留）
+    stale_ok = True
+    if sys.platform != 'win32':
+        import socket
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale:
+            stale.bind(single_instance.server_name())
+        replaced = InstanceServer(single_instance.server_name())
+        stale_ok = replaced.isListening() and single_instance.is_running()
+        replaced.close()
+    _close_main_window(app, window)
+    os.rmdir(runtime)
+
+    overhead = statistics.median(handoffs) - statistics.median(baseline)
+    print(f'{args.launches} launches: hand-off median {statistics.median(handoffs) * 1000:.1f} ms, '
+          f'compile-only python median {statistics.median(baseline) * 1000:.1f} ms, '
+          f'overhead {overhead * 1000:.1f} ms (budget {args.budget_ms:g} ms)')
+    print(f'PyQt6 imported by the second launch: {"yes" if gui_imported else "no"}')
+    print(f'no running instance: detected in {missing * 1000:.2f} ms')
+    print(f'busy instance: second launch exited in {busy * 1000:.0f} ms, '
+          f'arguments applied later: {"ok" if busy_ok else "FAIL"}')
+    print(f'stale socket file replaced: {"ok" if stale_ok else "FAIL"}')
+    ok = ok and busy_ok and stale_ok and not found and overhead * 1000 <= args.budget_ms
+    print('single instance ' + ('ok' if ok else 'FAIL'))
+    return 0 if ok else 1
+
+
+def bench_startup(args):
+    """冷启动耗时：多次运行 audio_calculator.py --startup-benchmark，统计各阶段的中位数
+
+    各阶段依次为导入模块、创建 QApplication、构建主窗口、首次绘制完成，以及首次
+    绘制之后创建托盘图标和悬浮窗；另外记录进程从启动到退出的总耗时。
+    """
+    import json
+    script = os.path.join(HERE, 'audio_calculator.py')
+    env = dict(os.environ)
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    phases = (('imported', 'import'), ('app_created', 'QApplication'), ('window_built', 'main window'),
+              ('first_paint', 'first paint'), ('ready', 'tray + floating window'))
+    runs = {name: [] for name, _ in phases}
+    totals = []
+    for _ in range(args.runs):
+        t = time.perf_counter()
+        proc = subprocess.run([sys.executable, script, '--startup-benchmark'], cwd=HERE, env=env,
+                              capture_output=True, text=True, timeout=60)
+        totals.append(time.perf_counter() - t)
+        lines = [line for line in proc.stdout.splitlines() if line.startswith('{')]
+        if proc.returncode != 0 or not lines:
+            print(proc.stderr[-2000:], file=sys.stderr)
+            print('startup FAIL')
+            return 1
+        marks = json.loads(lines[-1])
+        for name, _ in phases:
+            runs[name].append(marks[name])
+
+    print(f'{args.runs} runs, median ms since the module started executing:')
+    previous = 0.0
+    for name, label in phases:
+        value = statistics.median(runs[name])
+        print(f'  {label:<24}{value:8.1f}  (+{value - previous:.1f})')
+        previous = value
+    print(f'  {"process wall time":<24}{statistics.median(totals) * 1000:8.1f}')
+    first_paint = statistics.median(runs['first_paint'])
+    ok = first_paint <= args.max_first_paint_ms
+    print(f'first paint {first_paint:.1f} ms (budget {args.max_first_paint_ms:g} ms): '
+          + ('ok' if ok else 'FAIL'))
+    return 0 if ok else 1
+
+
+def _synth_track(bpm, seconds, rate, seed, jitter_ms=0):
+    """合成测试用的节拍：每拍一个底鼓、反拍一个较弱的镲，叠加白噪声
+
+    bpm 可以是以时间（秒）为参数的函数，用来合成速度漂移的录音；jitter_ms
+    为每个击打时间的随机偏差（标准差）。
+    """
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    samples = rng.normal(0, 0.02, int(seconds * rate)).astype(np.float32)
+    length = int(0.08 * rate)
+    decay = np.exp(-np.arange(length) / (0.015 * rate)).astype(np.float32)
+    kick = np.sin(2 * np.pi * 60 * np.arange(length) / rate).astype(np.float32) * decay
+    hat = rng.normal(0, 1, length).astype(np.float32) * decay ** 3
+    if callable(bpm):
+        beats = []
+        position = 0.0
+        while position < seconds:
+            period = 60 / bpm(position) * rate
+            beats.append((position * rate, period))
+            position += period / rate
+    else:
+        period = 60 / bpm * rate
+        beats = [(beat * period, period) for beat in range(int(seconds * bpm / 60))]
+    for beat, period in beats:
+        for offset, sound, gain in ((0, kick, 0.8), (period / 2, hat, 0.2)):
+            start = max(0, int(beat + offset + (rng.normal(0, jitter_ms * rate / 1000) if jitter_ms else 0)))
+            end = min(len(samples), start + length)
+            if start < end:
+                samples[start:end] += gain * sound[:end - start]
+    return np.clip(samples, -1, 1)
+
+
+def _write_audio(path, samples, rate, fmt):
+    """写出单声道测试文件：wav16、wav24、wavf32 或 aiff16"""
+    import struct
+    import numpy as np
+    if fmt == 'wavf32':
+        data, tag, bits = samples.astype('<f4').tobytes(), 3, 32
+    elif fmt == 'wav24':
+        ints = (samples * 8388607).astype('<i4')
+        data, tag, bits = ints.view(np.uint8).reshape(-1, 4)[:, :3].tobytes(), 1, 24
+    else:
+        ints = (samples * 32767).astype('>i2' if fmt == 'aiff16' else '<i2')
+        data, tag, bits = ints.tobytes(), 1, 16
+    width = bits // 8
+    with open(path, 'wb') as f:
+        if fmt == 'aiff16':
+            # 采样率写成 80 位扩展精度浮点数
+            exponent = rate.bit_length() - 1
+            mantissa = rate << (63 - exponent)
+            comm = struct.pack('>hIh', 1, len(samples), bits) + struct.pack('>HQ', 16383 + exponent,
+                                                                          mantissa)
+            f.write(b'FORM' + struct.pack('>I', 4 + 8 + len(comm) + 16 + len(data)) + b'AIFF')
+            f.write(b'COMM' + struct.pack('>I', len(comm)) + comm)
+            f.write(b'SSND' + struct.pack('>III', 8 + len(data), 0, 0) + data)
+        else:
+            fmt_chunk = struct.pack('<HHIIHH', tag, 1, rate, rate * width, width, bits)
+            f.write(b'RIFF' + struct.pack('<I', 4 + 8 + len(fmt_chunk) + 8 + len(data)) + b'WAVE')
+            f.write(b'fmt ' + struct.pack('<I', len(fmt_chunk)) + fmt_chunk)
+            f.write(b'data' + struct.pack('<I', len(data)) + data)
+
+
+def bench_analysis(args):
+    """在合成的音频文件上检测 BPM：检查误差、吞吐量，以及长文件的内存峰值"""
+    import tempfile
+    from audio_analysis import estimate_tempo
+
+    formats = ('wav16', 'aiff16', 'wav24', 'wavf32')
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        for i, bpm in enumerate(float(value) for value in args.bpms.split(',')):
+            fmt = formats[i % len(formats)]
+            path = os.path.join(directory, f'{bpm:g}.{fmt[:4]}')
+            _write_audio(path, _synth_track(bpm, args.seconds, args.rate, i), args.rate, fmt)
+            t = time.perf_counter()
+            result = estimate_tempo(path)
+            elapsed = time.perf_counter() - t
+            ok = abs(result.bpm - bpm) <= args.tolerance
+            failures += not ok
+            print(f'{fmt:<7} {bpm:>7.2f} BPM -> {result.bpm:7.2f} '
+                  f'(confidence {result.confidence:.2f}, {args.seconds / elapsed:.0f}x realtime)'
+                  + ('' if ok else '  FAIL'))
+
+        if args.long_minutes:
+            # 长文件：内存峰值应与时长无关（数据通过 memmap 按块读取）
+            path = os.path.join(directory, 'long.wav')
+            import numpy as np
+            samples = np.tile(_synth_track(120, 60, args.rate, 99), args.long_minutes)
+            _write_audio(path, samples, args.rate, 'wav16')
+            del samples
+            tracemalloc.start()
+            t = time.perf_counter()
+            result = estimate_tempo(path)
+            elapsed = time.perf_counter() - t
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            ok = abs(result.bpm - 120) <= args.tolerance and peak <= args.max_peak_mib * 1024 ** 2
+            failures += not ok
+            print(f'{args.long_minutes} min file: {result.bpm:.2f} BPM in {elapsed:.1f} s, '
+                  f'peak traced memory {peak / 1024 ** 2:.1f} MiB' + ('' if ok else '  FAIL'))
+    return 0 if failures == 0 else 1
+
+
+def _curve_scenarios():
+    """速度曲线测试用例：(名称, 时长, 速度函数, 速度突变的时间点)"""
+    def ramp(t):
+        return 100 + 30 * min(1, max(0, (t - 40) / 60))
+
+    def steps(t):
+        return 96 if t < 45 else 128 if t < 90 else 110
+
+    def drift(t):
+        return 120 + 3 * math.sin(2 * math.pi * t / 60)
+
+    return (('ramp', 140, ramp, ()), ('steps', 135, steps, (45, 90)),
+            ('drift', 120, drift, ()))
+
+
+def bench_curve(args):
+    """速度曲线：漂移、渐变与突变的准确度，分段结果，以及吞吐量和内存"""
+    import tempfile
+    from audio_analysis import estimate_tempo, CURVE_WINDOW
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        for i, (name, seconds, tempo, changes) in enumerate(_curve_scenarios()):
+            path = os.path.join(directory, f'{name}.wav')
+            _write_audio(path, _synth_track(tempo, seconds, args.rate, i, args.jitter_ms),
+                         args.rate, 'wav16')
+            t = time.perf_counter()
+            curve = estimate_tempo(path, curve=True).curve
+            elapsed = time.perf_counter() - t
+            # 窗口跨过速度突变的点没有唯一的正确值，不计入
+            points = [(time_, bpm) for time_, bpm in zip(curve.times, curve.bpms)
+                      if all(abs(time_ - change) > CURVE_WINDOW / 2 for change in changes)]
+            errors = sorted(abs(bpm - tempo(time_)) for time_, bpm in points)
+            within = sum(error <= args.tolerance for error in errors) / max(1, len(errors))
+            # 分段后的速度图：各点所在段落的 BPM 与实际速度的偏差（段落内允许小幅漂移）
+            tempo_map = curve.to_tempo_map()
+            mapped = sum(abs(tempo_map.at_time(time_).bpm - tempo(time_)) <= 2 * args.tolerance
+                         for time_, _ in points) / max(1, len(points))
+            ok = (within >= args.min_within and mapped >= args.min_within
+                  and (not changes or len(tempo_map) == len(changes) + 1))
+            failures += not ok
+            print(f'{name:<6} {len(curve)} points, {within:.0%} within ±{args.tolerance:g} BPM '
+                  f'(median error {errors[len(errors) // 2]:.2f}), {len(tempo_map)} sections '
+                  f'({mapped:.0%} within ±{2 * args.tolerance:g} BPM), '
+                  f'{seconds / elapsed:.0f}x realtime' + ('' if ok else '  FAIL'))
+
+        if args.long_minutes:
+            # 吞吐量：同一个文件只检测整体 BPM 与同时计算速度曲线的对比
+            import numpy as np
+            path = os.path.join(directory, 'long.wav')
+            samples = np.tile(_synth_track(120, 60, args.rate, 99), args.long_minutes)
+            _write_audio(path, samples, args.rate, 'wav16')
+            del samples
+            seconds = args.long_minutes * 60
+            for curve in (False, True):
+                tracemalloc.start()
+                t = time.perf_counter()
+                result = estimate_tempo(path, curve=curve)
+                elapsed = time.perf_counter() - t
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                ok = peak <= args.max_peak_mib * 1024 ** 2
+                failures += not ok
+                print(f'{args.long_minutes} min {"curve " if curve else "global"}: '
+                      f'{seconds / elapsed:.0f} s of audio per second, '
+                      f'peak traced memory {peak / 1024 ** 2:.1f} MiB' + ('' if ok else '  FAIL'))
+    return 0 if failures == 0 else 1
+
+
+def _varlen(value):
+    """MIDI 变长数值的编码"""
+    data = [value & 0x7F]
+    value >>= 7
+    while value:
+        data.append(0x80 | (value & 0x7F))
+        value >>= 7
+    return bytes(reversed(data))
+
+
+def _synth_midi(path, megabytes, tempo_changes, division=480):
+    """写出格式 1 的测试 MIDI 文件，返回写入的 (速度事件, 拍号事件)
+
+    第 0 轨为速度渐变与三次拍号变化，其余 15 轨是使用 running status 的音符、
+    控制器、弯音与系统专用事件，按需要的大小重复。第 1 轨末尾另有一个速度事件，
+    检查多音轨合并，同时这一轨必须逐个事件完整扫描。
+    """
+    import struct
+    bar = 4 * division
+    signatures = [(0, 4, 4), (32 * bar, 3, 4), (32 * bar + 16 * bar * 3 // 4, 6, 8)]
+    tempos = [(i * 2 * bar, 60000000 // (90 + i * 60 // max(1, tempo_changes)))
+              for i in range(tempo_changes)]
+    per_track = max(1, megabytes * 1024 * 1024 // 15)
+
+    def track(events):
+        """events 为按 tick 排序的 (tick, 事件字节)"""
+        data = bytearray()
+        last = 0
+        for tick, event in events:
+            data += _varlen(tick - last) + event
+            last = tick
+        data += b'\x00\xff\x2f\x00'
+        return b'MTrk' + struct.pack('>I', len(data)) + data
+
+    conductor = [(0, b'\xff\x03\x09Conductor')]
+    conductor += [(tick, b'\xff\x51\x03' + value.to_bytes(3, 'big')) for tick, value in tempos]
+    conductor += [(tick, b'\xff\x58\x04' + bytes((numerator, denominator.bit_length() - 1, 24, 8)))
+                  for tick, numerator, denominator in signatures]
+    conductor.sort(key=lambda event: event[0])
+
+    # 一小节的演奏数据：program change、控制器、8 个音符（running status）、弯音、系统专用
+    def pattern(channel):
+        data = bytearray(b'\x00' + bytes((0xC0 | channel, channel)))
+        data += b'\x00' + bytes((0xB0 | channel, 7, 100))
+        data += b'\x00' + bytes((0x90 | channel, 60, 90))
+        for note in range(8):
+            data += _varlen(division // 2) + bytes((60 + note, 0)) + b'\x00' + bytes((61 + note, 90))
+        data += b'\x00' + bytes((0xE0 | channel, 0, 64))
+        data += b'\x00\xf0\x05\x7e\x7f\x09\x01\xf7'
+        data += _varlen(0) + bytes((0x80 | channel, 69, 0))
+        return bytes(data)
+
+    tracks = [track(conductor)]
+    for channel in range(15):
+        body = pattern(channel)
+        repeats = per_track // len(body) + 1
+        data = body * repeats
+        if channel == 0:
+            # 第 1 轨末尾的速度事件，每个 pattern 恰好一小节
+            tempos.append((repeats * bar, 500000))
+            data += b'\x00\xff\x51\x03' + (500000).to_bytes(3, 'big')
+        data += b'\x00\xff\x2f\x00'
+        tracks.append(b'MTrk' + struct.pack('>I', len(data)) + data)
+    with open(path, 'wb') as f:
+        f.write(b'MThd' + struct.pack('>IHHH', 6, 1, len(tracks), division))
+        for data in tracks:
+            f.write(data)
+    return sorted(tempos), signatures
+
+
+def bench_midi(args):
+    """MIDI 速度提取：大文件的解析速度与内存，以及提取结果是否与写入的一致"""
+    import tempfile
+    from midi_tempo import read_midi_tempo
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'score.mid')
+        tempos, signatures = _synth_midi(path, args.megabytes, args.tempo_changes)
+        size = os.path.getsize(path)
+        timings = []
+        for _ in range(args.runs):
+            t = time.perf_counter()
+            midi = read_midi_tempo(path)
+            tempo_map = midi.to_tempo_map()
+            timings.append(time.perf_counter() - t)
+        # tracemalloc 会显著拖慢解析，内存单独测量
+        tracemalloc.start()
+        read_midi_tempo(path).to_tempo_map()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    best = min(timings)
+    # 3/4 拍从第 33 小节开始，6/8 拍从其后 16 小节开始
+    bars = {segment.signature: segment.bar for segment in reversed(tempo_map.segments)}
+    ok = (midi.tempos == tempos and midi.signatures == signatures
+          and bars == {'4/4': 1, '3/4': 33, '6/8': 49} and peak <= args.max_peak_kib * 1024)
+    print(f'{size / 1024 ** 2:.1f} MiB, {midi.tracks} tracks: {best * 1000:.0f} ms '
+          f'({size / 1024 ** 2 / best:.1f} MiB/s), peak traced memory {peak / 1024:.0f} KiB')
+    print(f'{len(midi.tempos)} tempo events, {len(midi.signatures)} time signatures, '
+          f'{len(tempo_map)} tempo map sections, first {midi.bpm:g} BPM'
+          + ('' if ok else '  FAIL'))
+    return 0 if ok else 1
+
+
+def bench_index(args):
+    """素材库索引：首次扫描、无变化重扫、touch 与移动文件后的重扫"""
+    import random
+    import shutil
+    import tempfile
+    from tempo_index import TempoIndex
+
+    rng = random.Random(args.seed)
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        library = os.path.join(directory, 'library')
+        expected = {}
+        for i in range(args.files):
+            folder = os.path.join(library, f'pack{i % 10}')
+            os.makedirs(folder, exist_ok=True)
+            bpm = rng.choice((90, 100, 110, 120, 124, 128, 140))
+            path = os.path.join(folder, f'loop{i}_{bpm}.wav')
+            _write_audio(path, _synth_track(bpm, args.seconds, args.rate, i), args.rate, 'wav16')
+            expected[path] = bpm
+
+        with TempoIndex(os.path.join(directory, 'index.sqlite')) as index:
+            def scan(label, check):
+                nonlocal failures
+                t = time.perf_counter()
+                stats = index.scan(library, args.jobs)
+                elapsed = time.perf_counter() - t
+                ok = check(stats)
+                failures += not ok
+                print(f'{label:<14} {elapsed:7.2f} s  {stats}' + ('' if ok else '  FAIL'))
+
+            scan('initial', lambda s: s.analyzed == args.files)
+            scan('unchanged', lambda s: s.unchanged == args.files and s.analyzed == 0)
+            touched = list(expected)[:args.files // 10]
+            for path in touched:
+                os.utime(path)
+            scan('touched', lambda s: s.reused == len(touched) and s.analyzed == 0)
+            moved = os.path.join(library, 'moved')
+            shutil.move(os.path.join(library, 'pack0'), moved)
+            scan('moved', lambda s: s.analyzed == 0 and s.removed == s.reused > 0)
+
+            wrong = sum(1 for path, bpm, _, _ in index.search()
+                        if abs(bpm - int(path.rsplit('_', 1)[1][:-4])) > 0.5)
+            t = time.perf_counter()
+            rows = index.search(118, 130)
+            query = time.perf_counter() - t
+            print(f'search 118-130 BPM: {len(rows)} rows in {query * 1000:.2f} ms, '
+                  f'wrong BPM: {wrong}/{len(index)}')
+            failures += wrong > 0
+
+            # 关键字只匹配文件名：目录名（library、pack）不匹配任何文件
+            by_folder = len(index.search(text='library')) + len(index.search(text='pack'))
+            by_name = len(index.search(text='_120.'))
+            name_ok = by_folder == 0 and by_name == sum(1 for bpm in expected.values() if bpm == 120)
+            print(f'search by file name: "_120." {by_name} rows, folder names {by_folder} rows'
+                  + ('' if name_ok else '  FAIL'))
+            failures += not name_ok
+    return 0 if failures == 0 else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='音频计算器性能基准')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    p = subparsers.add_parser('import-time', help='测量计算核心的导入耗时')
+    p.add_argument('--runs', type=int, default=20)
+    p.add_argument('--budget-ms', type=float, default=5.0)
+    p.set_defaults(func=bench_import_time)
+
+    p = subparsers.add_parser('batch', help='比较批量计算与标量计算')
+    p.add_argument('--size', type=int, default=1000000)
+    p.add_argument('--scalar-size', type=int, default=20000)
+    p.add_argument('--seed', type=int, default=0)
+    p.set_defaults(func=bench_batch)
+
+    p = subparsers.add_parser('cli', help='命令行批量模式的吞吐量与无效行的处理')
+    p.add_argument('--rows', type=int, default=50000)
+    p.add_argument('--jobs', type=int, default=4)
+    p.set_defaults(func=bench_cli)
+
+    p = subparsers.add_parser('table-update', help='表格单元格更新的耗时与内存分配')
+    p.add_argument('--updates', type=int, default=2000)
+    p.set_defaults(func=bench_table_update)
+
+    p = subparsers.add_parser('recompute', help='统计输入合并后的重算次数')
+    p.add_argument('--keys', type=int, default=500)
+    p.add_argument('--key-interval-ms', type=float, default=5)
+    p.add_argument('--interval-ms', type=int, default=16)
+    p.set_defaults(func=bench_recompute)
+
+    p = subparsers.add_parser('server', help='本地计算服务的负载测试')
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=0, help='已运行服务的端口，不指定则启动临时服务')
+    p.add_argument('--clients', type=int, default=64)
+    p.add_argument('--requests', type=int, default=20000)
+    p.add_argument('--distinct', type=int, default=2000, help='不同 BPM 的数量')
+    p.add_argument('--batch', type=int, default=0, help='每个请求的 BPM 数，0 表示单个 BPM 的 GET')
+    p.add_argument('--cache-size', type=int, default=4096)
+    p.add_argument('--seed', type=int, default=0)
+    p.set_defaults(func=bench_server)
+
+    p = subparsers.add_parser('taps', help='手动测速引擎的每次点击耗时')
+    p.add_argument('--taps', type=int, default=100000)
+    p.add_argument('--window', type=int, default=20, help='参与计算的点击次数（4 到 256）')
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--max-ratio', type=float, default=1.5,
+                   help='最大窗口与默认窗口每次点击耗时之比的上限')
+    p.set_defaults(func=bench_taps)
+
+    p = subparsers.add_parser('tap-replay', help='回放点击序列语料，检查稳健测速结果')
+    p.add_argument('--corpus', default=os.path.join(HERE, 'tap_corpus.jsonl'))
+    p.add_argument('--window', type=int, default=20)
+    p.add_argument('--tolerance', type=float, default=0.5, help='允许的 BPM 误差')
+    p.set_defaults(func=bench_tap_replay)
+
+    p = subparsers.add_parser('tap-timers', help='连续点击时同步计时器的对象与内存增长')
+    p.add_argument('--taps', type=int, default=10000)
+    p.add_argument('--idle-ms', type=int, default=200, help='停止点击后同步的等待时间')
+    p.add_argument('--max-growth-kib', type=float, default=64)
+    p.set_defaults(func=bench_tap_timers)
+
+    p = subparsers.add_parser('tap-capture', help='应用级截获空格键的耗时，以及收到空格的控件')
+    p.add_argument('--taps', type=int, default=1000)
+    p.set_defaults(func=bench_tap_capture)
+
+    p = subparsers.add_parser('theme-toggle', help='切换主题的耗时与样式重算次数')
+    p.add_argument('--toggles', type=int, default=40)
+    p.set_defaults(func=bench_theme_toggle)
+
+    p = subparsers.add_parser('language-toggle', help='切换语言的耗时，并检查残留的文本')
+    p.add_argument('--toggles', type=int, default=40)
+    p.set_defaults(func=bench_language_toggle)
+
+    p = subparsers.add_parser('dock-sync', help='拖动主窗口时延迟参数窗口的同步次数')
+    p.add_argument('--moves', type=int, default=500)
+    p.add_argument('--move-interval-ms', type=float, default=2)
+    p.set_defaults(func=bench_dock_sync)
+
+    p = subparsers.add_parser('table-copy', help='表格复制的耗时，并检查 TSV/CSV/JSON 整表复制的往返结果')
+    p.add_argument('--copies', type=int, default=200)
+    p.set_defaults(func=bench_table_copy)
+
+    p = subparsers.add_parser('settings', help='连续切换设置时的写盘次数，以及退出后的恢复')
+    p.add_argument('--toggles', type=int, default=40)
+    p.add_argument('--interval-ms', type=float, default=5)
+    p.set_defaults(func=bench_settings)
+
+    p = subparsers.add_parser('single-instance', help='再次启动时把参数转交给运行中实例的耗时')
+    p.add_argument('--launches', type=int, default=10)
+    p.add_argument('--budget-ms', type=float, default=50, help='相对只编译主脚本的 Python 进程的额外耗时上限')
+    p.set_defaults(func=bench_single_instance)
+
+    p = subparsers.add_parser('startup', help='冷启动各阶段的耗时（导入、构建窗口、首次绘制）')
+    p.add_argument('--runs', type=int, default=10)
+    p.add_argument('--max-first-paint-ms', type=float, default=1500)
+    p.set_defaults(func=bench_startup)
+
+    p = subparsers.add_parser('analysis', help='音频文件 BPM 检测的准确度、速度与内存')
+    p.add_argument('--bpms', default='72.5,90,110.5,120,128,140,160')
+    p.add_argument('--seconds', type=float, default=60)
+    p.add_argument('--rate', type=int, default=44100)
+    p.add_argument('--long-minutes', type=int, default=20, help='长文件测试的时长，0 表示跳过')
+    p.add_argument('--tolerance', type=float, default=0.5)
+    p.add_argument('--max-peak-mib', type=float, default=64)
+    p.set_defaults(func=bench_analysis)
+
+    p = subparsers.add_parser('curve', help='速度曲线的准确度与吞吐量')
+    p.add_argument('--rate', type=int, default=44100)
+    p.add_argument('--jitter-ms', type=float, default=5, help='每个击打时间的随机偏差')
+    p.add_argument('--tolerance', type=float, default=1.5, help='允许的 BPM 误差')
+    p.add_argument('--min-within', type=float, default=0.9, help='误差在允许范围内的点的最低比例')
+    p.add_argument('--long-minutes', type=int, default=10, help='吞吐量测试的时长，0 表示跳过')
+    p.add_argument('--max-peak-mib', type=float, default=64)
+    p.set_defaults(func=bench_curve)
+
+    p = subparsers.add_parser('midi', help='MIDI 文件速度提取的速度与内存')
+    p.add_argument('--megabytes', type=int, default=16, help='测试文件的大小')
+    p.add_argument('--tempo-changes', type=int, default=200)
+    p.add_argument('--runs', type=int, default=3)
+    p.add_argument('--max-peak-kib', type=float, default=512)
+    p.set_defaults(func=bench_midi)
+
+    p = subparsers.add_parser('index', help='素材库索引的扫描与增量重扫')
+    p.add_argument('--files', type=int, default=200)
+    p.add_argument('--seconds', type=float, default=8, help='每个循环素材的时长')
+    p.add_argument('--rate', type=int, default=44100)
+    p.add_argument('--jobs', type=int, default=0, help='并行进程数，默认为 CPU 核数')
+    p.add_argument('--seed', type=int, default=0)
+    p.set_defaults(func=bench_index)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
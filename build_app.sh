@@ -21,6 +21,7 @@ venv/bin/pyinstaller --noconfirm \
                      --windowed \
                      --icon=icon.ico \
                      --add-data "icon.ico:." \
+                     --add-data "locales:locales" \
                      --name="AudioCalculator" \
                      --target-arch universal2 \
                      --osx-bundle-identifier "com.audiocalculator.app" \
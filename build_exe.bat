@@ -15,6 +15,7 @@ venv\Scripts\pyinstaller --noconfirm ^
     --windowed ^
     --icon=icon.ico ^
     --add-data "icon.ico;." ^
+    --add-data "locales;locales" ^
     --name="AudioCalculator" ^
     --version-file=version.txt ^
     audio_calculator.py
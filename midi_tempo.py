@@ -0,0 +1,235 @@
+"""从标准 MIDI 文件（SMF）中提取速度与拍号。
+
+只依赖标准库。文件通过 mmap 映射，逐个事件扫描各音轨：音符、控制器、系统专用
+等事件只计算长度后跳过，只有速度（FF 51）和拍号（FF 58）事件被保留，内存占用
+与文件大小无关，几十 MB 的管弦乐总谱也不会构建完整的事件列表。事件的 tick 取决于
+之前所有事件的时间差，因此扫描无法跳跃进行；但不含 FF 51 / FF 58 字节序列的音轨
+（通常是除速度轨以外的全部音轨）用 mmap.rfind 整轨跳过，每个音轨也只扫描到最后
+一个可能的速度或拍号事件为止。
+
+支持格式 0 和格式 1（格式 2 的各音轨相互独立，按格式 1 合并处理），每四分音符
+tick 数和 SMPTE 两种时间单位，以及 RIFF 封装的 RMID 文件。没有速度事件时按规范
+视为 120 BPM、4/4 拍。
+
+用法：
+    python midi_tempo.py song.mid [--map song_tempo.txt]
+"""
+import argparse
+import mmap
+import struct
+import sys
+
+DEFAULT_BPM = 120.0
+MIDI_EXTENSIONS = ('.mid', '.midi', '.smf', '.rmi')
+
+
+class MidiTempo:
+    """MIDI 文件中的速度与拍号事件，各自按 tick 排序"""
+
+    def __init__(self, format, tracks, division, tempos, signatures):
+        self.format = format
+        self.tracks = tracks
+        self.division = division      # 每四分音符的 tick 数；SMPTE 时为负数（见 ticks_per_second）
+        self.tempos = tempos          # [(tick, 每四分音符的微秒数)]
+        self.signatures = signatures  # [(tick, 分子, 分母)]
+
+    @property
+    def ticks_per_second(self):
+        """SMPTE 时间单位下每秒的 tick 数，按四分音符计时返回 None"""
+        if self.division >= 0:
+            return None
+        frames = -(self.division >> 8)
+        return (29.97 if frames == 29 else frames) * (self.division & 0xFF)
+
+    @property
+    def bpm(self):
+        """第一个速度（第 0 个 tick 处的速度）"""
+        if self.tempos and self.tempos[0][0] == 0:
+            return _bpm(self.tempos[0][1])
+        return DEFAULT_BPM
+
+    def changes(self):
+        """合并速度与拍号事件，产出 (四分音符位置, BPM, 分子, 分母)
+
+        同一 tick 上的多个事件只保留最后的状态，不改变状态的事件被省略。
+        """
+        events = sorted([(tick, 0, value) for tick, value in self.tempos]
+                        + [(tick, 1, value) for tick, *value in self.signatures],
+                        key=lambda event: (event[0], event[1]))
+        ticks_per_second = self.ticks_per_second
+        bpm, signature = DEFAULT_BPM, (4, 4)
+        quarters, last_tick = 0.0, 0
+        state = None
+        if not events or events[0][0] > 0:
+            state = (bpm, signature)
+            yield (quarters, bpm) + signature
+        for index, (tick, kind, value) in enumerate(events):
+            if ticks_per_second:
+                quarters += (tick - last_tick) / ticks_per_second * bpm / 60
+            else:
+                quarters = tick / self.division
+            last_tick = tick
+            if kind == 0:
+                bpm = _bpm(value)
+            else:
+                signature = tuple(value)
+            if index + 1 < len(events) and events[index + 1][0] == tick:
+                continue
+            if state != (bpm, signature):
+                state = (bpm, signature)
+                yield (quarters, bpm) + signature
+
+    def to_tempo_map(self):
+        """转换为速度图（tempo_map.TempoMap），段落起点按拍号换算为小节（可为小数）"""
+        from tempo_map import TempoMap, TempoSegment
+        segments = []
+        last_quarters = 0.0
+        for quarters, bpm, numerator, denominator in self.changes():
+            bar = 1.0
+            if segments:
+                last = segments[-1]
+                bar = round(last.bar + (quarters - last_quarters)
+                            / (last.numerator * 4 / last.denominator), 6)
+            segments.append(TempoSegment(bar, bpm, numerator, denominator))
+            last_quarters = quarters
+        return TempoMap(segments)
+
+
+def _bpm(microseconds):
+    """每四分音符的微秒数换算为 BPM，保留两位小数（与输入框一致）"""
+    return round(60000000 / microseconds, 2)
+
+
+def read_midi_tempo(path):
+    """读取 MIDI 文件的速度与拍号事件，文件格式错误时抛出 ValueError"""
+    with open(path, 'rb') as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # 空文件无法映射
+            raise ValueError('不是有效的 MIDI 文件') from None
+    with data:
+        return parse_midi_tempo(data)
+
+
+def parse_midi_tempo(data):
+    """从 bytes、mmap 等可按下标访问的数据中提取速度与拍号事件"""
+    start = 0
+    if data[:4] == b'RIFF' and data[8:12] == b'RMID':
+        start = _find_riff_data(data)
+    if data[start:start + 4] != b'MThd' or len(data) < start + 14:
+        raise ValueError('不是有效的 MIDI 文件')
+    length, format, tracks, division = struct.unpack('>IHHh', data[start + 4:start + 14])
+    if length < 6 or format > 2 or division == 0:
+        raise ValueError('不是有效的 MIDI 文件')
+
+    tempos, signatures = [], []
+    position = start + 8 + length
+    found = 0
+    while found < tracks and position + 8 <= len(data):
+        kind = data[position:position + 4]
+        size = struct.unpack('>I', data[position + 4:position + 8])[0]
+        body = position + 8
+        end = min(len(data), body + size)
+        if kind == b'MTrk':
+            # 速度和拍号事件以 FF 51 / FF 58 开头：音轨中没有这两个字节序列时整轨跳过，
+            # 否则只扫描到最后一个出现的位置。速度通常集中在第一轨，其余音轨不必逐个事件解析
+            last = max(data.rfind(b'\xff\x51', body, end), data.rfind(b'\xff\x58', body, end))
+            if last >= 0:
+                _scan_track(data, body, last + 1, tempos, signatures)
+            found += 1
+        position = body + size  # 未知的块直接跳过
+    if not found:
+        raise ValueError('MIDI 文件中没有音轨')
+    tempos.sort(key=lambda event: event[0])
+    signatures.sort(key=lambda event: event[0])
+    return MidiTempo(format, found, division, tempos, signatures)
+
+
+def _find_riff_data(data):
+    position = 12
+    while position + 8 <= len(data):
+        kind = data[position:position + 4]
+        size = struct.unpack('<I', data[position + 4:position + 8])[0]
+        if kind == b'data':
+            return position + 8
+        position += 8 + size + (size & 1)
+    raise ValueError('RMID 文件中没有 MIDI 数据')
+
+
+def _scan_track(data, position, end, tempos, signatures):
+    """扫描一个音轨，只把速度与拍号事件加入列表"""
+    tick = 0
+    running = 0
+    try:
+        while position < end:
+            # 变长的时间差，通常只有一个字节
+            byte = data[position]
+            position += 1
+            delta = byte & 0x7F
+            while byte & 0x80:
+                byte = data[position]
+                position += 1
+                delta = (delta << 7) | (byte & 0x7F)
+            tick += delta
+
+            status = data[position]
+            if status < 0x80:
+                # 沿用上一个状态字节（running status），当前字节即为数据
+                if not running:
+                    raise ValueError('MIDI 音轨数据损坏')
+                position += 1 if running >= 0xC0 and running < 0xE0 else 2
+                continue
+            position += 1
+            if status < 0xF0:
+                running = status
+                position += 1 if status >= 0xC0 and status < 0xE0 else 2
+                continue
+
+            running = 0  # 系统专用与元事件取消 running status
+            if status == 0xFF:
+                meta = data[position]
+                position += 1
+            byte = data[position]
+            position += 1
+            length = byte & 0x7F
+            while byte & 0x80:
+                byte = data[position]
+                position += 1
+                length = (length << 7) | (byte & 0x7F)
+            if status == 0xFF:
+                if meta == 0x51 and length == 3:
+                    microseconds = (data[position] << 16) | (data[position + 1] << 8) | data[position + 2]
+                    if microseconds:
+                        tempos.append((tick, microseconds))
+                elif meta == 0x58 and length >= 2 and data[position]:
+                    signatures.append((tick, data[position], 1 << data[position + 1]))
+                elif meta == 0x2F:
+                    return
+            elif status not in (0xF0, 0xF7):
+                raise ValueError('MIDI 音轨数据损坏')
+            position += length
+    except IndexError:
+        raise ValueError('MIDI 音轨数据不完整') from None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='从 MIDI 文件提取速度与拍号')
+    parser.add_argument('path', help='MIDI 文件')
+    parser.add_argument('--map', metavar='PATH', help='写出速度图文件')
+    args = parser.parse_args(argv)
+    try:
+        midi = read_midi_tempo(args.path)
+    except (OSError, ValueError) as e:
+        print(f'{args.path}: {e}', file=sys.stderr)
+        return 1
+    tempo_map = midi.to_tempo_map()
+    if args.map:
+        tempo_map.save(args.map)
+    else:
+        for line in tempo_map.lines():
+            print(line)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""单实例：再次启动时把命令行参数转交给已在运行的窗口，然后立即退出。
+
+运行中的程序用 QLocalServer 监听一个按用户区分的本地套接字（Windows 上是命名
+管道，其他系统上是 Unix 域套接字）。本模块是客户端一侧，只依赖标准库，在
+audio_calculator.py 导入 PyQt6 之前调用：连接成功就发送工作目录和命令行参数，
+收到确认后退出；连接被拒绝或套接字不存在说明没有实例在运行，照常启动界面。
+连接成功但没有及时确认（运行中的实例界面线程正忙）时参数已经送达，同样退出，
+不会再启动第二个界面；两种平台上等待确认都不超过 CONNECT_TIMEOUT。客户端只导入
+os、socket 和 sys（Windows 上另有内置的 _winapi），这条路径的耗时几乎全在解释器
+启动上。
+
+用法：
+    python audio_calculator.py --bpm 128          已在运行时只转交参数
+    python audio_calculator.py --new-instance     总是启动新的实例
+"""
+import os
+import socket
+import sys
+
+from app_dirs import APP_NAME
+
+CONNECT_TIMEOUT = 0.5  # 秒；本机连接通常在 1 毫秒内完成
+REPLY = b'ok\n'
+
+# send() 的结果
+FORWARDED = 'forwarded'      # 运行中的实例确认收到
+UNCONFIRMED = 'unconfirmed'  # 有实例在监听，但没有及时确认（例如界面线程正忙）
+NO_INSTANCE = 'no-instance'  # 连接被拒绝或套接字不存在：没有实例在运行
+
+
+def server_name():
+    """QLocalServer 监听的名称：Windows 上为管道名，其他系统上为套接字文件的完整路径"""
+    if sys.platform == 'win32':
+        user = os.environ.get('USERNAME') or 'user'
+        return f'{APP_NAME}-{user}'
+    # 与 QDir.tempPath() 一致；不导入 tempfile，以免拖慢启动
+    base = os.environ.get('XDG_RUNTIME_DIR') or os.environ.get('TMPDIR') or '/tmp'
+    return os.path.join(base, f'{APP_NAME.lower()}-{os.getuid()}.sock')
+
+
+def encode_message(argv, cwd=None):
+    """转交给运行中实例的消息：一行字节数，随后是以 NUL 分隔的工作目录和各个参数
+
+    参数中不会出现 NUL，但可能包含换行，因此按长度分帧。不使用 json，以免导入 re
+    等模块拖慢启动。相对路径由接收方按工作目录解析。
+    """
+    body = '\0'.join([cwd or os.getcwd(), *argv]).encode('utf-8', 'replace')
+    return b'%d\n' % len(body) + body
+
+
+def decode_message(body):
+    """解析消息正文（不含长度行），返回 (argv, cwd)"""
+    cwd, *argv = body.decode('utf-8', 'replace').split('\0')
+    return argv, cwd
+
+
+def send(argv, timeout=CONNECT_TIMEOUT):
+    """把参数转交给运行中的实例，返回 FORWARDED、UNCONFIRMED 或 NO_INSTANCE"""
+    message = encode_message(argv)
+    try:
+        if sys.platform == 'win32':
+            confirmed = _forward_pipe(message, timeout)
+        else:
+            confirmed = _forward_socket(message, timeout)
+    except (FileNotFoundError, ConnectionRefusedError):
+        return NO_INSTANCE
+    except OSError:  # 超时、管道忙等：有实例在监听
+        return UNCONFIRMED
+    return FORWARDED if confirmed else UNCONFIRMED
+
+
+def forward(argv, timeout=CONNECT_TIMEOUT):
+    """把参数转交给运行中的实例，对方确认收到时返回 True"""
+    return send(argv, timeout) == FORWARDED
+
+
+def is_running(timeout=CONNECT_TIMEOUT):
+    """是否有实例在监听；只有连接被拒绝或套接字不存在时返回 False（套接字文件可以删除）"""
+    try:
+        if sys.platform == 'win32':
+            with open(rf'\\.\pipe\{server_name()}', 'r+b', buffering=0):
+                pass
+        else:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(timeout)
+                sock.connect(server_name())
+    except (FileNotFoundError, ConnectionRefusedError):
+        return False
+    except OSError:  # 超时、管道忙：有实例在监听，只是没有及时接受连接
+        pass
+    return True
+
+
+def _forward_socket(message, timeout):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(server_name())
+        sock.sendall(message)
+        reply = b''
+        while not reply.endswith(b'\n'):
+            chunk = sock.recv(16)
+            if not chunk:
+                break
+            reply += chunk
+    return reply == REPLY
+
+
+def _forward_pipe(message, timeout):
+    # 用重叠 I/O 读写命名管道，每次读写最多等待 timeout 秒：运行中的实例界面线程正忙时
+    # 不会卡在等待确认上。_winapi 是 Windows 上的内置模块（multiprocessing 同样用它操作
+    # 管道），导入几乎不花时间。管道不存在时 CreateFile 抛出 FileNotFoundError
+    import _winapi
+    handle = _winapi.CreateFile(rf'\\.\pipe\{server_name()}',
+                                _winapi.GENERIC_READ | _winapi.GENERIC_WRITE, 0, _winapi.NULL,
+                                _winapi.OPEN_EXISTING, _winapi.FILE_FLAG_OVERLAPPED, _winapi.NULL)
+    try:
+        if not _wait_pipe(*_winapi.WriteFile(handle, message, overlapped=True), timeout):
+            return False
+        reply = b''
+        while not reply.endswith(b'\n'):
+            overlapped, err = _winapi.ReadFile(handle, 16, overlapped=True)
+            if not _wait_pipe(overlapped, err, timeout):
+                return False
+            chunk = overlapped.getbuffer()
+            if not chunk:
+                break
+            reply += chunk
+        return reply == REPLY
+    finally:
+        _winapi.CloseHandle(handle)
+
+
+def _wait_pipe(overlapped, err, timeout):
+    """等待一次重叠读写完成；超时时取消这次读写并返回 False"""
+    import _winapi
+    if err == _winapi.ERROR_IO_PENDING:
+        if _winapi.WaitForSingleObject(overlapped.event, int(timeout * 1000)) != _winapi.WAIT_OBJECT_0:
+            overlapped.cancel()
+            overlapped.GetOverlappedResult(True)  # 取消完成之后缓冲区才能释放
+            return False
+    overlapped.GetOverlappedResult(True)
+    return True
+
+
+def main(argv=None):
+    """只转交参数，不启动界面；没有实例在运行时返回 1"""
+    argv = sys.argv[1:] if argv is None else argv
+    if send(argv) != NO_INSTANCE:
+        return 0
+    print('没有正在运行的音频计算器', file=sys.stderr)
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
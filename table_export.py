@@ -0,0 +1,39 @@
+"""把参数表的一部分（选区、整列或整张表）格式化为 TSV、CSV 或 JSON 文本。
+
+只依赖标准库，界面把结果一次性放到剪贴板：TSV 可以直接粘贴到电子表格，
+JSON 为以表头为键的对象列表，数值单元格转换为数字。
+
+用法：
+    format_table(['Note Value', 'Notes'], [['1/4', '500.00']], 'tsv')
+"""
+import csv
+import io
+import json
+import math
+
+FORMATS = ('tsv', 'csv', 'json')
+
+
+def format_table(headers, rows, fmt='tsv'):
+    """headers 为列名，rows 为各行的单元格文本；返回带表头的文本"""
+    if fmt == 'json':
+        records = [dict(zip(headers, map(_json_value, row))) for row in rows]
+        return json.dumps(records, ensure_ascii=False, indent=2)
+    if fmt not in FORMATS:
+        raise ValueError(f'未知的格式：{fmt}')
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter='\t' if fmt == 'tsv' else ',', lineterminator='\n')
+    writer.writerow(headers)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def _json_value(text):
+    """数值文本转换为数字，其他文本（行名、空单元格）保持原样"""
+    try:
+        value = float(text)
+    except ValueError:
+        return text
+    if not math.isfinite(value):
+        return text
+    return int(value) if value.is_integer() and '.' not in text else value
@@ -0,0 +1,310 @@
+"""手动测速（tap tempo）引擎。
+
+最近 N 次点击的时间戳保存在固定容量的环形缓冲区中，tap() 和 bpm() 都是 O(1)。
+相邻间隔之和可以逐项相消，恰好等于最新与最旧时间戳之差，因此不需要逐个
+累加间隔，也不会随点击次数累积浮点误差。
+
+稳健估计（estimate）只在调用时计算：tap() 把时间戳放入待处理队列（最多一个
+窗口），estimate() 再依次处理。窗口内的原始间隔保存在有序列表中，插入和移出
+用 bisect 定位（O(log n) 次比较），再由 list 在 C 中整体移动指针：严格说是
+O(n)，但窗口最多 MAX_WINDOW = 256 项，一次移动不超过 2 KB。没有换成双堆或
+树状数组：它们每一步都在 Python 中执行，在这个规模下反而比一次移动慢，树状
+数组还需要把间隔量化，中位数不再精确。benchmark.py taps 比较默认窗口与最大
+窗口下每次点击（tap + estimate）的耗时。中位数 O(1)，MAD（中位数绝对偏差）
+用两个有序序列的第 k 小查找 O(log n)。每次点击按中位数换算成拍数，漏拍（间隔约为 2、3 拍）
+计入相应的拍数，多拍和偏离节拍的点击被剔除；接受的点击按 (拍序号, 时间) 做
+最小二乘拟合，斜率即每拍时长。拟合所需的和增量维护，每满一个窗口重新以最旧
+的点为原点累加一次。连续多次被剔除时认为速度已改变，从最近的点击重新开始
+（只影响稳健估计，bpm() 仍是整个窗口的算术平均）。
+
+本模块不依赖 PyQt6，可在脚本和基准测试中直接使用。
+"""
+import bisect
+import math
+from array import array
+from collections import deque
+
+MIN_WINDOW = 4
+MAX_WINDOW = 256
+DEFAULT_WINDOW = 20
+
+MAX_BEATS = 4          # 单个间隔最多按 4 拍计（连续漏 3 拍）
+MAX_REJECTED_RUN = 3   # 连续剔除这么多次后重新开始
+MAX_MEDIAN_DRIFT = 0.2  # 间隔中位数与拟合的每拍时长相差超过该比例时重新开始
+
+
+class TapEstimate:
+    __slots__ = ('bpm', 'confidence', 'taps', 'missed', 'extra')
+
+    def __init__(self, bpm, confidence, taps, missed, extra):
+        self.bpm = bpm                  # 拟合得到的 BPM
+        self.confidence = confidence    # 0 到 1，综合了剔除比例和拟合误差
+        self.taps = taps                # 参与拟合的间隔数
+        self.missed = missed            # 识别出的漏拍数
+        self.extra = extra              # 剔除的多余点击数
+
+    def __repr__(self):
+        return (f'TapEstimate(bpm={self.bpm:.3f}, confidence={self.confidence:.2f}, '
+                f'taps={self.taps}, missed={self.missed}, extra={self.extra})')
+
+
+class TapTempo:
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = 0
+        self.count = 0
+        self.set_window(window)
+
+    def set_window(self, window):
+        """修改窗口大小（参与计算的点击次数），已有点击保留最近的部分"""
+        window = min(MAX_WINDOW, max(MIN_WINDOW, int(window)))
+        recent = self.timestamps()[-window:]
+        self.window = window
+        self._times = array('d', bytes(8 * window))
+        self.reset()
+        for timestamp in recent:
+            self.tap(timestamp)
+
+    def reset(self):
+        self._start = 0
+        self.count = 0
+        self._pending = deque(maxlen=self.window)  # 还没有计入稳健估计的点击
+        self._stale = False  # 待处理的点击溢出过，之前的估计状态已过时
+        self._reset_tracker()
+
+    def _reset_tracker(self):
+        self._last = None       # 稳健估计处理过的上一次点击
+        self._recent = deque()  # 稳健估计窗口内的原始间隔，按时间顺序
+        self._intervals = []    # 同样的间隔，保持有序
+        self._reset_fit()
+
+    def _reset_fit(self):
+        self._points = deque()  # 接受的点击 (拍序号, 时间)
+        self._origin = (0, 0.0)
+        self._sums = [0.0] * 5  # Σx, Σy, Σxx, Σxy, Σyy（相对原点）
+        self._since_rebase = 0
+        self._flags = deque()   # 最近的点击是否被接受
+        self._inliers = 0
+        self._rejected_run = 0
+        self.missed = 0
+        self.extra = 0
+
+    def tap(self, timestamp):
+        """记录一次点击，时间戳单位为毫秒；O(1)，稳健估计留到 estimate() 时计算"""
+        times = self._times
+        if self.count < self.window:
+            times[(self._start + self.count) % self.window] = timestamp
+            self.count += 1
+        else:
+            # 缓冲区已满：覆盖最旧的时间戳
+            times[self._start] = timestamp
+            self._start = (self._start + 1) % self.window
+
+        if len(self._pending) == self.window:
+            self._stale = True  # 最旧的待处理点击被挤出队列
+        self._pending.append(timestamp)
+
+    def _sync(self):
+        """把待处理的点击计入稳健估计"""
+        if self._stale:
+            # 一个窗口内都没有调用 estimate()：之前的状态已全部移出窗口，从头开始
+            self._stale = False
+            self._reset_tracker()
+        pending = self._pending
+        while pending:
+            self._track_tap(pending.popleft())
+
+    def _track_tap(self, timestamp):
+        previous = self._last
+        if previous is not None:
+            recent, intervals = self._recent, self._intervals
+            if len(recent) == self.window - 1:
+                # 最旧的间隔移出窗口
+                del intervals[bisect.bisect_left(intervals, recent.popleft())]
+            interval = timestamp - previous
+            recent.append(interval)
+            bisect.insort(intervals, interval)
+        self._last = timestamp
+
+        if not self._track(timestamp):
+            # 速度已改变：只保留最近两次点击重新开始
+            self._reset_tracker()
+            self._track_tap(previous)
+            self._track_tap(timestamp)
+
+    @property
+    def interval_count(self):
+        return max(0, self.count - 1)
+
+    @property
+    def interval_sum(self):
+        """窗口内相邻间隔之和（毫秒）"""
+        if self.count < 2:
+            return 0.0
+        newest = self._times[(self._start + self.count - 1) % self.window]
+        return newest - self._times[self._start]
+
+    def average_interval(self):
+        """平均点击间隔（毫秒），不足两次点击时返回 None"""
+        if self.count < 2:
+            return None
+        return self.interval_sum / (self.count - 1)
+
+    def bpm(self):
+        """按算术平均间隔计算的 BPM，不剔除异常点击"""
+        interval = self.average_interval()
+        if not interval or interval <= 0:
+            return None
+        return 60000 / interval
+
+    def timestamps(self):
+        """按时间顺序返回窗口内的时间戳"""
+        return [self._times[(self._start + i) % self.window] for i in range(self.count)]
+
+    def median_interval(self):
+        """稳健估计窗口内间隔的中位数"""
+        self._sync()
+        return self._median()
+
+    def _median(self):
+        intervals = self._intervals
+        n = len(intervals)
+        if not n:
+            return None
+        return (intervals[(n - 1) // 2] + intervals[n // 2]) / 2
+
+    def interval_scatter(self):
+        """间隔的稳健标准差：1.4826 × MAD"""
+        self._sync()
+        return self._scatter()
+
+    def _scatter(self):
+        intervals = self._intervals
+        n = len(intervals)
+        if n < 2:
+            return 0.0
+        median = self._median()
+        split = bisect.bisect_left(intervals, median)
+        mad = (_kth_distance(intervals, split, median, (n - 1) // 2)
+               + _kth_distance(intervals, split, median, n // 2)) / 2
+        return 1.4826 * mad
+
+    def _track(self, timestamp):
+        """把一次点击对齐到节拍并加入拟合；需要重新开始时返回 False"""
+        if not self._points:
+            self._accept(0, timestamp)
+            return True
+        median = self._median()
+        period = self._period()
+        if period and abs(median - period) > MAX_MEDIAN_DRIFT * period:
+            # 多数间隔已偏离拟合的节拍
+            return False
+        last_beat, last_time = self._points[-1]
+        elapsed = timestamp - last_time
+        beats = math.floor(elapsed / median + 0.5) if median > 0 else 0
+        tolerance = max(4 * self._scatter(), 0.04 * median)
+        if 1 <= beats <= MAX_BEATS and abs(elapsed - beats * median) <= min(0.3 * median,
+                                                                             tolerance * beats):
+            self.missed += beats - 1
+            self._accept(last_beat + beats, timestamp)
+            self._rejected_run = 0
+            return True
+
+        if elapsed < median:
+            self.extra += 1
+        self._flag(False)
+        self._rejected_run += 1
+        return self._rejected_run < MAX_REJECTED_RUN
+
+    def _flag(self, accepted):
+        if len(self._flags) == self.window:
+            self._inliers -= self._flags.popleft()
+        self._flags.append(accepted)
+        self._inliers += accepted
+
+    def _accept(self, beat, timestamp):
+        self._flag(True)
+        points = self._points
+        if len(points) == self.window:
+            self._add(*points.popleft(), -1)
+        points.append((beat, timestamp))
+        self._add(beat, timestamp, 1)
+        self._since_rebase += 1
+        if self._since_rebase >= self.window:
+            # 以最旧的点为原点重新累加，避免增减过程中误差累积
+            self._origin = points[0]
+            self._sums = [0.0] * 5
+            self._since_rebase = 0
+            for point in points:
+                self._add(*point, 1)
+
+    def _add(self, beat, timestamp, sign):
+        x = beat - self._origin[0]
+        y = timestamp - self._origin[1]
+        sums = self._sums
+        sums[0] += sign * x
+        sums[1] += sign * y
+        sums[2] += sign * x * x
+        sums[3] += sign * x * y
+        sums[4] += sign * y * y
+
+    def _centered_sums(self):
+        n = len(self._points)
+        sx, sy, sxx, sxy, syy = self._sums
+        return n, sxx - sx * sx / n, sxy - sx * sy / n, syy - sy * sy / n
+
+    def period(self):
+        """拟合得到的每拍时长（毫秒），接受的点击不足两次时返回 None"""
+        self._sync()
+        return self._period()
+
+    def _period(self):
+        if len(self._points) < 2:
+            return None
+        _, sxx, sxy, _ = self._centered_sums()
+        if sxx <= 0 or sxy <= 0:
+            return None
+        return sxy / sxx
+
+    def estimate(self):
+        """稳健估计的 BPM 及置信度，接受的点击不足两次时返回 None
+
+        先处理上次调用以来的点击；每处理一次点击是 O(log n) 次比较加一次有序列表的移动。
+        """
+        period = self.period()
+        if period is None:
+            return None
+        n, sxx, sxy, syy = self._centered_sums()
+        bpm = 60000 / period
+
+        # 置信度 = 接受比例 × 拟合精度；BPM 标准误差为 1 时精度为 0.5
+        precision = 0.0
+        if n > 2:
+            residual = max(0.0, syy - sxy * sxy / sxx)
+            bpm_error = bpm * math.sqrt(residual / (n - 2) / sxx) / period
+            precision = 1 / (1 + bpm_error)
+        confidence = self._inliers / len(self._flags) * precision
+        return TapEstimate(bpm, confidence, n - 1, self.missed, self.extra)
+
+
+def _kth_distance(values, split, center, k):
+    """有序序列 values 中各值到 center 距离的第 k 小（从 0 开始），O(log n)
+
+    split 之前的值都小于 center：左侧距离 center - values[split-1-i] 与右侧距离
+    values[split+j] - center 各自递增，在两个有序序列上二分左侧取的个数。
+    """
+    left, right = split, len(values) - split
+    lo, hi = max(0, k + 1 - right), min(k + 1, left)
+    while lo < hi:
+        i = (lo + hi) // 2
+        j = k + 1 - i
+        if center - values[split - 1 - i] < values[split + j - 1] - center:
+            lo = i + 1
+        else:
+            hi = i
+    i, j = lo, k + 1 - lo
+    candidates = []
+    if i:
+        candidates.append(center - values[split - i])
+    if j:
+        candidates.append(values[split + j - 1] - center)
+    return max(candidates)
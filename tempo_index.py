@@ -0,0 +1,302 @@
+"""素材库速度索引：扫描目录中的音频文件，检测 BPM 并保存在本地 SQLite 数据库中。
+
+每个文件以路径、大小、修改时间和内容哈希记录。重新扫描时大小和修改时间都没变的
+文件直接跳过；有变化的文件先计算哈希，内容未变（例如只是被 touch）或与库中
+其他文件相同（移动、复制）时沿用已有结果，只有真正的新内容才会重新检测。
+哈希和检测都在进程池中并行执行，结果分批提交，中途取消也会保留已完成的部分。
+
+查询只访问数据库（bpm 列有索引），不导入 NumPy，界面打开曲库时可以立即显示。
+
+用法：
+    python tempo_index.py scan ~/Samples [--jobs 8]
+    python tempo_index.py search --min-bpm 120 --max-bpm 130 [--text kick]
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+
+from app_dirs import user_cache_dir
+
+AUDIO_EXTENSIONS = ('.wav', '.wave', '.aif', '.aiff', '.aifc')
+HASH_BLOCK_SIZE = 1 << 20
+COMMIT_INTERVAL = 200  # 每检测这么多个文件提交一次
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    bpm REAL,
+    confidence REAL,
+    duration REAL,
+    error TEXT,
+    indexed_at REAL NOT NULL,
+    name TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS tracks_bpm ON tracks (bpm);
+CREATE INDEX IF NOT EXISTS tracks_hash ON tracks (hash);
+"""
+
+
+def default_index_path():
+    return os.path.join(user_cache_dir(), 'tempo_index.sqlite')
+
+
+def file_hash(path):
+    """文件内容的 BLAKE2b 哈希（128 位）"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(HASH_BLOCK_SIZE)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _hash_worker(path):
+    try:
+        return path, file_hash(path)
+    except OSError:
+        return path, None
+
+
+def _analyze_worker(path):
+    """在工作进程中检测 BPM，返回 (路径, bpm, 置信度, 时长, 错误)"""
+    from audio_analysis import estimate_tempo
+    try:
+        result = estimate_tempo(path)
+    except Exception as e:  # 损坏的文件可能抛出任何异常，只记为这个文件的错误，不中断扫描
+        return path, None, None, None, str(e) or type(e).__name__
+    return path, result.bpm, result.confidence, result.duration, None
+
+
+def walk_audio_files(root):
+    """递归产出目录中音频文件的 (路径, 大小, 修改时间)"""
+    pending = [root]
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in AUDIO_EXTENSIONS:
+                        stat = entry.stat()
+                        yield entry.path, stat.st_size, stat.st_mtime_ns
+                except OSError:
+                    continue
+
+
+class ScanStats:
+    __slots__ = ('found', 'unchanged', 'reused', 'analyzed', 'failed', 'removed')
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def __repr__(self):
+        return ', '.join(f'{name} {getattr(self, name)}' for name in self.__slots__)
+
+
+class ScanCancelled(Exception):
+    pass
+
+
+class TempoIndex:
+    def __init__(self, path=None):
+        self.path = path or default_index_path()
+        self.db = sqlite3.connect(self.path)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(_SCHEMA)
+        columns = [row[1] for row in self.db.execute('PRAGMA table_info(tracks)')]
+        if 'name' not in columns:
+            # 旧版本的索引没有文件名列：补上并按路径填好
+            self.db.create_function('basename', 1, os.path.basename, deterministic=True)
+            self.db.execute("ALTER TABLE tracks ADD COLUMN name TEXT NOT NULL DEFAULT ''")
+            self.db.execute('UPDATE tracks SET name = basename(path)')
+            self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.db.execute('SELECT COUNT(*) FROM tracks').fetchone()[0]
+
+    def search(self, min_bpm=None, max_bpm=None, text='', limit=None):
+        """按 BPM 范围和文件名关键字查询，返回 (路径, bpm, 置信度, 时长) 列表，按 BPM 排序
+
+        关键字只匹配文件名，不匹配目录：否则输入目录名（例如 home）会匹配所有文件。
+        """
+        sql = 'SELECT path, bpm, confidence, duration FROM tracks WHERE bpm IS NOT NULL'
+        params = []
+        if min_bpm is not None:
+            sql += ' AND bpm >= ?'
+            params.append(min_bpm)
+        if max_bpm is not None:
+            sql += ' AND bpm <= ?'
+            params.append(max_bpm)
+        if text:
+            sql += " AND name LIKE ? ESCAPE '\\'"
+            escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            params.append(f'%{escaped}%')
+        sql += ' ORDER BY bpm, path'
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        return self.db.execute(sql, params).fetchall()
+
+    def scan(self, root, jobs=None, progress=None, cancelled=None):
+        """扫描目录并更新索引，返回 ScanStats
+
+        progress(已完成, 总数) 在哈希和检测阶段调用；cancelled() 返回 True 时
+        提交已完成的结果并抛出 ScanCancelled。
+        """
+        root = os.path.abspath(root)
+        stats = ScanStats()
+        prefix = os.path.join(root, '')
+        known = {path: (size, mtime_ns, digest) for path, size, mtime_ns, digest in self.db.execute(
+            'SELECT path, size, mtime_ns, hash FROM tracks WHERE substr(path, 1, ?) = ?',
+            (len(prefix), prefix))}
+
+        found = {}
+        for path, size, mtime_ns in walk_audio_files(root):
+            found[path] = (size, mtime_ns)
+        stats.found = len(found)
+        changed = [path for path, key in found.items() if known.get(path, (None, None))[:2] != key]
+        stats.unchanged = stats.found - len(changed)
+
+        jobs = jobs or os.cpu_count() or 1
+        total = len(changed)
+        done = 0
+        pool = None
+        if jobs > 1 and total > 1:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            # 界面在多线程的 Qt 进程中扫描，fork 会复制其他线程持有的锁，改用 spawn
+            pool = ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context('spawn'))
+        try:
+            # 第一步：计算有变化的文件的哈希，内容已知的直接沿用结果
+            to_analyze = []
+            hashes = {}
+            for path, digest in self._map(pool, _hash_worker, changed, jobs, cancelled):
+                done += 1
+                if progress is not None:
+                    progress(done, total * 2)
+                if digest is None:
+                    stats.failed += 1
+                    continue
+                hashes[path] = digest
+                size, mtime_ns = found[path]
+                if known.get(path, (None, None, None))[2] == digest:
+                    self.db.execute('UPDATE tracks SET size = ?, mtime_ns = ? WHERE path = ?',
+                                    (size, mtime_ns, path))
+                    stats.reused += 1
+                    continue
+                same = self.db.execute('SELECT bpm, confidence, duration, error FROM tracks '
+                                       'WHERE hash = ? LIMIT 1', (digest,)).fetchone()
+                if same:
+                    self._store(path, size, mtime_ns, digest, *same)
+                    stats.reused += 1
+                else:
+                    to_analyze.append(path)
+
+            # 已删除的文件（在沿用结果之后删除，移动过的文件可以找到原来的记录）
+            removed = [(path,) for path in known if path not in found]
+            self.db.executemany('DELETE FROM tracks WHERE path = ?', removed)
+            stats.removed = len(removed)
+            self.db.commit()
+
+            # 第二步：检测新内容的 BPM
+            done = total * 2 - len(to_analyze)
+            for path, bpm, confidence, duration, error in self._map(pool, _analyze_worker,
+                                                                    to_analyze, jobs, cancelled):
+                size, mtime_ns = found[path]
+                self._store(path, size, mtime_ns, hashes[path], bpm, confidence, duration, error)
+                if error:
+                    stats.failed += 1
+                else:
+                    stats.analyzed += 1
+                done += 1
+                if done % COMMIT_INTERVAL == 0:
+                    self.db.commit()
+                if progress is not None:
+                    progress(done, total * 2)
+        finally:
+            self.db.commit()
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+        return stats
+
+    def _store(self, path, size, mtime_ns, digest, bpm, confidence, duration, error):
+        self.db.execute('INSERT OR REPLACE INTO tracks (path, size, mtime_ns, hash, bpm, confidence, '
+                        'duration, error, indexed_at, name) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                        (path, size, mtime_ns, digest, bpm, confidence, duration, error,
+                         time.time(), os.path.basename(path)))
+
+    @staticmethod
+    def _map(pool, function, items, jobs, cancelled):
+        """按完成顺序产出结果；进程池中最多保留 4×jobs 个任务，以便及时响应取消"""
+        if pool is None:
+            for item in items:
+                if cancelled is not None and cancelled():
+                    raise ScanCancelled()
+                yield function(item)
+            return
+        from concurrent.futures import wait, FIRST_COMPLETED
+        items = iter(items)
+        pending = set()
+        while True:
+            if cancelled is not None and cancelled():
+                raise ScanCancelled()
+            for item in items:
+                pending.add(pool.submit(function, item))
+                if len(pending) >= jobs * 4:
+                    break
+            if not pending:
+                return
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                yield future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='素材库速度索引')
+    parser.add_argument('--index', help='数据库路径，默认在用户缓存目录')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    p = subparsers.add_parser('scan', help='扫描目录并更新索引')
+    p.add_argument('root')
+    p.add_argument('--jobs', type=int, default=0, help='并行进程数，默认为 CPU 核数')
+    p = subparsers.add_parser('search', help='按 BPM 范围查询')
+    p.add_argument('--min-bpm', type=float)
+    p.add_argument('--max-bpm', type=float)
+    p.add_argument('--text', default='', help='文件名中包含的文字')
+    args = parser.parse_args(argv)
+
+    with TempoIndex(args.index) as index:
+        if args.command == 'scan':
+            t = time.perf_counter()
+            stats = index.scan(args.root, args.jobs or None)
+            print(f'{stats} ({time.perf_counter() - t:.1f} s)', file=sys.stderr)
+        else:
+            for path, bpm, confidence, duration in index.search(args.min_bpm, args.max_bpm,
+                                                               args.text):
+                print(f'{bpm:.2f}\t{confidence:.2f}\t{duration:.1f}\t{path}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""速度图（tempo map）：按段落记录 BPM 与拍号，并查询任意位置的混响/延迟参数。
+
+文件格式为纯文本，每行一个段落：起始小节、BPM、可选的拍号（省略时沿用上一段），
+以 # 开头的行为注释，分隔符可以是空白或逗号：
+
+    # bar  bpm  signature
+    1      120  4/4
+    17     128
+    33     96   6/8
+
+BPM 与 MIDI 及常见 DAW 一致，按四分音符计；拍号只影响小节长度。第一个段落之前的
+小节按第一个段落的速度计时，时间 0 总是第 1 小节的起点。保存时小节和 BPM 不做
+舍入，读回后与原值完全相同。
+加载时为每个段落预先算好参数表，按小节或时间的查询用二分查找，复杂度 O(log n)。
+"""
+import bisect
+import math
+
+from audio_core import parse_bpm, calculate_reverb, calculate_delay
+
+
+def format_number(value):
+    """不丢失精度的文本形式：整数不带小数点，其余用 repr（读回后与原值相同）"""
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class TempoSegment:
+    __slots__ = ('bar', 'bpm', 'numerator', 'denominator', 'start_time', 'reverb', 'delay')
+
+    def __init__(self, bar, bpm, numerator=4, denominator=4):
+        self.bar = bar
+        self.bpm = bpm
+        self.numerator = numerator
+        self.denominator = denominator
+        self.start_time = 0.0  # 段落起点，单位秒
+        self.reverb = None
+        self.delay = None
+
+    @property
+    def signature(self):
+        return f'{self.numerator}/{self.denominator}'
+
+    @property
+    def bar_seconds(self):
+        """一个小节的时长（秒）"""
+        return self.numerator * 4 / self.denominator * 60 / self.bpm
+
+    def __repr__(self):
+        return f'TempoSegment(bar={self.bar}, bpm={self.bpm}, signature={self.signature})'
+
+
+class TempoMap:
+    def __init__(self, segments):
+        if not segments:
+            raise ValueError('速度图至少需要一个段落')
+        if not all(math.isfinite(segment.bar) and segment.bar >= 1 for segment in segments):
+            raise ValueError('速度图的起始小节必须是不小于 1 的有限数')
+        self.segments = sorted(segments, key=lambda segment: segment.bar)
+        self._bars = [segment.bar for segment in self.segments]
+        if len(set(self._bars)) != len(self._bars):
+            raise ValueError('速度图中存在重复的起始小节')
+
+        # 累加各段落的时长得到起始时间，并预先计算参数表（相同 BPM 的段落共用）；
+        # 第一个段落之前的小节按它的速度计时
+        tables = {}
+        previous = self.segments[0]
+        time = (previous.bar - 1) * previous.bar_seconds
+        for segment in self.segments:
+            if segment is not previous:
+                time += (segment.bar - previous.bar) * previous.bar_seconds
+            segment.start_time = time
+            if segment.bpm not in tables:
+                tables[segment.bpm] = (calculate_reverb(segment.bpm), calculate_delay(segment.bpm))
+            segment.reverb, segment.delay = tables[segment.bpm]
+            previous = segment
+        self._times = [segment.start_time for segment in self.segments]
+
+    @classmethod
+    def parse(cls, lines):
+        segments = []
+        numerator, denominator = 4, 4
+        for lineno, line in enumerate(lines, 1):
+            line = line.split('#', 1)[0].replace(',', ' ').split()
+            if not line:
+                continue
+            try:
+                bar = float(line[0])
+                bpm = parse_bpm(line[1])
+                if len(line) > 2:
+                    numerator, denominator = (int(part) for part in line[2].split('/'))
+            except (ValueError, IndexError):
+                bpm = None
+            if bpm is None or not math.isfinite(bar) or bar < 1 or numerator <= 0 or denominator <= 0:
+                raise ValueError(f'速度图第 {lineno} 行格式错误')
+            segments.append(TempoSegment(bar, bpm, numerator, denominator))
+        return cls(segments)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls.parse(f)
+
+    def lines(self):
+        """按文件格式输出各段落，拍号只在变化时写出"""
+        yield '# bar  bpm  signature'
+        signature = None
+        for segment in self.segments:
+            line = f'{format_number(segment.bar)}\t{format_number(segment.bpm)}'
+            if segment.signature != signature:
+                signature = segment.signature
+                line += f'\t{signature}'
+            yield line
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(line + '\n' for line in self.lines())
+
+    def __len__(self):
+        return len(self.segments)
+
+    def __getitem__(self, index):
+        return self.segments[index]
+
+    def index_at_bar(self, bar):
+        """包含指定小节（从 1 开始，可为小数）的段落下标"""
+        return max(0, bisect.bisect_right(self._bars, bar) - 1)
+
+    def index_at_time(self, seconds):
+        """包含指定时间（秒）的段落下标"""
+        return max(0, bisect.bisect_right(self._times, seconds) - 1)
+
+    def at_bar(self, bar):
+        return self.segments[self.index_at_bar(bar)]
+
+    def at_time(self, seconds):
+        return self.segments[self.index_at_time(seconds)]
+
+    def bar_to_time(self, bar):
+        segment = self.at_bar(bar)
+        return segment.start_time + (bar - segment.bar) * segment.bar_seconds
+
+    def time_to_bar(self, seconds):
+        segment = self.at_time(seconds)
+        return segment.bar + (seconds - segment.start_time) / segment.bar_seconds
@@ -0,0 +1,187 @@
+"""预计算的 BPM 查找表。
+
+输入框限制为 1～999、最多两位小数，因此合法 BPM 只有 99,801 个。这里把每个
+BPM 的全部混响/延迟参数预先算好，按列写入一个二进制文件，之后以只读方式
+内存映射：查询只是按下标取值，不做任何运算，也只有被访问到的页才会驻留内存。
+
+文件头中记录了由 audio_core 公式计算出的指纹，公式变化后指纹不再匹配，
+open_table 会自动重新生成。
+
+用法：
+    python tempo_table.py [--path FILE] [--rebuild]
+"""
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+from audio_core import REVERB_TYPES, NOTE_VALUES, calculate_reverb, calculate_delay
+
+MAGIC = b'ACTEMPO\x00'
+FORMAT_VERSION = 1
+# 魔数、格式版本、公式指纹、首个 BPM 键、行数、列数，补齐到 64 字节
+HEADER = struct.Struct('<8sI32sIII8x')
+
+# BPM 以百分之一为单位编码为整数键：1.00 → 100，999.00 → 99900
+MIN_KEY = 100
+MAX_KEY = 99900
+REVERB_COLUMNS = len(REVERB_TYPES) * 3
+DELAY_COLUMNS = len(NOTE_VALUES) * 3
+_REVERB_NAMES = tuple(name for name, _, _ in REVERB_TYPES)
+_NOTE_NAMES = tuple(note for note, _ in NOTE_VALUES)
+
+# 用于生成指纹的采样 BPM，覆盖边界和常见取值
+_PROBE_BPMS = (1.0, 1.01, 33.33, 60.0, 99.99, 120.0, 128.37, 174.0, 999.0)
+
+
+def default_table_path():
+    from app_dirs import user_cache_dir
+    return os.path.join(user_cache_dir(), 'tempo_table.bin')
+
+
+def formula_fingerprint():
+    """根据表结构和公式在采样点上的结果计算指纹，公式变化时指纹随之变化"""
+    digest = hashlib.sha256()
+    digest.update(repr((FORMAT_VERSION, REVERB_TYPES, NOTE_VALUES)).encode())
+    for bpm in _PROBE_BPMS:
+        digest.update(repr(calculate_reverb(bpm)).encode())
+        digest.update(repr(calculate_delay(bpm)).encode())
+    return digest.digest()
+
+
+def _bpm_key(bpm):
+    """BPM 对应的整数键；不在表中（超出范围或多于两位小数）时返回 None"""
+    key = round(bpm * 100)
+    if MIN_KEY <= key <= MAX_KEY and key / 100 == bpm:
+        return key
+    return None
+
+
+def build_table(path=None):
+    """生成查找表文件（先写临时文件再原子替换），返回文件路径"""
+    path = path or default_table_path()
+    count = MAX_KEY - MIN_KEY + 1
+    columns = [array('d') for _ in range(REVERB_COLUMNS + DELAY_COLUMNS)]
+    for key in range(MIN_KEY, MAX_KEY + 1):
+        bpm = key / 100
+        col = 0
+        for rows in (calculate_reverb(bpm), calculate_delay(bpm)):
+            for row in rows:
+                for value in row[1:]:
+                    columns[col].append(value)
+                    col += 1
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, formula_fingerprint(),
+                                MIN_KEY, count, len(columns)))
+            for column in columns:
+                column.tofile(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+
+class TempoTable:
+    """只读内存映射的查找表"""
+
+    def __init__(self, path):
+        if sys.byteorder != 'little':
+            raise ValueError('查找表仅支持小端平台')
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(self._mmap) < HEADER.size:
+                raise ValueError('查找表文件不完整')
+            magic, version, fingerprint, min_key, count, ncols = HEADER.unpack_from(self._mmap)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError('查找表格式不匹配')
+            if fingerprint != formula_fingerprint():
+                raise ValueError('查找表与当前公式不一致')
+            if (min_key, count, ncols) != (MIN_KEY, MAX_KEY - MIN_KEY + 1,
+                                           REVERB_COLUMNS + DELAY_COLUMNS):
+                raise ValueError('查找表尺寸不匹配')
+            if len(self._mmap) != HEADER.size + count * ncols * 8:
+                raise ValueError('查找表文件不完整')
+        except ValueError:
+            self._mmap.close()
+            raise
+        self.count = count
+        self._view = memoryview(self._mmap)
+        self._values = self._view[HEADER.size:].cast('d')
+
+    def column(self, index):
+        """返回第 index 列（所有 BPM）的只读视图"""
+        return self._values[index * self.count:(index + 1) * self.count]
+
+    def _rows(self, bpm, names, first_column):
+        key = _bpm_key(bpm)
+        if key is None:
+            return None
+        values = self._values
+        offset = key - MIN_KEY + first_column * self.count
+        step = self.count
+        rows = []
+        for name in names:
+            rows.append((name, values[offset], values[offset + step], values[offset + 2 * step]))
+            offset += 3 * step
+        return rows
+
+    def reverb(self, bpm):
+        """与 calculate_reverb 结果相同；BPM 不在表中时返回 None"""
+        return self._rows(bpm, _REVERB_NAMES, 0)
+
+    def delay(self, bpm):
+        """与 calculate_delay 结果相同；BPM 不在表中时返回 None"""
+        return self._rows(bpm, _NOTE_NAMES, REVERB_COLUMNS)
+
+    def close(self):
+        self._values.release()
+        self._view.release()
+        self._mmap.close()
+
+
+def open_table(path=None, build=True):
+    """打开查找表；文件缺失或与公式不一致时按需重新生成，失败返回 None"""
+    path = path or default_table_path()
+    try:
+        return TempoTable(path)
+    except (OSError, ValueError):
+        if not build:
+            return None
+    try:
+        build_table(path)
+        return TempoTable(path)
+    except (OSError, ValueError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='生成 BPM 查找表')
+    parser.add_argument('--path', help='查找表文件路径，默认为用户缓存目录')
+    parser.add_argument('--rebuild', action='store_true', help='强制重新生成')
+    args = parser.parse_args(argv)
+
+    path = args.path or default_table_path()
+    if args.rebuild:
+        build_table(path)
+    table = open_table(path)
+    if table is None:
+        print(f'无法生成查找表: {path}')
+        return 1
+    print(f'{path}: {table.count} BPM, {os.path.getsize(path)} bytes')
+    table.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())